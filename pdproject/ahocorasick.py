@@ -0,0 +1,121 @@
+import configparser
+from array import array
+from collections import deque
+
+import matches
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton built from a list of patterns. All patterns are matched against a
+    string in a single pass, rather than scanning the string once per pattern as KMPSearch() does.
+    Overlapping occurrences are counted in the same way as KMPSearch(), so the hit rate of each
+    pattern is identical to running KMPSearch() on that pattern alone.
+
+    __init__(patterns: list)
+
+    Methods:
+    \tfind(), search(), hit_rates().
+    """
+    def __init__(self, patterns: list):
+        if type(patterns) is not list:
+            raise TypeError("Parameter of AhoCorasick() was {type} and must be of type 'list'.".format(type=type(patterns)))
+        self.patterns = patterns
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for i, pattern in enumerate(patterns):
+            self.__add_pattern(i, pattern)
+        self.__build_failure_links()
+
+    def __add_pattern(self, index: int, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(index)
+
+    def __build_failure_links(self):
+        """
+        Breadth-first traversal of the trie that sets the failure link of every state to the state
+        of its longest proper suffix that is also in the trie. The output of each failure state is
+        merged into the state itself, so that a single lookup reports every pattern ending there.
+        """
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback > 0 and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, string: str) -> tuple:
+        """
+        Scans the string once and returns the index of the pattern and the start index of every 
+        occurrence of any pattern, as two arrays of equal length ordered by end index.
+        """
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        patterns = self.patterns
+        pattern_ids = array('I')
+        positions = array('I')
+        state = 0
+        for i, char in enumerate(string):
+            while state > 0 and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                pattern_ids.append(index)
+                positions.append(i - len(patterns[index]) + 1)
+        return pattern_ids, positions
+
+    def search(self, string: str, matches: matches.Matches = None, document_id: int = 0) -> list:
+        """
+        Returns a list containing the number of occurrences of each pattern, in the same order as the 
+        patterns were given. If matches is given, a record of every occurrence is added to it under 
+        the index of its pattern and document_id.
+        """
+        total_matches = [0] * len(self.patterns)
+        pattern_ids, positions = self.find(string)
+        for index in pattern_ids:
+            total_matches[index] += 1
+        if matches is not None:
+            for index, position in zip(pattern_ids, positions):
+                matches.add(index, document_id, position, len(self.patterns[index]))
+        return total_matches
+
+    def hit_rates(self, string: str, matches: matches.Matches = None, document_id: int = 0) -> list:
+        """
+        Returns the hit rate of each pattern in the string, calculated in the same way as KMPSearch().
+        """
+        n = len(string)
+        if n == 0:
+            return [0] * len(self.patterns)
+        hit_rates = []
+        for pattern, occurrences in zip(self.patterns, self.search(string, matches, document_id)):
+            hit_rates.append((occurrences * len(pattern)) / n * 100)
+        return hit_rates
+
+
+if __name__ == '__main__':
+    # AhoCorasick test cases:
+    string = "ABABDABACDABABCABABABABDABACDABABCABAB"
+    patterns = ["ABABCABAB", "ABAB", "DABA"]
+
+    automaton = AhoCorasick(patterns)
+    print(automaton.hit_rates(string))
@@ -1,6 +1,8 @@
+import os
 import configparser
 
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
 
 import kmp
@@ -16,10 +18,16 @@ ANALYSIS_KMP = config.getboolean('ANALYSIS', 'RuntimeAnalysis_KMP')
 ANALYSIS_KMP_WRAPPER = config.getboolean('ANALYSIS', 'RuntimeAnalysis_KMP_Wrapper')
 ANALYSIS_LCSS = config.getboolean('ANALYSIS', 'RuntimeAnalysis_LCSS')
 ANALYSIS_LCSS_WRAPPER = config.getboolean('ANALYSIS', 'RuntimeAnalysis_LCSS_Wrapper')
+ANALYSIS_LCSS_NUMPY = config.getboolean('ANALYSIS', 'RuntimeAnalysis_LCSS_Numpy')
 ANALYSIS_RABIN_KARP = config.getboolean('ANALYSIS', 'RuntimeAnalysis_RabinKarp')
 ANALYSIS_RABIN_KARP_WRAPPER = config.getboolean('ANALYSIS', 'RuntimeAnalysis_RabinKarp_Wrapper')
 ANALYSIS_ALL = config.getboolean('ANALYSIS', 'RuntimeAnalysis_All')
 ANALYSIS_ALL_WRAPPER = config.getboolean('ANALYSIS', 'RuntimeAnalysis_All_Wrapper')
+ANALYSIS_PLOT_DIR = config['ANALYSIS']['AnalysisPlotDirectory']
+
+# Plots are saved without a display when AnalysisPlotDirectory is set:
+if ANALYSIS_PLOT_DIR:
+    matplotlib.use('Agg')
 
 
 def KMP_wrapper_analysis(amt_patterns:int, amt_corpus_docs:int, pattern: str, string: str):
@@ -46,6 +54,16 @@ def rabinkarp_wrapper_analysis(amt_patterns:int, amt_corpus_docs:int, pattern: s
             rabinkarp.RabinKarp(pattern, string)
 
 
+def show_plot(filename: str):
+    """Displays the current plot, or saves it as filename within AnalysisPlotDirectory when it is set."""
+    if ANALYSIS_PLOT_DIR:
+        os.makedirs(ANALYSIS_PLOT_DIR, exist_ok=True)
+        plt.savefig(os.path.join(ANALYSIS_PLOT_DIR, filename), bbox_inches='tight')
+        plt.clf()
+    else:
+        plt.show()
+
+
 def square_n(n:list):
     for i in range(len(n)):
         for i in range(len(n)):
@@ -53,7 +71,7 @@ def square_n(n:list):
 
 
 if __name__ == '__main__':
-    if not ANALYSIS_KMP and not ANALYSIS_KMP_WRAPPER and not ANALYSIS_LCSS and not ANALYSIS_LCSS_WRAPPER and not ANALYSIS_RABIN_KARP and not ANALYSIS_RABIN_KARP_WRAPPER:
+    if not ANALYSIS_KMP and not ANALYSIS_KMP_WRAPPER and not ANALYSIS_LCSS and not ANALYSIS_LCSS_WRAPPER and not ANALYSIS_LCSS_NUMPY and not ANALYSIS_RABIN_KARP and not ANALYSIS_RABIN_KARP_WRAPPER:
         print("No algorithm analyses are enabled. Please enable at least one analysis option in 'config.ini' under the [ANALYSIS] header.")
 
     # Runtime analysis of KMP (set RuntimeAnalysis_KMP to True in 'config.ini'):
@@ -80,7 +98,7 @@ if __name__ == '__main__':
         plt.ylabel("Time(ms)", fontsize=28)
         plt.legend(fontsize=22)
         plt.title("KMPSearch Runtimes", fontsize=30)
-        plt.show()
+        show_plot("kmp.png")
 
 
     if ANALYSIS_KMP_WRAPPER:
@@ -102,7 +120,7 @@ if __name__ == '__main__':
         plt.ylabel("Time(ms)", fontsize=28)
         plt.legend(fontsize=22)
         plt.title("KMPSearch Runtimes within Wrapper Function", fontsize=30)
-        plt.show()
+        show_plot("kmp_wrapper.png")
 
 
     # Runtime analysis of LCSS (set RuntimeAnalysis_LCSS to True in 'config.ini'):
@@ -129,7 +147,7 @@ if __name__ == '__main__':
         plt.ylabel("Time(ms)", fontsize=28)
         plt.legend(fontsize=22)
         plt.title("LCSS Runtimes", fontsize=30)
-        plt.show()
+        show_plot("lcss.png")
 
 
     if ANALYSIS_LCSS_WRAPPER:
@@ -151,7 +169,26 @@ if __name__ == '__main__':
         plt.ylabel("Time(ms)", fontsize=28)
         plt.legend(fontsize=22)
         plt.title("LCSS Runtimes within Wrapper Function", fontsize=30)
-        plt.show()
+        show_plot("lcss_wrapper.png")
+
+
+    # Runtime comparison of LCSS against LCSSNumpy (set RuntimeAnalysis_LCSS_Numpy to True in 'config.ini'):
+    if ANALYSIS_LCSS_NUMPY:
+        # Plot LCSS(): m = n:
+        nValuesEqual, tValuesEqual = tryItABunchLCSSEqual( lcss.LCSS, startN = 50, endN = 2000, stepSize=50, numTrials=10)
+        plt.plot(nValuesEqual, tValuesEqual, color="blue", label="LCSS() m = n")
+
+        # Plot LCSSNumpy(): m = n:
+        nValuesNumpy, tValuesNumpy = tryItABunchLCSSEqual( lcss.LCSSNumpy, startN = 50, endN = 2000, stepSize=50, numTrials=10)
+        plt.plot(nValuesNumpy, tValuesNumpy, color="red", label="LCSSNumpy() m = n")
+
+        plt.xlabel("Length of string, n", fontsize=28)
+        plt.xticks(fontsize=24)
+        plt.yticks(fontsize=24)
+        plt.ylabel("Time(ms)", fontsize=28)
+        plt.legend(fontsize=22)
+        plt.title("LCSS and LCSSNumpy Runtimes", fontsize=30)
+        show_plot("lcss_numpy.png")
 
 
     # Runtime analysis of RabinKarp (set RuntimeAnalysis_RabinKarp to True in 'config.ini'):
@@ -180,7 +217,7 @@ if __name__ == '__main__':
         plt.ylabel("Time(ms)", fontsize=28)
         plt.legend(fontsize=22)
         plt.title("RabinKarp Runtimes", fontsize=30)
-        plt.show()
+        show_plot("rabinkarp.png")
 
 
     if ANALYSIS_RABIN_KARP_WRAPPER:
@@ -202,7 +239,7 @@ if __name__ == '__main__':
         plt.ylabel("Time(ms)", fontsize=28)
         plt.legend(fontsize=22)
         plt.title("RabinKarp Runtimes within Wrapper Function", fontsize=30)
-        plt.show()
+        show_plot("rabinkarp_wrapper.png")
 
 
     if ANALYSIS_ALL:
@@ -252,7 +289,7 @@ if __name__ == '__main__':
         plt.ylabel("Time(ms)", fontsize=28)
         plt.legend(fontsize=22)
         plt.title("Algorithm Runtimes", fontsize=30)
-        plt.show()
+        show_plot("all.png")
 
 
     if ANALYSIS_ALL_WRAPPER:
@@ -302,4 +339,4 @@ if __name__ == '__main__':
         plt.ylabel("Time(ms)", fontsize=28)
         plt.legend(fontsize=22)
         plt.title("Algorithm Runtimes within Wrapper Functions", fontsize=30)
-        plt.show()
\ No newline at end of file
+        show_plot("all_wrapper.png")
\ No newline at end of file
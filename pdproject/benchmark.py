@@ -0,0 +1,375 @@
+import os
+import gc
+import sys
+import json
+import time
+import zlib
+import argparse
+import platform
+import contextlib
+import configparser
+
+import numpy as np
+
+import document
+import corpus
+import results
+import kmp
+import lcss
+import rabinkarp
+import suffixautomaton
+import pdproject
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+BENCHMARK_FIXTURE_DIR = config['BENCHMARK']['BenchmarkFixtureDirectory']
+BENCHMARK_OUTPUT_FILE = config['BENCHMARK']['BenchmarkOutputFile']
+BENCHMARK_SEED = config.getint('BENCHMARK', 'BenchmarkSeed')
+BENCHMARK_WARMUP = config.getint('BENCHMARK', 'BenchmarkWarmup')
+BENCHMARK_TRIALS = config.getint('BENCHMARK', 'BenchmarkTrials')
+BENCHMARK_REGRESSION_THRESHOLD = config.getfloat('BENCHMARK', 'BenchmarkRegressionThreshold')
+
+# Each trial calls the benchmarked function as many times as needed to take at least this long, so
+# that the resolution of the clock does not dominate the timings of fast functions:
+MIN_TRIAL_NS = 1000000
+
+ALPHABET = np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ', dtype=np.uint8)
+
+
+def _rng(name: str, seed: int) -> np.random.Generator:
+    """Returns a random generator that only depends on the seed and the name of the fixture."""
+    return np.random.default_rng([seed, zlib.crc32(name.encode('utf-8'))])
+
+
+def _cached(name: str, seed: int, generate) -> str:
+    """Returns the fixture of the given name, generating and caching it in BENCHMARK_FIXTURE_DIR once."""
+    path = os.path.join(BENCHMARK_FIXTURE_DIR, "{seed}-{name}.txt".format(seed=seed, name=name))
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return f.read()
+    text = generate(_rng(name, seed))
+    os.makedirs(BENCHMARK_FIXTURE_DIR, exist_ok=True)
+    with open(path + ".tmp", 'w') as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+    return text
+
+
+def random_string(n: int, seed: int = BENCHMARK_SEED, name: str = "string") -> str:
+    """Returns a seeded random string of n uppercase letters, generated in one vectorized call."""
+    return _cached("{name}-{n}".format(name=name, n=n), seed, lambda rng: ALPHABET[rng.integers(0, len(ALPHABET), n)].tobytes().decode('ascii'))
+
+
+def _random_words(rng: np.random.Generator, vocabulary: list, n: int) -> str:
+    return ' '.join(vocabulary[i] for i in rng.integers(0, len(vocabulary), n))
+
+
+def random_documents(num_documents: int, num_paragraphs: int, seed: int = BENCHMARK_SEED) -> tuple:
+    """
+    Returns a seeded random plagiarized document and a list of corpus documents of num_paragraphs
+    paragraphs each. Every corpus document copies a random share of the sentences of the plagiarized
+    document, so that the algorithms find matches of varying hit rates.
+    """
+    def generate_vocabulary(rng):
+        lengths = rng.integers(2, 10, 2000)
+        return ' '.join(ALPHABET[rng.integers(0, len(ALPHABET), length)].tobytes().decode('ascii').lower() for length in lengths)
+    vocabulary = _cached("vocabulary", seed, generate_vocabulary).split(' ')
+
+    def generate_paragraphs(rng, count, copied_sentences=(), copy_rate=0.0):
+        paragraphs = []
+        for i in range(count):
+            sentences = []
+            for j in range(int(rng.integers(3, 7))):
+                if len(copied_sentences) != 0 and rng.random() < copy_rate:
+                    sentences.append(copied_sentences[int(rng.integers(0, len(copied_sentences)))])
+                else:
+                    sentences.append(_random_words(rng, vocabulary, int(rng.integers(8, 20))).capitalize())
+            paragraphs.append('. '.join(sentences) + '.')
+        return '\n'.join(paragraphs) + '\n'
+
+    plagiarized = document.Document("plag.txt")
+    plagiarized.parse(_cached("plag-{p}".format(p=num_paragraphs), seed, lambda rng: generate_paragraphs(rng, num_paragraphs)))
+    sentences = list(plagiarized.sentences)
+    documents = []
+    for i in range(num_documents):
+        name = "corpus-{p}-{i}".format(p=num_paragraphs, i=i)
+        doc = document.Document(name + ".txt")
+        doc.parse(_cached(name, seed, lambda rng: generate_paragraphs(rng, num_paragraphs, sentences, rng.random() * 0.5)))
+        documents.append(doc)
+    return plagiarized, documents
+
+
+def _corpus(documents: list) -> corpus.Corpus:
+    corp = corpus.Corpus()
+    for doc in documents:
+        corp.add_document(doc.filename, doc)
+    return corp
+
+
+def _quiet(function):
+    """Returns a function that runs function with its output discarded, as the wrappers print progress."""
+    def quiet():
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            return function()
+    return quiet
+
+
+def _pattern_and_string(n: int, m: int, seed: int) -> tuple:
+    """Returns a pattern of length m and a string of length n; a shorter pattern is taken from the string."""
+    string = random_string(n, seed)
+    if m == n:
+        return random_string(n, seed, "pattern"), string
+    return string[(n - m) // 2:(n - m) // 2 + m], string
+
+
+def _search_case(search, n: int, m: int, seed: int):
+    def setup():
+        pattern, string = _pattern_and_string(n, m, seed)
+        return lambda: search(pattern, string)
+    return setup
+
+
+def _compiled_case(compile_pattern, n: int, m: int, seed: int):
+    def setup():
+        pattern, string = _pattern_and_string(n, m, seed)
+        compiled = compile_pattern(pattern)
+        return lambda: compiled.search(string)
+    return setup
+
+
+def _prefix_hashes_case(n: int, m: int, seed: int, warm: bool):
+    """
+    Times RabinKarpNumpy against a string. A cold case builds the PrefixHashes of the string in every
+    call, like the other search cases, while a warm case builds them once in setup(), as when they are
+    cached on a corpus Document and shared by every pattern set.
+    """
+    def setup():
+        pattern, string = _pattern_and_string(n, m, seed)
+        compiled = rabinkarp.RabinKarpNumpy([pattern])
+        if not warm:
+            return lambda: compiled.hit_rates(string)
+        prefix_hashes = rabinkarp.PrefixHashes(string)
+        return lambda: compiled.hit_rates(prefix_hashes)
+    return setup
+
+
+def _compile_case(compile_pattern, m: int, seed: int):
+    def setup():
+        pattern = random_string(m, seed, "pattern")
+        return lambda: compile_pattern(pattern)
+    return setup
+
+
+def _automaton_case(n: int, seed: int):
+    def setup():
+        string, pattern = random_string(n, seed), random_string(n, seed, "pattern")
+        automaton = suffixautomaton.SuffixAutomaton(string)
+        return lambda: lcss.LCSSAutomaton(automaton, pattern)
+    return setup
+
+
+def _wrapper_case(wrapper, num_documents: int, num_paragraphs: int, seed: int):
+    def setup():
+        plagiarized, documents = random_documents(num_documents, num_paragraphs, seed)
+        corp = _corpus(documents)
+        return _quiet(lambda: wrapper(corp, plagiarized, results.Results()))
+    return setup
+
+
+def _winnowing_case(num_documents: int, num_paragraphs: int, seed: int):
+    def setup():
+        plagiarized, documents = random_documents(num_documents, num_paragraphs, seed)
+        corp = _corpus(documents)
+        index = _quiet(lambda: pdproject.compile_fingerprint_index(corp))()
+        return _quiet(lambda: pdproject.winnowing_wrapper(corp, index, plagiarized, results.Results()))
+    return setup
+
+
+def _fingerprint_index_case(num_documents: int, num_paragraphs: int, seed: int):
+    def setup():
+        plagiarized, documents = random_documents(num_documents, num_paragraphs, seed)
+        corp = _corpus(documents)
+        return _quiet(lambda: pdproject.compile_fingerprint_index(corp))
+    return setup
+
+
+def _string_cases(seed: int) -> dict:
+    cases = {}
+    for n in [1000, 10000]:
+        for m in [n, 20]:
+            label = "[m={m},n={n}]".format(m="n" if m == n else m, n=n)
+            cases["kmp.KMPSearch" + label] = _search_case(kmp.KMPSearch, n, m, seed)
+            cases["kmp.KMPPattern.search" + label] = _compiled_case(kmp.compile_pattern, n, m, seed)
+            cases["rabinkarp.RabinKarp" + label] = _search_case(rabinkarp.RabinKarp, n, m, seed)
+            cases["rabinkarp.RabinKarpPattern.search" + label] = _compiled_case(rabinkarp.compile_pattern, n, m, seed)
+            cases["rabinkarp.RabinKarpNumpy.search.cold" + label] = _prefix_hashes_case(n, m, seed, False)
+            cases["rabinkarp.RabinKarpNumpy.search.warm" + label] = _prefix_hashes_case(n, m, seed, True)
+        cases["kmp.compile_pattern[m={n}]".format(n=n)] = _compile_case(kmp.compile_pattern, n, seed)
+        cases["rabinkarp.compile_pattern[m={n}]".format(n=n)] = _compile_case(rabinkarp.compile_pattern, n, seed)
+    # LCSS is quadratic in the length of both strings, so it is run on shorter strings:
+    for n in [200, 1000]:
+        label = "[m=n,n={n}]".format(n=n)
+        cases["lcss.LCSS" + label] = _search_case(lambda pattern, string: lcss.LCSS(string, pattern), n, n, seed)
+        cases["lcss.LCSSNumpy" + label] = _search_case(lambda pattern, string: lcss.LCSSNumpy(string, pattern), n, n, seed)
+        cases["lcss.LCSSAutomaton" + label] = _automaton_case(n, seed)
+        cases["suffixautomaton.SuffixAutomaton[n={n}]".format(n=n)] = _compile_case(suffixautomaton.SuffixAutomaton, n, seed)
+    return cases
+
+
+def _wrapper_cases(seed: int) -> dict:
+    cases = {}
+    for num_documents, num_paragraphs in [(10, 5), (20, 10)]:
+        label = "[docs={d},paragraphs={p}]".format(d=num_documents, p=num_paragraphs)
+        cases["pdproject.KMP_wrapper" + label] = _wrapper_case(pdproject.KMP_wrapper, num_documents, num_paragraphs, seed)
+        cases["pdproject.rabinkarp_wrapper" + label] = _wrapper_case(pdproject.rabinkarp_wrapper, num_documents, num_paragraphs, seed)
+        cases["pdproject.rabinkarp_multipattern_wrapper" + label] = _wrapper_case(pdproject.rabinkarp_multipattern_wrapper, num_documents, num_paragraphs, seed)
+        cases["pdproject.ahocorasick_wrapper" + label] = _wrapper_case(pdproject.ahocorasick_wrapper, num_documents, num_paragraphs, seed)
+        cases["pdproject.winnowing_wrapper" + label] = _winnowing_case(num_documents, num_paragraphs, seed)
+        cases["pdproject.compile_fingerprint_index" + label] = _fingerprint_index_case(num_documents, num_paragraphs, seed)
+    # LCSS_wrapper is quadratic in the length of each document, so it is only run against the smaller corpus:
+    cases["pdproject.LCSS_wrapper[docs=10,paragraphs=5]"] = _wrapper_case(pdproject.LCSS_wrapper, 10, 5, seed)
+    return cases
+
+
+def cases(seed: int = BENCHMARK_SEED) -> dict:
+    """
+    Returns a dictionary mapping the name of every benchmark to its setup function. Calling a setup
+    function loads its fixtures and preprocessing, and returns the function of no arguments to time.
+    """
+    all_cases = _string_cases(seed)
+    all_cases.update(_wrapper_cases(seed))
+    return all_cases
+
+
+def measure(function, warmup: int = BENCHMARK_WARMUP, trials: int = BENCHMARK_TRIALS) -> dict:
+    """
+    Times a function of no arguments with time.perf_counter_ns(). The function is run warmup times
+    first, then each of the trials calls it as many times as needed to take at least MIN_TRIAL_NS.
+    The garbage collector is disabled while timing. Returns the median, interquartile range, minimum
+    and mean time per call in nanoseconds, along with the time of every trial.
+    """
+    for i in range(warmup):
+        function()
+    loops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for i in range(loops):
+            function()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= MIN_TRIAL_NS:
+            break
+        loops *= 10 if elapsed * 10 < MIN_TRIAL_NS else 2
+
+    times = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for t in range(trials):
+            start = time.perf_counter_ns()
+            for i in range(loops):
+                function()
+            times.append((time.perf_counter_ns() - start) / loops)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    q1, median, q3 = np.quantile(times, [0.25, 0.5, 0.75]).tolist()
+    return {'median_ns': median, 'iqr_ns': q3 - q1, 'min_ns': min(times), 'mean_ns': sum(times) / len(times),
+            'loops': loops, 'trials': trials, 'times_ns': times}
+
+
+def run(names: list = None, seed: int = BENCHMARK_SEED, warmup: int = BENCHMARK_WARMUP, trials: int = BENCHMARK_TRIALS) -> dict:
+    """
+    Runs every benchmark whose name contains one of names, or every benchmark if names is empty, and
+    returns the timings along with the metadata needed to tell whether two runs are comparable.
+
+    Intended Usage:
+    \treport = benchmark.run(['kmp.', 'lcss.LCSSNumpy'])
+    """
+    report = {
+        'metadata': {
+            'seed': seed, 'warmup': warmup, 'trials': trials, 'min_trial_ns': MIN_TRIAL_NS,
+            'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'numpy': np.__version__, 'platform': platform.platform(), 'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'benchmarks': {},
+    }
+    for name, setup in cases(seed).items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        timing = measure(setup(), warmup, trials)
+        report['benchmarks'][name] = timing
+        print("{name}: median {median:.3f} ms, IQR {iqr:.3f} ms ({trials} x {loops} loop(s))".format(name=name, median=timing['median_ns'] / 1e6, iqr=timing['iqr_ns'] / 1e6, trials=trials, loops=timing['loops']))
+    return report
+
+
+def compare(baseline: dict, current: dict, threshold: float = BENCHMARK_REGRESSION_THRESHOLD) -> list:
+    """
+    Compares two reports written by run() and outputs the change in median time of every benchmark.
+    A benchmark has regressed if its median grew by more than threshold percent and by more than the
+    larger of the two interquartile ranges, so that noisy benchmarks are not flagged. Returns the
+    names of the regressed benchmarks.
+    """
+    regressions = []
+    for key in ['seed', 'python', 'numpy', 'machine']:
+        if baseline['metadata'].get(key) != current['metadata'].get(key):
+            print("WARNING: {key} differs between runs: {old} -> {new}".format(key=key, old=baseline['metadata'].get(key), new=current['metadata'].get(key)))
+    for name in sorted(set(baseline['benchmarks']) | set(current['benchmarks'])):
+        if name not in current['benchmarks']:
+            print("{name}: missing from current run".format(name=name))
+            continue
+        if name not in baseline['benchmarks']:
+            print("{name}: new, median {median:.3f} ms".format(name=name, median=current['benchmarks'][name]['median_ns'] / 1e6))
+            continue
+        old = baseline['benchmarks'][name]
+        new = current['benchmarks'][name]
+        change = (new['median_ns'] - old['median_ns']) / old['median_ns'] * 100
+        noise = max(old['iqr_ns'], new['iqr_ns'])
+        if change > threshold and new['median_ns'] - old['median_ns'] > noise:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold and old['median_ns'] - new['median_ns'] > noise:
+            status = "improved"
+        else:
+            status = "ok"
+        print("{name}: {old:.3f} ms -> {new:.3f} ms ({change:+.1f}%) {status}".format(name=name, old=old['median_ns'] / 1e6, new=new['median_ns'] / 1e6, change=change, status=status))
+    if regressions:
+        print("\n{num} benchmark(s) regressed by more than {threshold}%.".format(num=len(regressions), threshold=threshold))
+    else:
+        print("\nNo benchmarks regressed by more than {threshold}%.".format(threshold=threshold))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the plagiarism detection algorithms. Defaults are read from the [BENCHMARK] section of 'config.ini'.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="run the benchmarks and write their timings as JSON")
+    run_parser.add_argument('names', nargs='*', help="only run benchmarks whose name contains one of these strings")
+    run_parser.add_argument('--output', default=BENCHMARK_OUTPUT_FILE)
+    run_parser.add_argument('--seed', type=int, default=BENCHMARK_SEED)
+    run_parser.add_argument('--warmup', type=int, default=BENCHMARK_WARMUP)
+    run_parser.add_argument('--trials', type=int, default=BENCHMARK_TRIALS)
+    run_parser.add_argument('--list', action='store_true', help="list the benchmarks without running them")
+    compare_parser = commands.add_parser('compare', help="compare a run against a saved baseline; exits with status 1 on a regression")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current', nargs='?', default=BENCHMARK_OUTPUT_FILE)
+    compare_parser.add_argument('--threshold', type=float, default=BENCHMARK_REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == 'run' and args.list:
+        for name in cases(args.seed):
+            if not args.names or any(pattern in name for pattern in args.names):
+                print(name)
+    elif args.command == 'run':
+        report = run(args.names, args.seed, args.warmup, args.trials)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print("\nTimings of {num} benchmark(s) written to '{path}'.".format(num=len(report['benchmarks']), path=args.output))
+    else:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r') as f:
+            current = json.load(f)
+        if compare(baseline, current, args.threshold):
+            sys.exit(1)
@@ -1,4 +1,9 @@
+import os
+import re
+import mmap
+import struct
 import configparser
+from array import array
 
 import document
 
@@ -7,6 +12,38 @@ config.read('config.ini')
 VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
 
 
+class CorpusKeys:
+    """
+    Sequence of the filenames of a Corpus, in the order of its documents dictionary. The list used to
+    index the filenames is only built when they are indexed after the corpus has changed, so adding or
+    removing a document does not have to update or search a list.
+    """
+    def __init__(self, documents: dict):
+        self.documents = documents
+        self.filenames = None
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __getitem__(self, i) -> str:
+        if self.filenames is None:
+            self.filenames = list(self.documents)
+        return self.filenames[i]
+
+    def __iter__(self):
+        return iter(self.documents)
+
+    def __contains__(self, filename) -> bool:
+        return filename in self.documents
+
+    def __repr__(self) -> str:
+        return repr(list(self.documents))
+
+    def changed(self):
+        """Discards the list of filenames, as the documents of the corpus changed."""
+        self.filenames = None
+
+
 class Corpus:
     """
     Object used to store a collection of Document objects. Document objects are stored within a 
@@ -14,20 +51,49 @@ class Corpus:
     Document object itself.
 
     Methods:
-    \tadd_document(), info().
+    \tadd_document(), replace_document(), remove_document(), subset(), info().
     """
     def __init__(self):
         self.documents = {}
-        self.keys = []
+        self.keys = CorpusKeys(self.documents)
 
     def add_document(self, filename: str, doc: document.Document):
         """Adds a Document object to the documents dictionary of the corpus."""
         if type(doc) is document.Document:
             self.documents[filename] = doc
-            self.keys.append(filename)
+            self.keys.changed()
         else:
             raise TypeError("Parameter of Corpus.add_document() was {type} and must be of type 'Document'.".format(type=type(document)))
 
+    def replace_document(self, filename: str, doc: document.Document):
+        """
+        Replaces the Document object stored under filename, keeping its position in the corpus, or adds 
+        it if the corpus does not contain filename yet.
+        """
+        if type(doc) is not document.Document:
+            raise TypeError("Parameter of Corpus.replace_document() was {type} and must be of type 'Document'.".format(type=type(doc)))
+        if filename not in self.documents:
+            self.keys.changed()
+        self.documents[filename] = doc
+
+    def remove_document(self, filename: str):
+        """Removes the Document object stored under filename from the corpus."""
+        if filename not in self.documents:
+            raise KeyError("Corpus does not contain a document named '{filename}'.".format(filename=filename))
+        del self.documents[filename]
+        self.keys.changed()
+
+    def subset(self, filenames: set) -> 'Corpus':
+        """
+        Returns a new Corpus holding the Document objects of this corpus whose filenames are in filenames, 
+        in corpus order. The Document objects are shared rather than copied.
+        """
+        corp = Corpus()
+        for filename in self.documents:
+            if filename in filenames:
+                corp.add_document(filename, self.documents[filename])
+        return corp
+
     def info(self):
         """Outputs number of documents in the corpus along with their dictionary keys."""
         if len(self.documents) > 0:
@@ -39,4 +105,160 @@ class Corpus:
             print("No Document keys in Corpus to display.")
 
     def get_keys(self) -> list:
-        return self.keys
\ No newline at end of file
+        return self.keys
+
+
+# Line breaks recognized by str.splitlines(). The single byte breaks are split on directly, while
+# multi-byte UTF-8 breaks are rare enough that lines containing them are decoded and split again.
+LINE_PATTERN = re.compile(rb'[^\n\r\v\f\x1c\x1d\x1e]+')
+MULTIBYTE_BREAKS = [b'\xc2\x85', b'\xe2\x80\xa8', b'\xe2\x80\xa9']
+
+LINE_INDEX_MAGIC = b'PDLINES1'
+LINE_INDEX_HEADER = struct.Struct('<8sQq')
+
+
+def build_line_index(buffer) -> array:
+    """
+    Returns the flat (start, end) byte offsets of every non-empty line of a UTF-8 buffer, where lines
+    are the same as those of str.splitlines() on the decoded buffer with empty lines removed.
+    """
+    offsets = array('Q')
+    for match in LINE_PATTERN.finditer(buffer):
+        start, end = match.span()
+        line = match.group()
+        if any(line_break in line for line_break in MULTIBYTE_BREAKS):
+            text = line.decode('utf-8')
+            paragraphs = document.split_paragraphs(text)
+            for i in range(0, len(paragraphs), 2):
+                offsets.append(start + len(text[:paragraphs[i]].encode('utf-8')))
+                offsets.append(start + len(text[:paragraphs[i + 1]].encode('utf-8')))
+        else:
+            offsets.append(start)
+            offsets.append(end)
+    return offsets
+
+
+class LineDocuments:
+    """
+    Read-only mapping from 'input{x}.txt' filenames to the Documents of a LineCorpus. Each Document is
+    decoded and parsed from the memory-mapped file when it is accessed, and only the most recently
+    accessed Document is kept, so repeated lookups of the same document do not parse it again.
+    """
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.last = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) // 2
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield "input{x}.txt".format(x=i)
+
+    def __contains__(self, filename) -> bool:
+        return self.__index(filename) is not None
+
+    def __index(self, filename):
+        if type(filename) is not str or not filename.startswith("input") or not filename.endswith(".txt"):
+            return None
+        number = filename[len("input"):-len(".txt")]
+        # Only the canonical filename of a line resolves, not e.g. 'input007.txt' or other decimal digits:
+        if not number.isdecimal() or filename != "input{x}.txt".format(x=int(number)) or int(number) >= len(self):
+            return None
+        return int(number)
+
+    def __getitem__(self, filename) -> document.Document:
+        if self.last is not None and self.last.filename == filename:
+            return self.last
+        i = self.__index(filename)
+        if i is None:
+            raise KeyError(filename)
+        doc = document.Document(filename)
+        doc.parse(self.buffer[self.offsets[2 * i]:self.offsets[2 * i + 1]].decode('utf-8'))
+        self.last = doc
+        return doc
+
+
+class LineKeys:
+    """Read-only sequence of the 'input{x}.txt' filenames of a LineCorpus."""
+    def __init__(self, documents: LineDocuments):
+        self.documents = documents
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __getitem__(self, i) -> str:
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("LineKeys index out of range.")
+        return "input{x}.txt".format(x=i)
+
+    def __iter__(self):
+        return iter(self.documents)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class LineCorpus(Corpus):
+    """
+    Corpus of a single file, where each non-empty line of the file is treated as a separate Document
+    named 'input{x}.txt'. The file is opened with mmap and only the byte offsets of its lines are held
+    in memory; Documents are parsed when they are accessed through LineCorpus.documents. The line
+    offsets are stored next to the file in '<file>.lines' and reused while the file is unchanged.
+
+    __init__(path: str)
+
+    Methods:
+    \tadd_document(), replace_document(), remove_document(), info(), close().
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size > 0 else b''
+        self.index_buffer = None
+        offsets = self.__load_line_index()
+        self.documents = LineDocuments(self.buffer, offsets)
+        self.keys = LineKeys(self.documents)
+
+    def __load_line_index(self):
+        stat = os.stat(self.path)
+        index_path = self.path + ".lines"
+        try:
+            with open(index_path, 'rb') as f:
+                self.index_buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, size, mtime = LINE_INDEX_HEADER.unpack_from(self.index_buffer, 0)
+            if magic == LINE_INDEX_MAGIC and size == stat.st_size and mtime == stat.st_mtime_ns:
+                return memoryview(self.index_buffer)[LINE_INDEX_HEADER.size:].cast('Q')
+            self.index_buffer.close()
+            self.index_buffer = None
+        except (OSError, ValueError, struct.error):
+            self.index_buffer = None
+        offsets = build_line_index(self.buffer)
+        try:
+            with open(index_path, 'wb') as f:
+                f.write(LINE_INDEX_HEADER.pack(LINE_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns))
+                f.write(offsets.tobytes())
+        except OSError:
+            print("WARNING: Line index could not be written to '{path}'.".format(path=index_path))
+        return offsets
+
+    def add_document(self, filename: str, doc: document.Document):
+        raise TypeError("Documents cannot be added to a LineCorpus, as its documents are the lines of '{path}'.".format(path=self.path))
+
+    def replace_document(self, filename: str, doc: document.Document):
+        raise TypeError("Documents cannot be replaced in a LineCorpus, as its documents are the lines of '{path}'.".format(path=self.path))
+
+    def remove_document(self, filename: str):
+        raise TypeError("Documents cannot be removed from a LineCorpus, as its documents are the lines of '{path}'.".format(path=self.path))
+
+    def close(self):
+        """Unmaps the file and its line index."""
+        self.documents = None
+        self.keys = None
+        if type(self.buffer) is mmap.mmap:
+            self.buffer.close()
+        if self.index_buffer is not None:
+            self.index_buffer.close()
@@ -0,0 +1,288 @@
+import mmap
+import struct
+import configparser
+from array import array
+
+import numpy as np
+
+import document
+import corpus
+import winnowing
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
+CORPUS_INDEX_FILE = config['DEFAULT']['CorpusIndexFile']
+WINNOWING_K = config.getint('ALGORITHMS', 'Winnowing_K')
+WINNOWING_W = config.getint('ALGORITHMS', 'Winnowing_W')
+
+MAGIC = b'PDINDEX1'
+VERSION = 1
+
+# Header: magic, version, number of documents, Winnowing_K, Winnowing_W, number of sentences, number
+# of paragraphs, number of fingerprints, followed by the file offset of each section.
+HEADER = struct.Struct('<8sIIIIQQQQQQQQQQQ')
+
+# One entry per document: name offset and length, text offset and length (in bytes of the text blob),
+# and the first index and count of its sentences and paragraphs in the offset tables.
+DOCUMENT_TABLE = np.dtype([('name_offset', '<u8'), ('name_length', '<u4'), ('text_offset', '<u8'), ('text_length', '<u8'),
+                           ('sentence_start', '<u8'), ('sentence_count', '<u4'), ('paragraph_start', '<u8'), ('paragraph_count', '<u4')])
+
+
+def _align(f, alignment: int = 8) -> int:
+    """Pads the file with zero bytes up to the next multiple of alignment and returns the position."""
+    position = f.tell()
+    padding = -position % alignment
+    f.write(b'\0' * padding)
+    return position + padding
+
+
+def build(documents: list, path: str = CORPUS_INDEX_FILE, k: int = WINNOWING_K, w: int = WINNOWING_W):
+    """
+    Writes a binary corpus index for a list of parsed Document objects. The index holds a document
+    table, the text of every document in a single UTF-8 blob, the (start, end) offsets of every
+    sentence and paragraph, and the winnowed fingerprints of every document sorted by hash. The
+    index can then be opened with CorpusIndex() without reading or parsing the original files again.
+
+    Intended Usage:
+    \tdocuments = compile_corpus_documents()
+
+    \tcorpusindex.build(documents)
+    """
+    table = np.zeros(len(documents), dtype=DOCUMENT_TABLE)
+    names = bytearray()
+    sentence_offsets = array('I')
+    paragraph_offsets = array('I')
+    fingerprint_hashes = []
+    fingerprint_documents = []
+    fingerprint_positions = []
+
+    with open(path, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        text_section = _align(f)
+        for i, doc in enumerate(documents):
+            name = doc.filename.encode('utf-8')
+            text = doc.raw_text.encode('utf-8')
+            table[i] = (len(names), len(name), f.tell() - text_section, len(text),
+                        len(sentence_offsets) // 2, len(doc.sentence_offsets) // 2, len(paragraph_offsets) // 2, len(doc.paragraph_offsets) // 2)
+            names += name
+            f.write(text)
+            sentence_offsets += doc.sentence_offsets
+            paragraph_offsets += doc.paragraph_offsets
+            for hash_k, position in winnowing.fingerprint(doc.raw_text, k, w):
+                fingerprint_hashes.append(hash_k)
+                fingerprint_documents.append(i)
+                fingerprint_positions.append(position)
+
+        order = np.argsort(np.array(fingerprint_hashes, dtype='<u8'), kind='stable')
+        sections = [
+            names,
+            table,
+            np.array(sentence_offsets, dtype='<u4').reshape(-1, 2),
+            np.array(paragraph_offsets, dtype='<u4').reshape(-1, 2),
+            np.array(fingerprint_hashes, dtype='<u8')[order],
+            np.array(fingerprint_documents, dtype='<u4')[order],
+            np.array(fingerprint_positions, dtype='<u4')[order],
+        ]
+        section_offsets = []
+        for section in sections:
+            section_offsets.append(_align(f))
+            f.write(bytes(section) if type(section) is bytearray else section.tobytes())
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(documents), k, w, len(sentence_offsets) // 2, len(paragraph_offsets) // 2,
+                            len(fingerprint_hashes), text_section, *section_offsets))
+    print("Corpus index of {documents} document(s) written to '{path}'.".format(documents=len(documents), path=path))
+
+
+class MappedFingerprintIndex(winnowing.FingerprintIndex):
+    """
+    FingerprintIndex backed by the sorted fingerprint arrays of a memory-mapped corpus index. Lookups
+    use a binary search over the mapped hashes, so the index is never loaded into memory as a whole
+    and is shared through the page cache between every process that opens the same file. Documents
+    added after the index was opened are held in memory, and mapped documents that are replaced or
+    removed are hidden from lookups rather than being removed from the file.
+
+    __init__(k: int, w: int, filenames: list, hashes, documents, positions)
+
+    Methods:
+    \tadd_document(), replace_document(), remove_document(), lookup(), query(), info().
+    """
+    def __init__(self, k: int, w: int, filenames: list, hashes, documents, positions):
+        super().__init__(k, w)
+        self.filenames = filenames
+        self.hashes = hashes
+        self.documents = documents
+        self.positions = positions
+        self.num_documents = len(filenames)
+        self.mapped = set(filenames)
+        self.removed = set()
+
+    def replace_document(self, doc: document.Document):
+        if doc.filename in self.mapped and doc.filename not in self.removed:
+            self.remove_document(doc.filename)
+        super().replace_document(doc)
+
+    def remove_document(self, filename: str):
+        if filename in self.fingerprints:
+            super().remove_document(filename)
+        elif filename in self.mapped and filename not in self.removed:
+            self.removed.add(filename)
+            self.num_documents -= 1
+        else:
+            raise KeyError("Fingerprint index does not contain a document named '{filename}'.".format(filename=filename))
+
+    def lookup(self, hash_k: int) -> list:
+        start = int(np.searchsorted(self.hashes, hash_k, side='left'))
+        end = int(np.searchsorted(self.hashes, hash_k, side='right'))
+        postings = [(self.filenames[self.documents[i]], int(self.positions[i])) for i in range(start, end)]
+        if len(self.removed) != 0:
+            postings = [posting for posting in postings if posting[0] not in self.removed]
+        return postings + super().lookup(hash_k)
+
+    def info(self):
+        print("Fingerprint index contains {fingerprints} mapped fingerprint(s) from {documents} document(s).".format(fingerprints=len(self.hashes), documents=self.num_documents))
+
+
+class CorpusIndex:
+    """
+    Read-only view of a binary corpus index written by build(). The file is opened with mmap, so
+    opening an index only reads its header; document text and offsets are paged in as they are used.
+
+    __init__(path: str)
+
+    Methods:
+    \tcompile_corpus(), fingerprint_index(), close().
+    """
+    def __init__(self, path: str = CORPUS_INDEX_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self.buffer, 0)
+        if header[0] != MAGIC or header[1] != VERSION:
+            self.close()
+            raise ValueError("File '{path}' is not a corpus index of version {version}.".format(path=path, version=VERSION))
+        (_, _, self.num_documents, self.k, self.w, num_sentences, num_paragraphs, num_fingerprints,
+         self.text_section, names_section, table_section, sentence_section, paragraph_section,
+         hash_section, document_section, position_section) = header
+        self.names_section = names_section
+        self.table = np.frombuffer(self.buffer, dtype=DOCUMENT_TABLE, count=self.num_documents, offset=table_section)
+        self.sentence_offsets = np.frombuffer(self.buffer, dtype='<u4', count=num_sentences * 2, offset=sentence_section).reshape(-1, 2)
+        self.paragraph_offsets = np.frombuffer(self.buffer, dtype='<u4', count=num_paragraphs * 2, offset=paragraph_section).reshape(-1, 2)
+        self.fingerprint_hashes = np.frombuffer(self.buffer, dtype='<u8', count=num_fingerprints, offset=hash_section)
+        self.fingerprint_documents = np.frombuffer(self.buffer, dtype='<u4', count=num_fingerprints, offset=document_section)
+        self.fingerprint_positions = np.frombuffer(self.buffer, dtype='<u4', count=num_fingerprints, offset=position_section)
+        self.filenames = [self.__filename(i) for i in range(self.num_documents)]
+
+    def __filename(self, i: int) -> str:
+        start = self.names_section + int(self.table[i]['name_offset'])
+        return self.buffer[start:start + int(self.table[i]['name_length'])].decode('utf-8')
+
+    def document(self, i: int) -> document.Document:
+        """Returns document i of the index as a Document object, without parsing its text again."""
+        entry = self.table[i]
+        start = self.text_section + int(entry['text_offset'])
+        raw_text = self.buffer[start:start + int(entry['text_length'])].decode('utf-8')
+        sentence_start = int(entry['sentence_start'])
+        paragraph_start = int(entry['paragraph_start'])
+        doc = document.Document(self.filenames[i])
+        doc.load(raw_text,
+                 self.paragraph_offsets[paragraph_start:paragraph_start + int(entry['paragraph_count'])].tobytes(),
+                 self.sentence_offsets[sentence_start:sentence_start + int(entry['sentence_count'])].tobytes())
+        return doc
+
+    def compile_corpus(self) -> 'IndexCorpus':
+        """
+        Returns an IndexCorpus of every document of the index. Documents are only decoded from the
+        mapped file when they are accessed, so loading the corpus does not read their text.
+        """
+        print("\nLoading corpus from index '{path}'...".format(path=self.path))
+        return IndexCorpus(self)
+
+    def fingerprint_index(self, k: int = WINNOWING_K, w: int = WINNOWING_W) -> MappedFingerprintIndex:
+        """
+        Returns a MappedFingerprintIndex over the fingerprints stored in the index, or None if they
+        were built with a different Winnowing_K or Winnowing_W than requested.
+        """
+        if self.k != k or self.w != w:
+            return None
+        return MappedFingerprintIndex(self.k, self.w, self.filenames, self.fingerprint_hashes, self.fingerprint_documents, self.fingerprint_positions)
+
+    def close(self):
+        """Unmaps the index. Any MappedFingerprintIndex obtained from it must no longer be used."""
+        self.table = None
+        self.sentence_offsets = None
+        self.paragraph_offsets = None
+        self.fingerprint_hashes = None
+        self.fingerprint_documents = None
+        self.fingerprint_positions = None
+        self.buffer.close()
+
+
+class IndexDocuments:
+    """
+    Read-only mapping from filenames to the Documents of an IndexCorpus. Each Document is decoded from
+    the memory-mapped corpus index when it is accessed, and only the most recently accessed Document is
+    kept, so repeated lookups of the same document do not decode it again.
+    """
+    def __init__(self, index: CorpusIndex):
+        self.index = index
+        self.positions = {filename: i for i, filename in enumerate(index.filenames)}
+        self.last = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __iter__(self):
+        return iter(self.index.filenames)
+
+    def __contains__(self, filename) -> bool:
+        return filename in self.positions
+
+    def __getitem__(self, filename) -> document.Document:
+        if self.last is not None and self.last.filename == filename:
+            return self.last
+        self.last = self.index.document(self.positions[filename])
+        return self.last
+
+
+class IndexCorpus(corpus.Corpus):
+    """
+    Corpus of the documents of a memory-mapped CorpusIndex. Only the filenames of the documents are
+    held in memory; their text and offsets stay in the mapped file, shared through the page cache
+    with every other process that opens it, and are decoded into a Document when it is accessed
+    through IndexCorpus.documents.
+
+    __init__(index: CorpusIndex)
+
+    Methods:
+    \tadd_document(), replace_document(), remove_document(), info().
+    """
+    def __init__(self, index: CorpusIndex):
+        self.index = index
+        self.documents = IndexDocuments(index)
+        self.keys = index.filenames
+
+    def add_document(self, filename: str, doc: document.Document):
+        raise TypeError("Documents cannot be added to an IndexCorpus, as its documents are those of '{path}'.".format(path=self.index.path))
+
+    def replace_document(self, filename: str, doc: document.Document):
+        raise TypeError("Documents cannot be replaced in an IndexCorpus, as its documents are those of '{path}'.".format(path=self.index.path))
+
+    def remove_document(self, filename: str):
+        raise TypeError("Documents cannot be removed from an IndexCorpus, as its documents are those of '{path}'.".format(path=self.index.path))
+
+
+if __name__ == '__main__':
+    # Build the corpus index from the corpus defined in 'config.ini' (CorpusIndexFile in config.ini):
+    import pdproject
+
+    if pdproject.CORPUS_USE_SINGULAR:
+        documents = pdproject.extract_corpus_files()
+    else:
+        documents = pdproject.compile_corpus_documents()
+    if documents is False:
+        print("No corpus index was written as there are no documents to construct a corpus.")
+    else:
+        build(documents)
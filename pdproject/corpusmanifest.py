@@ -0,0 +1,108 @@
+import os
+import json
+import configparser
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
+CORPUS_DIR = config['DEFAULT']['CorpusDirectoryMultiple']
+CORPUS_MANIFEST_FILE = config['DEFAULT']['CorpusManifestFile']
+
+
+class CorpusManifest:
+    """
+    Record of the corpus documents that have been indexed from a directory. The size, modification
+    time and SHA-1 content hash of every indexed file are stored under its filename, so a rescan of
+    the directory only needs to read the files whose size or modification time changed, and only
+    needs to parse and index again the files whose content changed. The manifest is saved as JSON.
+
+    __init__(directory: str, path: str)
+
+    Methods:
+    \tdiff(), digest(), record(), remove(), load(), save(), info().
+    """
+    def __init__(self, directory: str = CORPUS_DIR, path: str = CORPUS_MANIFEST_FILE):
+        self.directory = directory
+        self.path = path
+        self.entries = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.entries
+
+    def diff(self, indexed: dict = None) -> tuple:
+        """
+        Compares the .txt files of the directory with the manifest. Returns the filenames of the files
+        that are new or whose size or modification time changed, in directory order, along with the
+        filenames in the manifest whose files no longer exist. If indexed is given, unchanged files whose
+        filenames are not in indexed are returned as well, such as when a saved manifest is loaded for
+        a corpus that has not been read yet.
+        """
+        candidates = []
+        present = set()
+        for file in os.listdir(self.directory):
+            if not file.lower().endswith(".txt"):
+                continue
+            present.add(file)
+            stat = os.stat(os.path.join(self.directory, file))
+            entry = self.entries.get(file)
+            if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns or (indexed is not None and file not in indexed):
+                candidates.append(file)
+        removed = [file for file in self.entries if file not in present]
+        return candidates, removed
+
+    def digest(self, filename: str) -> str:
+        """Returns the recorded content hash of a file, or None if it is not in the manifest."""
+        entry = self.entries.get(filename)
+        return entry['sha1'] if entry is not None else None
+
+    def record(self, filename: str, size: int, mtime_ns: int, digest: str):
+        self.entries[filename] = {'size': size, 'mtime_ns': mtime_ns, 'sha1': digest}
+
+    def remove(self, filename: str):
+        del self.entries[filename]
+
+    def load(self) -> bool:
+        """Loads the manifest saved at path. Returns False if there is no valid manifest for the directory."""
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if type(saved) is not dict or saved.get('directory') != os.path.abspath(self.directory):
+            return False
+        self.entries = saved['documents']
+        return True
+
+    def save(self):
+        """Writes the manifest to path, replacing any previous manifest at once."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".tmp", 'w') as f:
+            json.dump({'directory': os.path.abspath(self.directory), 'documents': self.entries}, f)
+        os.replace(self.path + ".tmp", self.path)
+
+    def info(self):
+        if VERBOSE:
+            print("Corpus manifest '{path}' records {num} document(s): {keys}".format(path=self.path, num=len(self.entries), keys=[*self.entries]))
+        else:
+            print("Corpus manifest '{path}' records {num} document(s).".format(path=self.path, num=len(self.entries)))
+
+
+if __name__ == '__main__':
+    # Show which corpus files changed since the manifest was last saved (CorpusManifestFile in config.ini):
+    manifest = CorpusManifest()
+    if not manifest.load():
+        print("No corpus manifest of directory '{dir}' was found at '{path}'.".format(dir=manifest.directory, path=manifest.path))
+    else:
+        manifest.info()
+        candidates, removed = manifest.diff()
+        for file in candidates:
+            print("\t{state}: {file}".format(state="modified" if file in manifest else "new", file=file))
+        for file in removed:
+            print("\tremoved: {file}".format(file=file))
+        print("{candidates} file(s) to check and {removed} file(s) to remove on the next update.".format(candidates=len(candidates), removed=len(removed)))
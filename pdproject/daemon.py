@@ -0,0 +1,348 @@
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import asyncio
+import argparse
+import configparser
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import document
+import corpus
+import results
+import parallel
+import minhash
+import tokenizer
+import winnowing
+import pdproject
+import sharedcorpus
+import corpusmanifest
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+DAEMON_HOST = config['DAEMON']['DaemonHost']
+DAEMON_PORT = config.getint('DAEMON', 'DaemonPort')
+DAEMON_SOCKET = config['DAEMON']['DaemonSocket']
+DAEMON_WORKERS = config.getint('DAEMON', 'DaemonWorkers') or os.cpu_count()
+DAEMON_MAX_REQUEST_MB = config.getint('DAEMON', 'DaemonMaxRequestMB')
+DAEMON_SHARED_CORPUS = config.getboolean('DAEMON', 'DaemonSharedCorpus')
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+ROUTES = {'/check': 'POST', '/reload': 'POST', '/status': 'GET'}
+
+# Corpus documents, winnowing fingerprint index and MinHash LSH index of the current worker process, set once by _init_worker():
+_documents = None
+_fingerprint_index = None
+_lsh_index = None
+
+
+def _init_worker(documents, fingerprint_index, lsh_index: minhash.LSHIndex = None):
+    global _documents, _fingerprint_index, _lsh_index
+    # With DaemonSharedCorpus, documents is the descriptor of a SharedCorpus to attach to rather than a list:
+    _documents = sharedcorpus.SharedCorpus.attach(documents) if type(documents) is dict else documents
+    _fingerprint_index = fingerprint_index
+    _lsh_index = lsh_index
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def check(filename: str, text: str) -> dict:
+    """
+    Runs every algorithm enabled in 'config.ini' for one suspect document against the corpus held by
+    the current worker process, or only against its MinHash prefilter candidates when the worker holds
+    an LSH index. Returns a dictionary mapping the name of each algorithm to the Results.to_dict()
+    summary of its hit rates. In TokenMode, the documents are tokenized with a vocabulary of their own 
+    for each check, so words of the documents sent to the service do not accumulate in the worker.
+    """
+    plagiarized = document.Document(filename)
+    plagiarized.parse(text)
+    vocabulary = tokenizer.Vocabulary()
+    candidates = _lsh_index.query(plagiarized) if _lsh_index is not None else None
+    scorers = []
+    for algorithm, name in pdproject.enabled_algorithms():
+        if algorithm == 'winnowing' and _fingerprint_index is not None:
+            hit_rates = _fingerprint_index.query(plagiarized)
+            scorers.append((name, lambda corp_doc, hit_rates=hit_rates: hit_rates.get(corp_doc.filename, 0)))
+        else:
+            scorers.append((name, parallel.document_scorer(algorithm, plagiarized, vocabulary)))
+    all_results = {name: results.Results(capacity=len(_documents)) for name, score in scorers}
+    # Score each corpus document with every algorithm in turn, so only its own caches are held at once:
+    for corp_doc in _documents:
+        if candidates is not None and corp_doc.filename not in candidates:
+            continue
+        for name, score in scorers:
+            all_results[name].add(corp_doc.filename, score(corp_doc))
+        corp_doc.release_caches()
+    return {name: algorithm_results.to_dict() for name, algorithm_results in all_results.items()}
+
+
+class Daemon:
+    """
+    Resident plagiarism checking service. The corpus is loaded and indexed once, and handed to a pool
+    of worker processes through shared memory (or a copy each, without DaemonSharedCorpus), so a 
+    check only pays for running the algorithms.
+    Requests are served over HTTP on a localhost port or a Unix socket by an asyncio server, so any
+    number of clients can be connected while up to `workers` checks run at once. Reloading loads the
+    corpus into a new pool while the old pool keeps serving, then swaps the pools; checks already
+    running finish on the old pool before it shuts down. A corpus of the files in CorpusDirectoryMultiple
+    is updated on reload with only the files that were added, changed or removed.
+
+    __init__(workers: int)
+
+    Methods:
+    \tload(), reload(), check(), status(), handle(), serve().
+    """
+    def __init__(self, workers: int = DAEMON_WORKERS):
+        self.workers = workers
+        self.pool = None
+        self.shared = None
+        self.num_documents = 0
+        self.generation = 0
+        self.requests = 0
+        self.started = time.time()
+        self.reload_lock = asyncio.Lock()
+        # The corpus is updated in place on reload when it is read from CorpusDirectoryMultiple:
+        self.incremental = not pdproject.CORPUS_USE_SINGULAR and not (pdproject.USE_CORPUS_INDEX and os.path.exists(pdproject.CORPUS_INDEX_FILE))
+        self.corpus = None
+        self.fingerprint_index = None
+        self.lsh_index = None
+        self.manifest = None
+
+    def __load_corpus(self) -> tuple:
+        """
+        Returns the corpus, fingerprint index and LSH index to serve. A corpus of the files in 
+        CorpusDirectoryMultiple is kept between loads along with its indexes and manifest, and only 
+        updated with the files that changed. The manifest saved by a previous run is loaded on the 
+        first load, so the files it records are checked against their saved content hashes.
+        """
+        if not self.incremental:
+            corp, fingerprint_index = pdproject.load_corpus()
+            lsh_index = pdproject.compile_lsh_index(corp) if corp is not False and pdproject.MINHASH_PREFILTER else None
+            return corp, fingerprint_index, lsh_index
+        if self.corpus is None:
+            self.corpus = corpus.Corpus()
+            self.fingerprint_index = winnowing.FingerprintIndex(pdproject.WINNOWING_K, pdproject.WINNOWING_W) if pdproject.ENABLE_WINNOWING else None
+            self.lsh_index = minhash.LSHIndex(pdproject.MINHASH_K, pdproject.MINHASH_PERMUTATIONS, pdproject.MINHASH_BANDS, pdproject.MINHASH_FLOOR) if pdproject.MINHASH_PREFILTER else None
+            self.manifest = corpusmanifest.CorpusManifest()
+            if self.manifest.load():
+                self.manifest.info()
+        added, replaced, removed = pdproject.update_corpus(self.corpus, self.fingerprint_index, self.manifest, self.lsh_index)
+        if len(self.corpus.documents) == 0:
+            print("No valid documents were found when scanning directory '{dir}'.".format(dir=pdproject.CORPUS_DIR))
+            return False, None, None
+        if self.pool is not None and len(added) == 0 and len(replaced) == 0 and len(removed) == 0:
+            return None, None, None
+        return self.corpus, self.fingerprint_index, self.lsh_index
+
+    def __start_pool(self):
+        corp, fingerprint_index, lsh_index = self.__load_corpus()
+        if corp is None:
+            return self.pool, self.num_documents, self.shared
+        if corp is False:
+            return None
+        # Hand the workers one copy of the corpus in shared memory instead of a copy each (DaemonSharedCorpus in config.ini):
+        shared = sharedcorpus.SharedCorpus.create(corp) if DAEMON_SHARED_CORPUS else None
+        documents = shared.descriptor if shared is not None else [corp.documents[filename] for filename in corp.documents]
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker, initargs=(documents, fingerprint_index, lsh_index))
+        # Start every worker and hand it the corpus before the pool is used for requests:
+        for started in [pool.submit(_ready) for i in range(self.workers)]:
+            started.result()
+        return pool, len(corp.documents), shared
+
+    def load(self) -> bool:
+        """Loads the corpus and starts the worker pool. Returns False if no corpus could be loaded."""
+        loaded = self.__start_pool()
+        if loaded is None:
+            return False
+        self.pool, self.num_documents, self.shared = loaded
+        self.generation += 1
+        return True
+
+    async def reload(self) -> dict:
+        """Loads the corpus again into a new worker pool and swaps it in without interrupting checks."""
+        async with self.reload_lock:
+            loaded = await asyncio.get_running_loop().run_in_executor(None, self.__start_pool)
+            if loaded is None:
+                raise RuntimeError("The corpus could not be loaded; the previous corpus is still being served.")
+            if loaded[0] is self.pool:
+                print("Corpus is unchanged, generation {generation}.".format(generation=self.generation))
+                return self.status()
+            old_pool = self.pool
+            old_shared = self.shared
+            self.pool, self.num_documents, self.shared = loaded
+            self.generation += 1
+        old_pool.shutdown(wait=False)
+        # Workers of the old pool stay attached to its shared corpus until they exit:
+        if old_shared is not None:
+            old_shared.unlink()
+        print("Corpus reloaded: {num} document(s), generation {generation}.".format(num=self.num_documents, generation=self.generation))
+        return self.status()
+
+    async def __hangup(self):
+        try:
+            await self.reload()
+        except RuntimeError as e:
+            print(e)
+
+    async def check(self, filename: str, text: str) -> dict:
+        start = time.perf_counter_ns()
+        generation = self.generation
+        all_results = await asyncio.get_running_loop().run_in_executor(self.pool, check, filename, text)
+        self.requests += 1
+        return {'filename': filename, 'generation': generation, 'elapsed_ms': (time.perf_counter_ns() - start) / 1e6, 'results': all_results}
+
+    def status(self) -> dict:
+        return {'documents': self.num_documents, 'generation': self.generation, 'workers': self.workers, 'requests': self.requests, 'uptime_s': time.time() - self.started}
+
+    async def __respond(self, reader: asyncio.StreamReader) -> tuple:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) != 3:
+            return 400, {'error': "Malformed request line."}
+        method, path, version = request_line
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, separator, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > DAEMON_MAX_REQUEST_MB * 1024 * 1024:
+            return 413, {'error': "Request body is larger than {size} MB.".format(size=DAEMON_MAX_REQUEST_MB)}
+        body = await reader.readexactly(length)
+
+        path = path.split('?', 1)[0]
+        if path not in ROUTES:
+            return 404, {'error': "Unknown path '{path}'; must be one of {routes}.".format(path=path, routes=list(ROUTES))}
+        if method != ROUTES[path]:
+            return 405, {'error': "Path '{path}' only accepts {method} requests.".format(path=path, method=ROUTES[path])}
+        if path == '/status':
+            return 200, self.status()
+        if path == '/reload':
+            try:
+                return 200, await self.reload()
+            except RuntimeError as e:
+                return 503, {'error': str(e)}
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return 400, {'error': "Request body must be a JSON object with the 'text' of the document to check."}
+        if type(request) is not dict or type(request.get('text')) is not str:
+            return 400, {'error': "Request body must be a JSON object with the 'text' of the document to check."}
+        return 200, await self.check(str(request.get('filename', 'request')), request['text'])
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves one HTTP request on a connection, and responds with a JSON body before closing it."""
+        try:
+            status, response = await self.__respond(reader)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, response = 400, {'error': str(e)}
+        except Exception as e:
+            status, response = 500, {'error': "{type}: {error}".format(type=type(e).__name__, error=e)}
+        body = json.dumps(response).encode('utf-8')
+        head = "HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\nContent-Length: {length}\r\nConnection: close\r\n\r\n".format(status=status, reason=REASONS[status], length=len(body))
+        try:
+            writer.write(head.encode('latin-1') + body)
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def serve(self, host: str = DAEMON_HOST, port: int = DAEMON_PORT, path: str = DAEMON_SOCKET):
+        """Serves requests on the Unix socket at path if it is set, or on host:port otherwise, until interrupted or terminated."""
+        if path:
+            if os.path.exists(path):
+                os.remove(path)
+            server = await asyncio.start_unix_server(self.handle, path=path)
+            print("Daemon listening on Unix socket '{path}' with {workers} worker(s).".format(path=path, workers=self.workers))
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            print("Daemon listening on http://{host}:{port} with {workers} worker(s).".format(host=host, port=port, workers=self.workers))
+        loop = asyncio.get_running_loop()
+        # Reload the corpus on SIGHUP, as well as on POST /reload:
+        loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(self.__hangup()))
+        # Stop on SIGTERM whatever the disposition of SIGINT, so the worker pool and shared corpus are released:
+        stopped = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, stopped.set)
+        try:
+            async with server:
+                await stopped.wait()
+        finally:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            if self.shared is not None:
+                self.shared.unlink()
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+def request(method: str, path: str, body: dict = None, host: str = DAEMON_HOST, port: int = DAEMON_PORT, socket_path: str = DAEMON_SOCKET) -> tuple:
+    """
+    Sends one request to a running daemon and returns the HTTP status code and the decoded JSON
+    response.
+
+    Intended Usage:
+    \tstatus, response = daemon.request('POST', '/check', {'filename': 'doc.txt', 'text': text})
+    """
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    head = "{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\nContent-Length: {length}\r\nConnection: close\r\n\r\n".format(method=method, path=path, host=host, length=len(payload))
+    if socket_path:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path)
+    else:
+        connection = socket.create_connection((host, port))
+    with connection:
+        connection.sendall(head.encode('latin-1') + payload)
+        chunks = []
+        while True:
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    head, separator, response = b''.join(chunks).partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(response)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Resident plagiarism checking service. Defaults are read from the [DAEMON] section of 'config.ini'.")
+    parser.add_argument('--host', default=DAEMON_HOST)
+    parser.add_argument('--port', type=int, default=DAEMON_PORT)
+    parser.add_argument('--socket', default=DAEMON_SOCKET, help="serve on or connect to this Unix socket instead of host:port")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="load the corpus and serve checks until interrupted")
+    serve_parser.add_argument('--workers', type=int, default=DAEMON_WORKERS)
+    check_parser = commands.add_parser('check', help="check documents against the corpus of a running daemon")
+    check_parser.add_argument('files', nargs='+')
+    commands.add_parser('reload', help="make a running daemon load the corpus again")
+    commands.add_parser('status', help="show the corpus size, generation and request count of a running daemon")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        async def main():
+            daemon = Daemon(args.workers)
+            if not daemon.load():
+                sys.exit(1)
+            await daemon.serve(args.host, args.port, args.socket)
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            print()
+        print("Daemon stopped.")
+    else:
+        responses = []
+        if args.command == 'check':
+            for file in args.files:
+                with open(file, 'r') as f:
+                    responses.append(request('POST', '/check', {'filename': os.path.basename(file), 'text': f.read()}, args.host, args.port, args.socket))
+        else:
+            responses.append(request('POST' if args.command == 'reload' else 'GET', '/' + args.command, None, args.host, args.port, args.socket))
+        for status, response in responses:
+            print(json.dumps(response, indent=2))
+        if any(status != 200 for status, response in responses):
+            sys.exit(1)
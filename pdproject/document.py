@@ -1,71 +1,213 @@
 import re
 import configparser
+from array import array
+
+import numpy as np
+
+import rabinkarp
+import suffixautomaton
+import tokenizer
+import instrumentation
 
 
 config = configparser.ConfigParser()
 config.read('config.ini')
 VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
+PARAGRAPH_PATTERN = re.compile(r'[^\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]+')
+SENTENCE_SEPARATOR = re.compile(r'[.?!]\s*')
+
+
+def split_paragraphs(string: str) -> array:
+    """
+    Returns the flat (start, end) offsets of every non-empty line of a string. The lines are the same 
+    as those of string.splitlines() with empty lines removed.
+    """
+    offsets = array('I')
+    for match in PARAGRAPH_PATTERN.finditer(string):
+        offsets.append(match.start())
+        offsets.append(match.end())
+    return offsets
+
+
+def split_sentences(string: str) -> array:
+    """
+    Returns the flat (start, end) offsets of every non-empty sentence of a string. Sentences are 
+    separated by sentence-terminating punctuation, which is excluded from the sentence along with 
+    any whitespace that follows it.
+    """
+    offsets = array('I')
+    start = 0
+    for match in SENTENCE_SEPARATOR.finditer(string):
+        if match.start() > start:
+            offsets.append(start)
+            offsets.append(match.start())
+        start = match.end()
+    if len(string) > start:
+        offsets.append(start)
+        offsets.append(len(string))
+    return offsets
+
+
+class TextSlices:
+    """
+    Read-only sequence of substrings of a string, stored as a flat array('I') of (start, end) offset 
+    pairs. Substrings are only created when they are accessed, so a TextSlices object costs eight 
+    bytes per substring regardless of the length of the substrings. Supports len(), indexing, slicing 
+    and iteration in the same way as a list of strings.
+
+    __init__(string: str, offsets: array)
+    """
+    __slots__ = ('string', 'offsets')
+
+    def __init__(self, string: str, offsets: array):
+        self.string = string
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) // 2
+
+    def __getitem__(self, i):
+        if type(i) is slice:
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("TextSlices index out of range.")
+        return self.string[self.offsets[2 * i]:self.offsets[2 * i + 1]]
+
+    def __iter__(self):
+        string = self.string
+        offsets = self.offsets
+        for i in range(0, len(offsets), 2):
+            yield string[offsets[i]:offsets[i + 1]]
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
 
 
 class Document:
     """
-    Object used to store a parsed textfile. Document contains the filename, as well as a list 
-    of paragraphs and sentences. Document objects are intended to be stored within the Corpus 
-    object.
+    Object used to store a parsed textfile. Document contains the filename and the raw text, along 
+    with the (start, end) offsets of every paragraph and sentence within the raw text. The text is 
+    only stored once: Document.paragraphs and Document.sentences are TextSlices views that create 
+    each paragraph or sentence when it is accessed. Document objects are intended to be stored within 
+    the Corpus object. The raw text is tokenized into words on demand by Document.tokens().
 
     __init__(filename: str)
 
     Methods:
-    \tadd_paragraphs(), add_sentences(), info(), print_paragraphs(), print_sentences().
+    \tinfo(), load(), offsets(), parse(), print_paragraphs(), print_sentences(), suffix_automaton(), 
+    \tprefix_hashes(), tokens(), paragraph_tokens(), sentence_tokens(), release_caches().
     """
+    __slots__ = ('filename', 'raw_text', 'paragraph_offsets', 'sentence_offsets', 'automaton', 'hashes', 'token_cache')
+
     def __init__(self, filename: str):
         self.filename = filename
-        self.paragraphs = []
-        self.sentences = []
         self.raw_text = ""
+        self.paragraph_offsets = array('I')
+        self.sentence_offsets = array('I')
+        self.automaton = None
+        self.hashes = None
+        self.token_cache = None
 
+    @property
+    def paragraphs(self) -> TextSlices:
+        return TextSlices(self.raw_text, self.paragraph_offsets)
+
+    @property
+    def sentences(self) -> TextSlices:
+        return TextSlices(self.raw_text, self.sentence_offsets)
+
+    @instrumentation.timed("parse")
     def parse(self, raw_text: str):
         """
-        Parses the input string into the Document attributes. Sentences and paragraphs are extracted 
-        from the input string and appended to Document.sentences[] and Document.paragraphs[], respectively. 
-        The input string becomes Document.raw_text.
+        Parses the input string into the Document attributes. The offsets of sentences and paragraphs 
+        are extracted from the input string and stored in Document.sentence_offsets and 
+        Document.paragraph_offsets, respectively. The input string becomes Document.raw_text.
         """
         if type(raw_text) is str:
             self.raw_text = raw_text
-            paragraphs = raw_text.splitlines()
-            paragraphs = list(filter(None, paragraphs))
-            self.__add_paragraphs(paragraphs)
-            sentences = self.__split_sentences(raw_text)
-            sentences = list(filter(None, sentences))
-            self.__add_sentences(sentences)
+            self.paragraph_offsets = split_paragraphs(raw_text)
+            self.sentence_offsets = split_sentences(raw_text)
+            self.automaton = None
+            self.hashes = None
+            self.token_cache = None
         else:
             raise TypeError("Parameter of Document.parse() was {type} and must be of type 'str'.".format(type=type(raw_text)))
 
-    def __add_paragraphs(self, paragraphs: list):
-        if type(paragraphs) is list:
-            self.paragraphs += paragraphs
+    def load(self, raw_text: str, paragraph_offsets: list, sentence_offsets: list):
+        """
+        Populates the Document from a string and the precomputed flat (start, end) offsets of its 
+        paragraphs and sentences, as stored in Document.paragraph_offsets and Document.sentence_offsets. 
+        This gives the same result as Document.parse() without splitting the string again.
+        """
+        if type(raw_text) is str:
+            self.raw_text = raw_text
+            self.paragraph_offsets = array('I', paragraph_offsets)
+            self.sentence_offsets = array('I', sentence_offsets)
+            self.automaton = None
+            self.hashes = None
+            self.token_cache = None
         else:
-            raise TypeError("Parameter of Document.add_paragraphs() was {type} and must be of type 'list'.".format(type=type(paragraphs)))
+            raise TypeError("Parameter of Document.load() was {type} and must be of type 'str'.".format(type=type(raw_text)))
 
+    def offsets(self) -> tuple:
+        """
+        Returns two lists containing the (start, end) offsets of each paragraph and each sentence 
+        within Document.raw_text, in order.
+        """
+        paragraphs = self.paragraph_offsets
+        sentences = self.sentence_offsets
+        return list(zip(paragraphs[0::2], paragraphs[1::2])), list(zip(sentences[0::2], sentences[1::2]))
 
-    def __add_sentences(self, sentences: list):
-        if type(sentences) is list:
-            self.sentences += sentences
-        else:
-            raise TypeError("Parameter of Document.add_sentences() was {type} and must be of type 'list'.".format(type=type(sentences)))
 
+    def suffix_automaton(self) -> suffixautomaton.SuffixAutomaton:
+        """
+        Returns the suffix automaton of Document.raw_text. The automaton is built on the first call 
+        and cached on the Document, so later calls for any number of patterns reuse it.
+        """
+        if self.automaton is None:
+            self.automaton = suffixautomaton.SuffixAutomaton(self.raw_text)
+        return self.automaton
+
+    def prefix_hashes(self) -> rabinkarp.PrefixHashes:
+        """
+        Returns the prefix hashes of Document.raw_text used by RabinKarpNumpy. They are computed on the 
+        first call and cached on the Document, so every pattern of every search reuses them.
+        """
+        if self.hashes is None:
+            self.hashes = rabinkarp.PrefixHashes(self.raw_text)
+        return self.hashes
 
-    def __split_sentences(self, string) -> list:
+    def tokens(self, vocabulary: tokenizer.Vocabulary = tokenizer.VOCABULARY) -> np.ndarray:
         """
-        Separates a string into its component sentences and stores each individual sentence 
-        into an output list. Any sentence-terminating punctuation is removed from the sentence 
-        when stored into the output list.
+        Returns Document.raw_text as a NumPy uint32 array of word tokens interned in the vocabulary. 
+        The array is built on the first call and cached on the Document for that vocabulary.
         """
-        sentences = re.split(r'[.?!]\s*', string)
-        if sentences[-1]:
-            return sentences
-        else:
-            return sentences[:-1]
+        if self.token_cache is None or self.token_cache[0] is not vocabulary:
+            self.token_cache = (vocabulary, tokenizer.tokenize(self.raw_text, vocabulary))
+        return self.token_cache[1]
+
+    def release_caches(self):
+        """
+        Drops the suffix automaton, prefix hashes and word tokens cached on the Document, which are 
+        built again on their next use. Callers that are done with a corpus document call this so that 
+        the caches of every document are not held at once.
+        """
+        self.automaton = None
+        self.hashes = None
+        self.token_cache = None
+
+    def paragraph_tokens(self, vocabulary: tokenizer.Vocabulary = tokenizer.VOCABULARY) -> list:
+        """Returns the word tokens of each paragraph, in order, as NumPy uint32 arrays."""
+        return [tokenizer.tokenize(paragraph, vocabulary) for paragraph in self.paragraphs]
+
+    def sentence_tokens(self, vocabulary: tokenizer.Vocabulary = tokenizer.VOCABULARY) -> list:
+        """Returns the word tokens of each sentence, in order, as NumPy uint32 arrays."""
+        return [tokenizer.tokenize(sentence, vocabulary) for sentence in self.sentences]
 
 
     def info(self):
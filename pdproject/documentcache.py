@@ -0,0 +1,133 @@
+import os
+import struct
+import hashlib
+import configparser
+from array import array
+
+import document
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
+DOCUMENT_CACHE_DIR = config['DEFAULT']['DocumentCacheDirectory']
+DOCUMENT_CACHE_SIZE_MB = config.getint('DEFAULT', 'DocumentCacheSizeMB')
+
+MAGIC = b'PDCACHE1'
+
+# Entry header: magic, source file size, source mtime in nanoseconds, SHA-1 digest of the source file,
+# followed by the byte lengths of the path, paragraph offsets, sentence offsets and text sections.
+HEADER = struct.Struct('<8sQq20sIQQQ')
+
+
+class DocumentCache:
+    """
+    On-disk cache of parsed Document objects. Each source file is stored in its own cache entry along
+    with its size, modification time and content hash. A file whose size and modification time are
+    unchanged is loaded from the cache without being read, and a file that was touched but whose
+    content hash is unchanged is loaded without being parsed. Entries are evicted in least recently
+    used order once the cache grows beyond its size bound.
+
+    __init__(directory: str, max_bytes: int)
+
+    Methods:
+    \tload(), evict(), info().
+    """
+    def __init__(self, directory: str = DOCUMENT_CACHE_DIR, max_bytes: int = DOCUMENT_CACHE_SIZE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def __entry_path(self, path: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest() + ".bin")
+
+    def __read_entry(self, entry_path: str, path: str):
+        """Returns the header and sections of a cache entry, or None if it is missing or invalid."""
+        try:
+            with open(entry_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        magic, size, mtime, digest, path_length, paragraph_length, sentence_length, text_length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or len(data) != HEADER.size + path_length + paragraph_length + sentence_length + text_length:
+            return None
+        position = HEADER.size
+        if data[position:position + path_length].decode('utf-8') != os.path.abspath(path):
+            return None
+        position += path_length
+        paragraph_offsets = array('I')
+        paragraph_offsets.frombytes(data[position:position + paragraph_length])
+        position += paragraph_length
+        sentence_offsets = array('I')
+        sentence_offsets.frombytes(data[position:position + sentence_length])
+        position += sentence_length
+        raw_text = data[position:position + text_length].decode('utf-8')
+        return size, mtime, digest, paragraph_offsets, sentence_offsets, raw_text
+
+    def __write_entry(self, entry_path: str, path: str, size: int, mtime: int, digest: bytes, doc: document.Document):
+        path_bytes = os.path.abspath(path).encode('utf-8')
+        paragraph_bytes = doc.paragraph_offsets.tobytes()
+        sentence_bytes = doc.sentence_offsets.tobytes()
+        text_bytes = doc.raw_text.encode('utf-8')
+        temp_path = entry_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, size, mtime, digest, len(path_bytes), len(paragraph_bytes), len(sentence_bytes), len(text_bytes)))
+            f.write(path_bytes)
+            f.write(paragraph_bytes)
+            f.write(sentence_bytes)
+            f.write(text_bytes)
+        os.replace(temp_path, entry_path)
+
+    def load(self, path: str, filename: str) -> document.Document:
+        """
+        Returns the parsed Document of a source file. The Document is loaded from the cache if the
+        file is unchanged, otherwise the file is read, parsed and stored in the cache.
+        """
+        stat = os.stat(path)
+        entry_path = self.__entry_path(path)
+        entry = self.__read_entry(entry_path, path)
+        doc = document.Document(filename)
+
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            doc.raw_text, doc.paragraph_offsets, doc.sentence_offsets = entry[5], entry[3], entry[4]
+            os.utime(entry_path)
+            self.hits += 1
+            return doc
+
+        with open(path, 'r') as f:
+            raw_text = f.read()
+        digest = hashlib.sha1(raw_text.encode('utf-8')).digest()
+        if entry is not None and entry[2] == digest:
+            doc.raw_text, doc.paragraph_offsets, doc.sentence_offsets = entry[5], entry[3], entry[4]
+            self.hits += 1
+        else:
+            doc.parse(raw_text)
+            self.misses += 1
+        self.__write_entry(entry_path, path, stat.st_size, stat.st_mtime_ns, digest, doc)
+        return doc
+
+    def evict(self):
+        """Removes the least recently used cache entries until the cache fits within its size bound."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+                total += stat.st_size
+        entries.sort()
+        for mtime, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+            self.evictions += 1
+
+    def info(self):
+        """Outputs the number of cache hits, misses and evictions since the cache was opened."""
+        print("Document cache: {hits} hit(s), {misses} miss(es), {evictions} eviction(s).".format(hits=self.hits, misses=self.misses, evictions=self.evictions))
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import threading
+import functools
+import contextlib
+import configparser
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+INSTRUMENTATION = config.getboolean('DEFAULT', 'Instrumentation')
+INSTRUMENTATION_COUNTERS = config.getboolean('DEFAULT', 'InstrumentationCounters')
+INSTRUMENTATION_FILE = config['DEFAULT']['InstrumentationFile']
+INSTRUMENTATION_FORMAT = config['DEFAULT']['InstrumentationFormat']
+
+FORMATS = ['json', 'chrome']
+
+# Timing events of the current process as (name, start_ns, end_ns, thread_id, args) tuples, and the
+# totals of every counter. Both are only written to while INSTRUMENTATION or INSTRUMENTATION_COUNTERS
+# is enabled, respectively.
+events = []
+counters = {}
+
+_origin_ns = time.perf_counter_ns()
+_null_stage = contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def _stage(name: str, document: str = None):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        events.append((name, start, time.perf_counter_ns(), threading.get_ident(), document))
+
+
+def stage(name: str, document: str = None):
+    """
+    Returns a context manager that records the wall time of the code it encloses as a stage of the
+    given name, optionally for a single corpus document. When Instrumentation is disabled, a shared
+    context manager that does nothing is returned instead.
+
+    Intended Usage:
+    \twith instrumentation.stage("KMPSearch", corp_doc):
+    \t\t...
+    """
+    if INSTRUMENTATION:
+        return _stage(name, document)
+    return _null_stage
+
+
+def timed(name: str):
+    """
+    Decorator that records every call of a function as a stage of the given name. When
+    Instrumentation is disabled the function is returned unchanged, so it costs nothing.
+    """
+    def decorator(function):
+        if not INSTRUMENTATION:
+            return function
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, amount: int = 1):
+    """Adds amount to the counter of the given name."""
+    counters[name] = counters.get(name, 0) + amount
+
+
+def counted(function, name: str, amount):
+    """
+    Returns function unchanged when InstrumentationCounters is disabled. Otherwise, returns a function
+    that adds amount(*args) to the counter of the given name on every call before calling function.
+    This is used for counters that follow from the arguments alone, such as the number of lookup
+    table cells LCSS() fills, so the algorithm itself does not need to count them.
+    """
+    if not INSTRUMENTATION_COUNTERS:
+        return function
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        count(name, amount(*args))
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def summary() -> dict:
+    """
+    Returns the number of calls and the total, mean and maximum wall time in milliseconds of every
+    stage, along with the total of every counter.
+    """
+    stages = {}
+    for name, start, end, thread, document in events:
+        stats = stages.setdefault(name, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        elapsed = (end - start) / 1e6
+        stats['calls'] += 1
+        stats['total_ms'] += elapsed
+        stats['max_ms'] = max(stats['max_ms'], elapsed)
+    for stats in stages.values():
+        stats['mean_ms'] = stats['total_ms'] / stats['calls']
+    documents = {}
+    for name, start, end, thread, document in events:
+        if document is not None:
+            documents.setdefault(name, {})
+            documents[name][document] = documents[name].get(document, 0.0) + (end - start) / 1e6
+    return {'stages': stages, 'documents_ms': documents, 'counters': dict(sorted(counters.items()))}
+
+
+def trace() -> dict:
+    """Returns every recorded stage as a complete event ('ph': 'X') in the Chrome trace event format."""
+    pid = os.getpid()
+    trace_events = []
+    for name, start, end, thread, document in events:
+        event = {'name': name, 'ph': 'X', 'ts': (start - _origin_ns) / 1000, 'dur': (end - start) / 1000, 'pid': pid, 'tid': thread}
+        if document is not None:
+            event['args'] = {'document': document}
+        trace_events.append(event)
+    for name, value in sorted(counters.items()):
+        trace_events.append({'name': name, 'ph': 'C', 'ts': (time.perf_counter_ns() - _origin_ns) / 1000, 'pid': pid, 'args': {name: value}})
+    return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+
+def write(path: str = INSTRUMENTATION_FILE, format: str = INSTRUMENTATION_FORMAT):
+    """
+    Writes the recorded stages and counters to a file, either as the summary() in JSON ('json') or as
+    a Chrome trace event file ('chrome') that can be opened in chrome://tracing or Perfetto. Nothing is
+    written if both Instrumentation and InstrumentationCounters are disabled.
+    """
+    if not INSTRUMENTATION and not INSTRUMENTATION_COUNTERS:
+        return
+    if format not in FORMATS:
+        raise ValueError("Instrumentation format '{format}' must be one of {formats}.".format(format=format, formats=FORMATS))
+    with open(path, 'w') as f:
+        json.dump(summary() if format == 'json' else trace(), f, indent=2)
+    print("Instrumentation of {events} stage(s) and {counters} counter(s) written to '{path}'.".format(events=len(events), counters=len(counters), path=path))
@@ -1,4 +1,10 @@
 import configparser
+from array import array
+
+import numpy as np
+
+import instrumentation
+import matches
 
 
 config = configparser.ConfigParser()
@@ -7,33 +13,110 @@ VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
 ANALYSIS_KMP = config.getboolean('ANALYSIS', 'RuntimeAnalysis_KMP')
 
 
-def KMPSearch(pattern: str, string: str) -> int:
-    m = len(pattern)
-    n = len(string)
-    lps = LPS(pattern)
-
-    # if m > n:
-    #     print("Invalid pattern length: pattern is longer than string; aborting KMP.")
-    #     return 0
-    
-    matched = 0
-    total_matches = 0
-
-    for i in range(n):
-        while matched > 0 and pattern[matched] != string[i]:
-            matched = lps[matched - 1]
-        if pattern[matched] == string[i]:
-            matched += 1
-        if matched == m:
-            if VERBOSE: print("Pattern occurs in string at index {x}.".format(x=(i - m) + 1))
-            matched = lps[matched - 1]
-            total_matches += 1
-    hit_rate = (total_matches * m) / n * 100
-    if total_matches != 0:
-        if VERBOSE:
-            print("Pattern was found in string {matches} time(s).".format(matches=total_matches))
-            print("There is a {:.2f}% hit rate of the pattern in string.".format(hit_rate))
-    return hit_rate
+class KMPPattern:
+    """
+    Pattern compiled for KMPSearch(). The LPS table of the pattern is computed once when the 
+    object is created, so the same pattern can be searched for in any number of strings without 
+    repeating the preprocessing. The pattern and strings may also be lists of word tokens, as 
+    compiled by compile_tokens(), in which case matches and hit rates are counted in tokens.
+
+    __init__(pattern: str)
+
+    Methods:
+    \tfind(), search().
+    """
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.lps = LPS(pattern)
+
+    def find(self, string: str, counting: bool = instrumentation.INSTRUMENTATION_COUNTERS) -> array:
+        """
+        Returns the start index of every occurrence of the pattern in the string, including overlapping 
+        ones. If counting is True, which it is when InstrumentationCounters is enabled, the character 
+        comparisons, LPS fallbacks and matches are added to the 'kmp.*' instrumentation counters.
+        """
+        pattern = self.pattern
+        lps = self.lps
+        m = len(pattern)
+        n = len(string)
+
+        # if m > n:
+        #     print("Invalid pattern length: pattern is longer than string; aborting KMP.")
+        #     return 0
+        
+        matched = 0
+        positions = array('I')
+        comparisons = 0
+        fallbacks = 0
+
+        if m == 0:
+            return positions
+
+        for i in range(n):
+            while matched > 0 and pattern[matched] != string[i]:
+                matched = lps[matched - 1]
+                fallbacks += 1
+            if pattern[matched] == string[i]:
+                # A partial match that survived the fallbacks was compared once more to end them:
+                if counting and matched > 0:
+                    comparisons += 1
+                matched += 1
+            if matched == m:
+                positions.append((i - m) + 1)
+                matched = lps[matched - 1]
+        if counting:
+            instrumentation.count('kmp.comparisons', n + fallbacks + comparisons)
+            instrumentation.count('kmp.fallbacks', fallbacks)
+            instrumentation.count('kmp.matches', len(positions))
+        return positions
+
+    def search(self, string: str, matches: matches.Matches = None, pattern_id: int = 0, document_id: int = 0) -> float:
+        """
+        Returns the hit rate of the pattern in the string. If matches is given, a record of every 
+        occurrence is added to it under pattern_id and document_id once the scan has finished.
+        """
+        if len(string) == 0:
+            return 0
+        positions = self.find(string)
+        if matches is not None:
+            matches.extend(pattern_id, document_id, positions, len(self.pattern))
+        hit_rate = (len(positions) * len(self.pattern)) / len(string) * 100
+        return hit_rate
+
+
+def compile_pattern(pattern: str) -> KMPPattern:
+    """
+    Compiles a pattern into a KMPPattern object that can be reused against many strings.
+
+    Intended Usage:
+    \tcompiled = kmp.compile_pattern(pattern)
+
+    \thit_rate = compiled.search(string)
+    """
+    return KMPPattern(pattern)
+
+
+def compile_tokens(tokens: np.ndarray) -> KMPPattern:
+    """
+    Compiles the word tokens of a pattern, as returned by Document.sentence_tokens(), into a 
+    KMPPattern. Tokens are compared as Python ints, so the strings it is searched in must also be 
+    token lists, such as Document.tokens().tolist().
+
+    Intended Usage:
+    \tcompiled = kmp.compile_tokens(tokens)
+
+    \thit_rate = compiled.search(corpus_document.tokens().tolist())
+    """
+    return KMPPattern(np.asarray(tokens).tolist())
+
+
+def KMPSearch(pattern: str, string: str) -> float:
+    return compile_pattern(pattern).search(string)
+
+
+def KMPSearchTokens(pattern: np.ndarray, string: np.ndarray) -> float:
+    """Equivalent to KMPSearch() for two arrays of word tokens. The hit rate is the percentage of tokens matched."""
+    return compile_tokens(pattern).search(np.asarray(string).tolist())
 
 
 def LPS(pattern):
@@ -1,5 +1,10 @@
 import configparser
 
+import numpy as np
+
+import matches
+import suffixautomaton
+import instrumentation
 
 config = configparser.ConfigParser()
 config.read('config.ini')
@@ -12,16 +17,18 @@ class Match:
         self.ending_index = ending_index
 
 
-def LCSS(S: str, T: str) -> float:
+def LCSS(S: str, T: str, matches: matches.Matches = None, pattern_id: int = 0, document_id: int = 0) -> float:
     """
     S = String
     T = Pattern
     m = S.length
     n = T.length
+
+    If matches is given, the longest match is added to it under pattern_id and document_id, as its 
+    start index within S and its length.
     """
     m = len(S)
     n = len(T)
-    # matches = []
 
     max_length = 0
     ending_index = 0
@@ -42,13 +49,117 @@ def LCSS(S: str, T: str) -> float:
     # print(lookup_table))
     # for match in matches:
     #     print(match.starting_index)
-    if VERBOSE:
-        print("Longest match between paragraph and corpus document occurs at index {x}.".format(x=ending_index - max_length))
-        print("Longest match was: {match}".format(match=S[ending_index - max_length: ending_index]))
+    if matches is not None and max_length > 0:
+        matches.add(pattern_id, document_id, ending_index - max_length, max_length)
+    hit_rate = max_length / m * 100
+    return hit_rate
+
+
+def longest_common_substring(s: np.ndarray, t: np.ndarray) -> tuple:
+    """
+    Returns the length of the longest common substring of two integer arrays and the index of s at 
+    which it ends, filling the LCSS() lookup table with vectorized NumPy operations. Only two rows of 
+    the table are kept in memory, and the loop runs over the shorter of the two arrays.
+    """
+    m = len(s)
+    n = len(t)
+    max_length = 0
+    ending_index = 0
+    if m <= n:
+        # Row i of the lookup table holds the lengths of common substrings ending at s[i - 1]:
+        previous = np.zeros(n + 1, dtype=np.int32)
+        current = np.zeros(n + 1, dtype=np.int32)
+        for i in range(1, m + 1):
+            np.copyto(current[1:], np.where(t == s[i - 1], previous[:-1] + 1, 0))
+            row_max = int(current.max())
+            if row_max > max_length:
+                max_length = row_max
+                ending_index = i
+            previous, current = current, previous
+    else:
+        # Column j of the lookup table holds the lengths of common substrings ending at t[j - 1]:
+        previous = np.zeros(m + 1, dtype=np.int32)
+        current = np.zeros(m + 1, dtype=np.int32)
+        for j in range(1, n + 1):
+            np.copyto(current[1:], np.where(s == t[j - 1], previous[:-1] + 1, 0))
+            i = int(current.argmax())
+            column_max = int(current[i])
+            if column_max > max_length or (column_max == max_length and column_max > 0 and i < ending_index):
+                max_length = column_max
+                ending_index = i
+            previous, current = current, previous
+    return max_length, ending_index
+
+
+def LCSSNumpy(S: str, T: str, matches: matches.Matches = None, pattern_id: int = 0, document_id: int = 0) -> float:
+    """
+    Equivalent to LCSS(), but fills the lookup table with vectorized NumPy operations. Only two rows 
+    of the table are kept in memory, and the loop runs over the shorter of the two strings, so memory 
+    is O(m + n) instead of O(m * n). Results are identical to LCSS().
+
+    S = String
+    T = Pattern
+    m = S.length
+    n = T.length
+    """
+    m = len(S)
+    s = np.frombuffer(S.encode('utf-32-le'), dtype=np.uint32)
+    t = np.frombuffer(T.encode('utf-32-le'), dtype=np.uint32)
+    max_length, ending_index = longest_common_substring(s, t)
+    if matches is not None and max_length > 0:
+        matches.add(pattern_id, document_id, ending_index - max_length, max_length)
+    hit_rate = max_length / m * 100
+    return hit_rate
+
+
+def LCSSTokens(S: np.ndarray, T: np.ndarray, matches: matches.Matches = None, pattern_id: int = 0, document_id: int = 0) -> float:
+    """
+    Equivalent to LCSSNumpy() for two arrays of word tokens, as returned by Document.tokens() and 
+    Document.paragraph_tokens(). The longest common run of words is found, and the match and hit 
+    rate are counted in tokens.
+
+    S = String tokens
+    T = Pattern tokens
+    m = S.length
+    n = T.length
+    """
+    m = len(S)
+    if m == 0:
+        return 0
+    max_length, ending_index = longest_common_substring(S, T)
+    if matches is not None and max_length > 0:
+        matches.add(pattern_id, document_id, ending_index - max_length, max_length)
     hit_rate = max_length / m * 100
     return hit_rate
 
 
+def LCSSAutomaton(automaton: suffixautomaton.SuffixAutomaton, T: str, matches: matches.Matches = None, pattern_id: int = 0, document_id: int = 0) -> float:
+    """
+    Equivalent to LCSS(), but uses a prebuilt suffix automaton of S instead of an (m + 1) x (n + 1) 
+    lookup table, so it runs in O(n) time and needs no memory beyond the automaton itself.
+
+    automaton = SuffixAutomaton(S)
+    T = Pattern
+    m = S.length
+    n = T.length
+    """
+    S = automaton.string
+    m = len(S)
+    max_length, ending_index = automaton.longest_common_substring(T)
+    if matches is not None and max_length > 0:
+        matches.add(pattern_id, document_id, ending_index - max_length, max_length)
+    hit_rate = max_length / m * 100
+    return hit_rate
+
+
+# Count the lookup table cells filled by LCSS(), LCSSNumpy() and LCSSTokens(), and the characters of the pattern
+# fed through the suffix automaton by LCSSAutomaton(), when InstrumentationCounters is enabled:
+LCSS = instrumentation.counted(LCSS, 'lcss.cells', lambda S, T, *args: len(S) * len(T))
+LCSSNumpy = instrumentation.counted(LCSSNumpy, 'lcss.cells', lambda S, T, *args: len(S) * len(T))
+LCSSTokens = instrumentation.counted(LCSSTokens, 'lcss.cells', lambda S, T, *args: len(S) * len(T))
+LCSSAutomaton = instrumentation.counted(LCSSAutomaton, 'lcss.automaton_steps', lambda automaton, T, *args: len(T))
+
+
 if __name__ == '__main__':
     # LCSS test cases:
     # string = "ABABDABACDABABCABABABABDABACDABABCABAB"
@@ -62,3 +173,6 @@ if __name__ == '__main__':
 
     match = LCSS(string, pattern)
     print("Match percentage: {match:.2f}%".format(match=match))
+
+    match = LCSSAutomaton(suffixautomaton.SuffixAutomaton(string), pattern)
+    print("Match percentage: {match:.2f}%".format(match=match))
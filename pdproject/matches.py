@@ -0,0 +1,79 @@
+from array import array
+
+import numpy as np
+
+
+# One match record: the index of the pattern within the plagiarized document (its sentence or
+# paragraph index), the index of the corpus document, and the start index and length of the match
+# within the raw text of the corpus document.
+MATCH_RECORD = np.dtype([('pattern', '<u4'), ('document', '<u4'), ('start', '<u4'), ('length', '<u4')])
+
+
+class Matches:
+    """
+    Compact store of match records found by the algorithms. Records are kept in four array('I')
+    columns rather than as Python objects, so a record costs 16 bytes, and the algorithms add all of
+    the matches of one pattern in one call after their scan has finished. Matches are reported once
+    with report(), outside of the algorithms, or converted to a NumPy array of MATCH_RECORD for
+    highlighting and evidence reports.
+
+    __init__()
+
+    Methods:
+    \tadd(), extend(), document(), to_array(), report().
+    """
+    __slots__ = ('patterns', 'documents', 'starts', 'lengths')
+
+    def __init__(self):
+        self.patterns = array('I')
+        self.documents = array('I')
+        self.starts = array('I')
+        self.lengths = array('I')
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.patterns, self.documents, self.starts, self.lengths)
+
+    def add(self, pattern: int, document: int, start: int, length: int):
+        self.patterns.append(pattern)
+        self.documents.append(document)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def extend(self, pattern: int, document: int, starts: array, length: int):
+        """Adds a match of the given length at each start index of starts, all for the same pattern."""
+        count = len(starts)
+        self.patterns.extend(array('I', [pattern]) * count)
+        self.documents.extend(array('I', [document]) * count)
+        self.starts.extend(starts)
+        self.lengths.extend(array('I', [length]) * count)
+
+    def document(self, document: int) -> 'Matches':
+        """Returns the matches found within one corpus document."""
+        matches = Matches()
+        for record in self:
+            if record[1] == document:
+                matches.add(*record)
+        return matches
+
+    def to_array(self, start: int = 0) -> np.ndarray:
+        """
+        Returns every match as a NumPy array of MATCH_RECORD, ordered by document, start and pattern. 
+        If start is given, only the matches added after the first start matches are returned.
+        """
+        records = np.empty(len(self) - start, dtype=MATCH_RECORD)
+        records['pattern'] = self.patterns[start:]
+        records['document'] = self.documents[start:]
+        records['start'] = self.starts[start:]
+        records['length'] = self.lengths[start:]
+        return records[np.lexsort((records['pattern'], records['start'], records['document']))]
+
+    def report(self, document_names: list, label: str = "Pattern", start: int = 0):
+        """
+        Prints every match, ordered by document and start index, using the filenames of the corpus 
+        documents. If start is given, only the matches added after the first start matches are printed.
+        """
+        for pattern, document, start, length in self.to_array(start).tolist():
+            print("{label} {p} occurs in '{file}' at index {x} (length {length}).".format(label=label, p=pattern, file=document_names[document], x=start, length=length))
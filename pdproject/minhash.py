@@ -0,0 +1,130 @@
+import zlib
+import configparser
+
+import numpy as np
+
+import document
+import tokenizer
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
+
+# Prime modulus of the hash permutations. Shingle hashes and permutation coefficients are below it, so
+# a * x + b fits in 64 bits. The seed fixes the permutations, so signatures are comparable across runs.
+PRIME = (1 << 31) - 1
+SEED = 320
+CHUNK_SIZE = 8192
+
+
+def shingles(string: str, k: int) -> np.ndarray:
+    """
+    Returns the CRC-32 of every run of k consecutive words of the string, after the same case-folding
+    and removal of punctuation as tokenizer.normalize(), as a NumPy uint64 array. A string with fewer
+    than k words is a single shingle, and a string without words has none.
+    """
+    words = tokenizer.normalize(string)
+    if len(words) == 0:
+        return np.empty(0, dtype=np.uint64)
+    return np.array([zlib.crc32(' '.join(words[i:i + k]).encode('utf-8')) for i in range(max(len(words) - k + 1, 1))], dtype=np.uint64)
+
+
+class LSHIndex:
+    """
+    Banded locality-sensitive hashing index of the MinHash signatures of corpus documents. The signature
+    of a document holds, for each of num_perm random hash permutations, the minimum hash of its word
+    shingles, so the share of equal signature values estimates the Jaccard similarity of two documents.
+    Signatures are split into bands of rows values, and documents with an identical band are stored in
+    the same bucket. A query only compares the plagiarized document with documents that share a bucket
+    with it, and keeps those whose estimated Jaccard similarity is at least floor. With one row per band,
+    any document sharing a single minimum hash is compared.
+
+    __init__(k: int, num_perm: int, bands: int, floor: float)
+
+    Methods:
+    \tsignature(), add_document(), replace_document(), remove_document(), query(), info().
+    """
+    def __init__(self, k: int, num_perm: int, bands: int, floor: float):
+        if bands < 1 or num_perm % bands != 0:
+            raise ValueError("MinHash permutations ({num_perm}) must be a multiple of the number of bands ({bands}).".format(num_perm=num_perm, bands=bands))
+        self.k = k
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.floor = floor
+        rng = np.random.default_rng(SEED)
+        self.a = rng.integers(1, PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self.signatures = {}
+        self.buckets = [{} for band in range(bands)]
+
+    def signature(self, raw_text: str) -> np.ndarray:
+        """Returns the MinHash signature of a string as a NumPy uint32 array, or None if it has no words."""
+        hashes = shingles(raw_text, self.k) % np.uint64(PRIME)
+        if len(hashes) == 0:
+            return None
+        signature = np.full(self.num_perm, PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), CHUNK_SIZE):
+            permuted = (self.a * hashes[start:start + CHUNK_SIZE] + self.b) % np.uint64(PRIME)
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+    def __bands(self, signature: np.ndarray):
+        rows = self.rows
+        for band in range(self.bands):
+            yield band, signature[band * rows:(band + 1) * rows].tobytes()
+
+    def add_document(self, doc: document.Document):
+        """Adds the signature of a Document to the index, under the filename of the Document."""
+        if type(doc) is not document.Document:
+            raise TypeError("Parameter of LSHIndex.add_document() was {type} and must be of type 'Document'.".format(type=type(doc)))
+        signature = self.signature(doc.raw_text)
+        if signature is None:
+            return
+        self.signatures[doc.filename] = signature
+        for band, key in self.__bands(signature):
+            self.buckets[band].setdefault(key, []).append(doc.filename)
+
+    def replace_document(self, doc: document.Document):
+        """Replaces the signature of a Document already in the index, or adds it if it is not."""
+        if doc.filename in self.signatures:
+            self.remove_document(doc.filename)
+        self.add_document(doc)
+
+    def remove_document(self, filename: str):
+        """Removes the signature stored under filename. Documents without words have no signature to remove."""
+        signature = self.signatures.pop(filename, None)
+        if signature is None:
+            return
+        for band, key in self.__bands(signature):
+            bucket = self.buckets[band][key]
+            bucket.remove(filename)
+            if len(bucket) == 0:
+                del self.buckets[band][key]
+
+    def query(self, plagiarized: document.Document) -> dict:
+        """
+        Returns a dictionary mapping the filename of every candidate document to its estimated Jaccard
+        similarity with the plagiarized document. Candidates share at least one band with the plagiarized
+        document and have an estimated similarity of at least floor.
+        """
+        signature = self.signature(plagiarized.raw_text)
+        if signature is None:
+            return {}
+        shared = set()
+        for band, key in self.__bands(signature):
+            shared.update(self.buckets[band].get(key, ()))
+        candidates = {}
+        for filename in shared:
+            similarity = float(np.count_nonzero(self.signatures[filename] == signature)) / self.num_perm
+            if similarity >= self.floor:
+                candidates[filename] = similarity
+        return candidates
+
+    def info(self):
+        """Outputs the number of documents held in the index, along with its parameters in verbose mode."""
+        if VERBOSE:
+            print("LSH index of {num} document(s): {perm} MinHash permutations of {k}-word shingles in {bands} band(s) of {rows} row(s), Jaccard floor {floor}.".format(num=len(self.signatures), perm=self.num_perm, k=self.k, bands=self.bands, rows=self.rows, floor=self.floor))
+        else:
+            print("LSH index contains the MinHash signatures of {num} document(s).".format(num=len(self.signatures)))
@@ -0,0 +1,249 @@
+import configparser
+from concurrent.futures import ProcessPoolExecutor
+
+import document
+import corpus
+import results
+import kmp
+import lcss
+import rabinkarp
+import ahocorasick
+import suffixautomaton
+import tokenizer
+import winnowing
+import sharedcorpus
+import instrumentation
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
+RABIN_KARP_MULTIPATTERN = config.getboolean('ALGORITHMS', 'RabinKarp_MultiPattern')
+RABIN_KARP_NUMPY = config.getboolean('ALGORITHMS', 'RabinKarp_Numpy')
+LCSS_SUFFIX_AUTOMATON = config.getboolean('ALGORITHMS', 'LCSS_SuffixAutomaton')
+TOKEN_MODE = config.getboolean('ALGORITHMS', 'TokenMode')
+WINNOWING_K = config.getint('ALGORITHMS', 'Winnowing_K')
+WINNOWING_W = config.getint('ALGORITHMS', 'Winnowing_W')
+
+ALGORITHMS = ['kmp', 'lcss', 'rabinkarp', 'ahocorasick', 'winnowing']
+
+# Scoring function of the current worker process, the RabinKarpSet it scores with if any, and the SharedCorpus it reads documents from if any, set once by _init_worker():
+_score = None
+_patterns = None
+_shared = None
+
+
+def pattern_set(algorithm: str, plagiarized: document.Document) -> rabinkarp.RabinKarpSet:
+    """
+    Returns the RabinKarpSet (or RabinKarpNumpy) of the sentences of a plagiarized document that scorer()
+    uses for an algorithm, or None if the algorithm is not run with a set of patterns.
+    """
+    if algorithm != 'rabinkarp':
+        return None
+    if RABIN_KARP_NUMPY:
+        return rabinkarp.RabinKarpNumpy(list(plagiarized.sentences))
+    if RABIN_KARP_MULTIPATTERN:
+        return rabinkarp.RabinKarpSet(list(plagiarized.sentences))
+    return None
+
+
+def scorer(algorithm: str, plagiarized: document.Document, patterns: rabinkarp.RabinKarpSet = None):
+    """
+    Preprocesses the patterns of a plagiarized document for one algorithm and returns a function that
+    takes the raw text of a corpus document and returns its total hit rate. The returned function gives
+    the same total hit rate as the matching wrapper function in 'pdproject.py'. If the algorithm is run
+    with a set of patterns, the set returned by pattern_set() can be passed as patterns to read its
+    counters afterwards.
+    """
+    if algorithm == 'kmp':
+        if TOKEN_MODE:
+            return _token_scorer([kmp.compile_tokens(sentence) for sentence in plagiarized.sentence_tokens()])
+        patterns = [kmp.compile_pattern(sentence) for sentence in plagiarized.sentences]
+        return lambda raw_text: sum(pattern.search(raw_text) for pattern in patterns)
+    elif algorithm == 'lcss':
+        if TOKEN_MODE:
+            paragraphs = plagiarized.paragraph_tokens()
+            def score(raw_text):
+                tokens = tokenizer.tokenize(raw_text)
+                return sum(lcss.LCSSTokens(tokens, paragraph) for paragraph in paragraphs)
+            return score
+        paragraphs = list(plagiarized.paragraphs)
+        if LCSS_SUFFIX_AUTOMATON:
+            def score(raw_text):
+                automaton = suffixautomaton.SuffixAutomaton(raw_text)
+                return sum(lcss.LCSSAutomaton(automaton, paragraph) for paragraph in paragraphs)
+            return score
+        return lambda raw_text: sum(lcss.LCSS(raw_text, paragraph) for paragraph in paragraphs)
+    elif algorithm == 'rabinkarp':
+        if RABIN_KARP_NUMPY or RABIN_KARP_MULTIPATTERN:
+            if patterns is None:
+                patterns = pattern_set(algorithm, plagiarized)
+            return lambda raw_text: sum(patterns.hit_rates(raw_text))
+        if TOKEN_MODE:
+            return _token_scorer([rabinkarp.compile_tokens(sentence) for sentence in plagiarized.sentence_tokens()])
+        patterns = [rabinkarp.compile_pattern(sentence) for sentence in plagiarized.sentences]
+        return lambda raw_text: sum(pattern.search(raw_text) for pattern in patterns)
+    elif algorithm == 'ahocorasick':
+        automaton = ahocorasick.AhoCorasick(list(plagiarized.sentences))
+        return lambda raw_text: sum(automaton.hit_rates(raw_text))
+    elif algorithm == 'winnowing':
+        # Same hit rate as FingerprintIndex.query(), computed against one corpus document at a time:
+        hashes = {hash_k for hash_k, position in winnowing.fingerprint(plagiarized.raw_text, WINNOWING_K, WINNOWING_W)}
+        def score(raw_text):
+            if len(hashes) == 0:
+                return 0
+            shared = hashes.intersection(hash_k for hash_k, position in winnowing.fingerprint(raw_text, WINNOWING_K, WINNOWING_W))
+            return len(shared) / len(hashes) * 100
+        return score
+    else:
+        raise ValueError("Algorithm '{algorithm}' cannot be run in parallel; must be one of {algorithms}.".format(algorithm=algorithm, algorithms=ALGORITHMS))
+
+
+def batch_scorer(plagiarized_documents: list):
+    """
+    Builds a single Aho-Corasick automaton from the sentences of several plagiarized documents and 
+    returns a function that takes the raw text of a corpus document and returns a list with its total 
+    hit rate for each plagiarized document, so the corpus document is scanned once for the whole batch.
+    """
+    patterns = []
+    ranges = []
+    for plagiarized in plagiarized_documents:
+        ranges.append((len(patterns), len(patterns) + len(plagiarized.sentences)))
+        patterns += plagiarized.sentences
+    automaton = ahocorasick.AhoCorasick(patterns)
+    def score(raw_text):
+        hit_rates = automaton.hit_rates(raw_text)
+        return [sum(hit_rates[start:end]) for start, end in ranges]
+    return score
+
+
+def document_scorer(algorithm: str, plagiarized: document.Document, vocabulary: tokenizer.Vocabulary = tokenizer.VOCABULARY):
+    """
+    Equivalent to scorer(), but the returned function takes a corpus Document instead of its raw text.
+    Preprocessing of the corpus document that several algorithms or calls share is cached on the
+    Document, so it is only computed once: the token array in TokenMode, the prefix hashes used by
+    RabinKarpNumpy, and the suffix automaton used by LCSSAutomaton. In TokenMode, the plagiarized and 
+    corpus documents are tokenized with vocabulary.
+    """
+    if algorithm == 'rabinkarp' and RABIN_KARP_NUMPY:
+        patterns = rabinkarp.RabinKarpNumpy(list(plagiarized.sentences))
+        return lambda corp_doc: sum(patterns.hit_rates(corp_doc.prefix_hashes()))
+    if algorithm == 'lcss' and TOKEN_MODE:
+        paragraphs = plagiarized.paragraph_tokens(vocabulary)
+        return lambda corp_doc: sum(lcss.LCSSTokens(corp_doc.tokens(vocabulary), paragraph) for paragraph in paragraphs)
+    if algorithm == 'lcss' and LCSS_SUFFIX_AUTOMATON:
+        paragraphs = list(plagiarized.paragraphs)
+        return lambda corp_doc: sum(lcss.LCSSAutomaton(corp_doc.suffix_automaton(), paragraph) for paragraph in paragraphs)
+    if TOKEN_MODE and (algorithm == 'kmp' or (algorithm == 'rabinkarp' and not RABIN_KARP_MULTIPATTERN)):
+        compile_tokens = kmp.compile_tokens if algorithm == 'kmp' else rabinkarp.compile_tokens
+        patterns = [compile_tokens(sentence) for sentence in plagiarized.sentence_tokens(vocabulary)]
+        def score(corp_doc):
+            tokens = corp_doc.tokens(vocabulary).tolist()
+            return sum(pattern.search(tokens) for pattern in patterns)
+        return score
+    score = scorer(algorithm, plagiarized)
+    return lambda corp_doc: score(corp_doc.raw_text)
+
+
+def _token_scorer(patterns: list):
+    """Returns a scoring function that tokenizes the raw text of a corpus document and sums the hit rates of the token patterns."""
+    def score(raw_text):
+        tokens = tokenizer.tokenize(raw_text).tolist()
+        return sum(pattern.search(tokens) for pattern in patterns)
+    return score
+
+
+def _init_worker(algorithm: str, plagiarized, descriptor: dict = None):
+    global _score, _patterns, _shared
+    # A batch is run for a list of plagiarized documents rather than a single Document:
+    if algorithm == 'ahocorasick_batch':
+        _score = batch_scorer(plagiarized)
+    else:
+        _patterns = pattern_set(algorithm, plagiarized)
+        _score = scorer(algorithm, plagiarized, _patterns)
+    if descriptor is not None:
+        _shared = sharedcorpus.SharedCorpus.attach(descriptor)
+
+
+def _scan(chunk: list) -> tuple:
+    # Counters of the worker only cover this chunk, so the main process can add them to its own:
+    instrumentation.counters.clear()
+    before = _patterns.totals() if _patterns is not None else None
+    chunk_results = results.Results(capacity=len(chunk))
+    for i, filename, text in chunk:
+        # With a SharedCorpus, chunks hold the index of each document within it instead of its raw text:
+        raw_text = _shared.raw_text(text) if _shared is not None else text
+        chunk_results.add(filename, _score(raw_text), i)
+    set_counts = tuple(total - previous for previous, total in zip(before, _patterns.totals())) if _patterns is not None else None
+    return chunk_results, dict(instrumentation.counters), set_counts
+
+
+def _scan_batch(chunk: list) -> tuple:
+    instrumentation.counters.clear()
+    chunk_results = None
+    for i, filename, text in chunk:
+        raw_text = _shared.raw_text(text) if _shared is not None else text
+        totals = _score(raw_text)
+        if chunk_results is None:
+            chunk_results = [results.Results(capacity=len(chunk)) for total in totals]
+        for plagiarized_results, total in zip(chunk_results, totals):
+            plagiarized_results.add(filename, total, i)
+    return chunk_results, dict(instrumentation.counters)
+
+
+def _chunks(corp: corpus.Corpus, workers: int, shared: sharedcorpus.SharedCorpus = None) -> list:
+    """
+    Splits the corpus into contiguous chunks of (index, filename, raw_text), several per worker. If shared 
+    is given, the index of each document within the SharedCorpus is sent in place of its raw text.
+    """
+    keys = list(corp.documents)
+    size = max(1, len(keys) // (workers * 4))
+    if shared is not None:
+        return [[(i, keys[i], shared.index[keys[i]]) for i in range(start, min(start + size, len(keys)))] for start in range(0, len(keys), size)]
+    return [[(i, keys[i], corp.documents[keys[i]].raw_text) for i in range(start, min(start + size, len(keys)))] for start in range(0, len(keys), size)]
+
+
+def run(algorithm: str, corp: corpus.Corpus, plagiarized: document.Document, workers: int, shared: sharedcorpus.SharedCorpus = None, patterns: rabinkarp.RabinKarpSet = None) -> results.Results:
+    """
+    Runs an algorithm against every document of a corpus using a pool of worker processes. The patterns
+    of the plagiarized document are sent to and preprocessed by each worker once, while the corpus is
+    split into chunks of documents. Each chunk is scored into its own Results object, which are merged
+    as the workers finish. Results.items() returns the hit rates in the same order as Corpus.documents.
+    If a SharedCorpus holding every document of the corpus is given, workers attach to it and read the
+    raw text from shared memory, so the text is not pickled and sent to them. The instrumentation
+    counters of each chunk are added to those of the main process, and if a set of patterns from 
+    pattern_set() is given, the hash collision counters of the worker sets are added to its own.
+
+    Intended Usage:
+    \tall_results = parallel.run('kmp', corpus, plagiarized, workers)
+    """
+    all_results = results.Results(capacity=len(corp.documents))
+    descriptor = shared.descriptor if shared is not None else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(algorithm, plagiarized, descriptor)) as executor:
+        for chunk_results, chunk_counters, set_counts in executor.map(_scan, _chunks(corp, workers, shared)):
+            all_results.merge(chunk_results)
+            for name, amount in chunk_counters.items():
+                instrumentation.count(name, amount)
+            if patterns is not None and set_counts is not None:
+                patterns.add_totals(set_counts)
+    return all_results
+
+
+def run_batch(corp: corpus.Corpus, plagiarized_documents: list, workers: int, shared: sharedcorpus.SharedCorpus = None) -> list:
+    """
+    Equivalent to run() for Aho-Corasick with the automaton of batch_scorer(), so each corpus document
+    is scanned once by one worker for every plagiarized document. Returns a list with one Results
+    object per plagiarized document.
+
+    Intended Usage:
+    \tbatch_results = parallel.run_batch(corpus, plagiarized_documents, workers)
+    """
+    all_results = [results.Results(capacity=len(corp.documents)) for plagiarized in plagiarized_documents]
+    descriptor = shared.descriptor if shared is not None else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=('ahocorasick_batch', plagiarized_documents, descriptor)) as executor:
+        for chunk_results, chunk_counters in executor.map(_scan_batch, _chunks(corp, workers, shared)):
+            for plagiarized_results, partial_results in zip(all_results, chunk_results):
+                plagiarized_results.merge(partial_results)
+            for name, amount in chunk_counters.items():
+                instrumentation.count(name, amount)
+    return all_results
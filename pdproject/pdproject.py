@@ -1,6 +1,9 @@
 import os
 import sys
+import hashlib
 import configparser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import document
 import corpus
@@ -8,6 +11,18 @@ import results
 import kmp
 import lcss
 import rabinkarp
+import ahocorasick
+import suffixautomaton
+import winnowing
+import minhash
+import corpusindex
+import parallel
+import sharedcorpus
+import documentcache
+import corpusmanifest
+import instrumentation
+import matches
+import triage
 
 
 config = configparser.ConfigParser()
@@ -17,11 +32,41 @@ CORPUS_DIR_SINGULAR = config['DEFAULT']['CorpusDirectorySingular']
 PLAG_DIR = config['DEFAULT']['PlagiarizedDirectory']
 CORPUS_USE_SINGULAR = config.getboolean('DEFAULT', 'CorpusUseSingular')
 VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
+COLLECT_MATCHES = config.getboolean('DEFAULT', 'CollectMatches') or VERBOSE
+CORPUS_INDEX_FILE = config['DEFAULT']['CorpusIndexFile']
+USE_CORPUS_INDEX = config.getboolean('DEFAULT', 'UseCorpusIndex')
+WORKERS = config.getint('DEFAULT', 'Workers') or os.cpu_count()
+SHARED_MEMORY_CORPUS = config.getboolean('DEFAULT', 'SharedMemoryCorpus')
+BATCH_MODE = config.getboolean('DEFAULT', 'BatchMode')
+USE_DOCUMENT_CACHE = config.getboolean('DEFAULT', 'UseDocumentCache')
+STREAM_CORPUS = config.getboolean('DEFAULT', 'StreamCorpus')
+STREAM_QUEUE_SIZE = config.getint('DEFAULT', 'StreamQueueSize')
+STREAM_THREADS = config.getint('DEFAULT', 'StreamThreads')
+STREAM_TOP_K = config.getint('DEFAULT', 'StreamTopK')
+SINGLE_PASS = config.getboolean('DEFAULT', 'SinglePass')
 ENABLE_KMP = config.getboolean('ALGORITHMS', 'Enable_KMP')
 ENABLE_LCSS = config.getboolean('ALGORITHMS', 'Enable_LCSS')
 ENABLE_RABIN_KARP = config.getboolean('ALGORITHMS', 'Enable_RabinKarp')
-
-
+ENABLE_AHO_CORASICK = config.getboolean('ALGORITHMS', 'Enable_AhoCorasick')
+RABIN_KARP_MULTIPATTERN = config.getboolean('ALGORITHMS', 'RabinKarp_MultiPattern')
+RABIN_KARP_NUMPY = config.getboolean('ALGORITHMS', 'RabinKarp_Numpy')
+LCSS_SUFFIX_AUTOMATON = config.getboolean('ALGORITHMS', 'LCSS_SuffixAutomaton')
+TOKEN_MODE = config.getboolean('ALGORITHMS', 'TokenMode')
+ENABLE_WINNOWING = config.getboolean('ALGORITHMS', 'Enable_Winnowing')
+WINNOWING_K = config.getint('ALGORITHMS', 'Winnowing_K')
+WINNOWING_W = config.getint('ALGORITHMS', 'Winnowing_W')
+MINHASH_PREFILTER = config.getboolean('ALGORITHMS', 'MinHash_Prefilter')
+MINHASH_K = config.getint('ALGORITHMS', 'MinHash_K')
+MINHASH_PERMUTATIONS = config.getint('ALGORITHMS', 'MinHash_Permutations')
+MINHASH_BANDS = config.getint('ALGORITHMS', 'MinHash_Bands')
+MINHASH_FLOOR = config.getfloat('ALGORITHMS', 'MinHash_Floor')
+MINHASH_MEASURE_RECALL = config.getboolean('ALGORITHMS', 'MinHash_MeasureRecall')
+
+# SharedCorpus of the loaded corpus that parallel_wrapper() workers attach to, when SharedMemoryCorpus is enabled:
+shared_corpus = None
+
+
+@instrumentation.timed("load corpus")
 def compile_corpus_documents() -> list:
     """
     Checks for the existence of .txt files stored within the defined corpus directory and 
@@ -30,7 +75,8 @@ def compile_corpus_documents() -> list:
     a corpus of documents by calling compile_corpus() with the returned list as a parameter.
     
     The corpus directory to be searched is defined within 'config.ini' located at the root 
-    of the project directory.
+    of the project directory. If UseDocumentCache is enabled, unchanged files are loaded from 
+    the document cache instead of being parsed again.
 
     Intended Usage:
     \tdocuments = compile_corpus_documents()
@@ -38,9 +84,13 @@ def compile_corpus_documents() -> list:
     \tcorpus = compile_corpus(documents)
     """
     documents = []
+    cache = documentcache.DocumentCache() if USE_DOCUMENT_CACHE else None
     print("\nScanning for documents to add to corpus...")
     for file in os.listdir(CORPUS_DIR):
         if file.lower().endswith(".txt"):
+            if cache is not None:
+                documents.append(cache.load(os.path.join(CORPUS_DIR, file), file))
+                continue
             with open(os.path.join(CORPUS_DIR, file), 'r') as f:
                 doc = document.Document(file)
                 raw_text = f.read()
@@ -48,6 +98,9 @@ def compile_corpus_documents() -> list:
                 documents.append(doc)
         else:
             print("An invalid file was found and will be ignored: '{file}'".format(file=file))
+    if cache is not None:
+        cache.evict()
+        cache.info()
     if len(documents) == 0:
         print("No valid documents were found when scanning directory '{dir}'.".format(dir=os.path.join(CORPUS_DIR)))
         return False
@@ -55,6 +108,7 @@ def compile_corpus_documents() -> list:
         return documents
 
 
+@instrumentation.timed("load plagiarized")
 def compile_plag_document():
     print("Scanning for potentially plagiarized document...")
     file = os.listdir(PLAG_DIR)
@@ -70,34 +124,131 @@ def compile_plag_document():
         return False
 
 
-def extract_corpus_files() -> list:
+@instrumentation.timed("load plagiarized")
+def compile_plag_documents() -> list:
+    """
+    Batch mode equivalent of compile_plag_document(). Every .txt file within the plagiarized directory 
+    is parsed into a Document object, and the list of Document objects is returned to the function 
+    caller, or False if no valid documents were found.
+    """
     documents = []
-    file = os.listdir(CORPUS_DIR_SINGULAR)
-    if file[0].lower().endswith(".txt"):
-        with open(os.path.join(CORPUS_DIR_SINGULAR, file[0]), 'r') as f:
-            doc = document.Document(file[0])
-            raw_text = f.read()
-            if type(raw_text) is str:
-                doc.raw_text = raw_text
-                essay = raw_text.splitlines()
-                essay = list(filter(None, essay))
-                doc._Document__add_paragraphs(essay)
-            else:
-                raise TypeError("Parameter of Document.parse() was {type} and must be of type 'str'.".format(type=type(raw_text)))
-            for i in range(doc.number_paragraphs()):
-                filename = "input{x}".format(x=i)
-                filename += ".txt"
-                temp_doc = document.Document(filename)
-                raw_text = doc.paragraphs[i]
-                temp_doc.parse(raw_text)
-                documents.append(temp_doc)
-        return documents
+    print("Scanning for potentially plagiarized documents...")
+    for file in sorted(os.listdir(PLAG_DIR)):
+        if file.lower().endswith(".txt"):
+            with open(os.path.join(PLAG_DIR, file), 'r') as f:
+                doc = document.Document(file)
+                raw_text = f.read()
+                doc.parse(raw_text)
+                documents.append(doc)
+        else:
+            print("An invalid file was found and will be ignored: '{file}'".format(file=file))
+    if len(documents) == 0:
+        print("No valid documents were found when scanning directory '{dir}'.".format(dir=os.path.join(PLAG_DIR)))
+        return False
     else:
-        print("Invalid file type found: '{dir}'".format(dir=os.path.join(PLAG_DIR, file[0])))
-        print("Directory '{dir}' must contain only one file of type '.txt' and no sub-directories.".format(dir=os.path.join(PLAG_DIR)))
+        return documents
+
+
+def singular_corpus_file():
+    """
+    Returns the path of the .txt file within the singular corpus directory, or False if there is none. 
+    Line index files ('<file>.lines') written next to the corpus file by LineCorpus are ignored.
+    """
+    files = [file for file in sorted(os.listdir(CORPUS_DIR_SINGULAR)) if not file.endswith(".lines")]
+    if len(files) != 0 and files[0].lower().endswith(".txt"):
+        return os.path.join(CORPUS_DIR_SINGULAR, files[0])
+    elif len(files) != 0:
+        print("Invalid file type found: '{dir}'".format(dir=os.path.join(CORPUS_DIR_SINGULAR, files[0])))
+    print("Directory '{dir}' must contain only one file of type '.txt' and no sub-directories.".format(dir=os.path.join(CORPUS_DIR_SINGULAR)))
+    return False
+
+
+@instrumentation.timed("load corpus")
+def extract_corpus_files() -> list:
+    """
+    Reads the single file within the singular corpus directory and parses each of its non-empty lines 
+    into a separate Document object named 'input{x}.txt'. The list of Document objects is returned to 
+    the function caller, or False if the directory does not contain a file of type '.txt'.
+    """
+    documents = []
+    path = singular_corpus_file()
+    if path is False:
+        return False
+    with open(path, 'r') as f:
+        raw_text = f.read()
+        lines = document.split_paragraphs(raw_text)
+        for i in range(len(lines) // 2):
+            filename = "input{x}".format(x=i)
+            filename += ".txt"
+            temp_doc = document.Document(filename)
+            temp_doc.parse(raw_text[lines[2 * i]:lines[2 * i + 1]])
+            documents.append(temp_doc)
+    return documents
+
+
+@instrumentation.timed("load corpus")
+def compile_line_corpus() -> corpus.LineCorpus:
+    """
+    Memory-mapped equivalent of compile_corpus(extract_corpus_files()). The file within the singular 
+    corpus directory is opened as a LineCorpus, which only indexes the offsets of its lines and parses 
+    each line into a Document when it is accessed. Returns False if there is no file of type '.txt'.
+
+    Intended Usage:
+    \tcorpus = compile_line_corpus()
+    """
+    path = singular_corpus_file()
+    if path is False:
         return False
+    print("\nIndexing lines of '{path}'...".format(path=path))
+    return corpus.LineCorpus(path)
+
+
+def stream_corpus_documents():
+    """
+    Generator equivalent of compile_corpus_documents() and extract_corpus_files(), selected by 
+    CorpusUseSingular. Documents are yielded one at a time in the same order and with the same 
+    filenames, so the corpus is never held in memory as a whole. Files in the corpus directory are 
+    read and parsed by a pool of StreamThreads threads, with at most StreamQueueSize documents 
+    waiting to be consumed at any time.
+
+    Intended Usage:
+    \tbatch_results, num_documents = stream_detect(stream_corpus_documents(), plagiarized_documents)
+    """
+    if CORPUS_USE_SINGULAR:
+        path = singular_corpus_file()
+        if path is False:
+            return
+        i = 0
+        with open(path, 'r') as f:
+            for line in f:
+                paragraphs = document.split_paragraphs(line)
+                for j in range(0, len(paragraphs), 2):
+                    doc = document.Document("input{x}.txt".format(x=i))
+                    doc.parse(line[paragraphs[j]:paragraphs[j + 1]])
+                    i += 1
+                    yield doc
+        return
+
+    def read(file):
+        with open(os.path.join(CORPUS_DIR, file), 'r') as f:
+            doc = document.Document(file)
+            doc.parse(f.read())
+            return doc
+
+    with ThreadPoolExecutor(max_workers=STREAM_THREADS) as executor:
+        pending = deque()
+        for file in os.listdir(CORPUS_DIR):
+            if file.lower().endswith(".txt"):
+                if len(pending) >= STREAM_QUEUE_SIZE:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(read, file))
+            else:
+                print("An invalid file was found and will be ignored: '{file}'".format(file=file))
+        while pending:
+            yield pending.popleft().result()
 
 
+@instrumentation.timed("compile corpus")
 def compile_corpus(documents: list) -> corpus.Corpus:
     """
     Compiles a list of Document objects into a Corpus. When this function is called, 
@@ -123,156 +274,713 @@ def compile_corpus(documents: list) -> corpus.Corpus:
     return corp
 
 
-def KMP_wrapper(corpus: corpus.Corpus, plagiarized: document.Document, results: results.Results):
+@instrumentation.timed("update_corpus")
+def update_corpus(corpus: corpus.Corpus, fingerprint_index: winnowing.FingerprintIndex, manifest: corpusmanifest.CorpusManifest, lsh_index: minhash.LSHIndex = None) -> tuple:
     """
-    Wrapper function to run KMP against a corpus of documents.
-    """
-    for i, corp_doc in enumerate(corpus.documents):
-        total_hit_rate = 0
-        if VERBOSE: print()
-        print("KMPSearch() starting...\n---> Potentially plagiarized input: '{plag}'\n---> Corpus document: '{corp}' (document {x} of {x_len})\n".format(plag=plagiarized.filename, corp=corp_doc, x=(i + 1), x_len=len(corpus.documents)))
-        for pattern in plagiarized.sentences:
-            total_hit_rate += kmp.KMPSearch(pattern, corpus.documents[corp_doc].raw_text)
-            if pattern is plagiarized.sentences[len(plagiarized.sentences) - 1]:
-                if VERBOSE:
-                    if total_hit_rate == 0:
-                        print("No pattern matches found.")
-                    print("\n------------------------------------------------------------")
-                    print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc, rate=total_hit_rate))
-                    hit_rate_analysis(total_hit_rate)
-                    print("------------------------------------------------------------")
-                results.add(corpus.documents[corp_doc], total_hit_rate)
+    Brings a Corpus of the documents in CorpusDirectoryMultiple, and its FingerprintIndex and LSHIndex 
+    if they are given, up to date with the directory without compiling it again. Only files whose size 
+    or modification time differ from the manifest, or that are not in the corpus yet, are read, and 
+    only those whose content also changed or that are not in the corpus are parsed and indexed again. 
+    New files are added, changed files replaced and deleted files removed, after which the manifest is 
+    saved. Returns the lists of filenames that were added, replaced and removed.
+
+    Intended Usage:
+    \tmanifest = corpusmanifest.CorpusManifest()
 
+    \tmanifest.load()
 
-def LCSS_wrapper(corpus: corpus.Corpus, plagiarized: document.Document, results: results.Results):
+    \tcorpus = corpus.Corpus()
+
+    \tupdate_corpus(corpus, fingerprint_index, manifest, lsh_index)
     """
-    Wrapper function to run LCSS against a corpus of documents.
+    cache = documentcache.DocumentCache() if USE_DOCUMENT_CACHE else None
+    candidates, removed = manifest.diff(corpus.documents)
+    added = []
+    replaced = []
+    for file in candidates:
+        path = os.path.join(CORPUS_DIR, file)
+        stat = os.stat(path)
+        if cache is not None:
+            doc = cache.load(path, file)
+            digest = hashlib.sha1(doc.raw_text.encode('utf-8')).hexdigest()
+        else:
+            with open(path, 'r') as f:
+                raw_text = f.read()
+            digest = hashlib.sha1(raw_text.encode('utf-8')).hexdigest()
+            if digest != manifest.digest(file) or file not in corpus.documents:
+                doc = document.Document(file)
+                doc.parse(raw_text)
+        if digest != manifest.digest(file) or file not in corpus.documents:
+            (replaced if file in corpus.documents else added).append(file)
+            corpus.replace_document(file, doc)
+            if fingerprint_index is not None:
+                fingerprint_index.replace_document(doc)
+            if lsh_index is not None:
+                lsh_index.replace_document(doc)
+        manifest.record(file, stat.st_size, stat.st_mtime_ns, digest)
+    for file in removed:
+        # A loaded manifest can record files that were deleted before the corpus was first read:
+        if file in corpus.documents:
+            corpus.remove_document(file)
+            if fingerprint_index is not None:
+                fingerprint_index.remove_document(file)
+            if lsh_index is not None:
+                lsh_index.remove_document(file)
+        manifest.remove(file)
+    if cache is not None:
+        cache.evict()
+    manifest.save()
+    print("Corpus updated: {added} added, {replaced} replaced, {removed} removed, {unchanged} unchanged.".format(added=len(added), replaced=len(replaced), removed=len(removed), unchanged=len(corpus.documents) - len(added) - len(replaced)))
+    return added, replaced, removed
+
+
+@instrumentation.timed("parallel_wrapper")
+def parallel_wrapper(algorithm: str, name: str, corpus: corpus.Corpus, plagiarized: document.Document, results: results.Results):
     """
-    for i, corp_doc in enumerate(corpus.documents):
-        total_hit_rate = 0
-        if VERBOSE: print()
-        print("LCSS() starting...\n---> Potentially plagiarized input: '{plag}'\n---> Corpus document: '{corp}' (document {x} of {x_len})\n".format(plag=plagiarized.filename, corp=corp_doc, x=(i + 1), x_len=len(corpus.documents)))
-        for pattern in plagiarized.paragraphs:
-            total_hit_rate += lcss.LCSS(corpus.documents[corp_doc].raw_text, pattern)
-            if pattern is plagiarized.paragraphs[len(plagiarized.paragraphs) - 1]:
-                if VERBOSE:
-                    if total_hit_rate == 0:
-                        print("No pattern matches found.")
-                    print("\n------------------------------------------------------------")
-                    print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc, rate=total_hit_rate))
-                    hit_rate_analysis(total_hit_rate)
-                    print("------------------------------------------------------------")
-                results.add(corpus.documents[corp_doc], total_hit_rate)
+    Wrapper function to run an algorithm against a corpus of documents with a pool of WORKERS processes. 
+    The partial Results of the workers are merged into results, ordered by corpus document index. If the 
+    corpus has been placed in shared memory, the workers read the documents from shared_corpus. The hash 
+    collision counters of a RabinKarpSet are summed over the workers before being displayed.
+    """
+    print("{name}() starting on {workers} worker processes...\n---> Potentially plagiarized input: '{plag}'\n---> Corpus documents: {x_len}\n".format(name=name, workers=WORKERS, plag=plagiarized.filename, x_len=len(corpus.documents)))
+    patterns = parallel.pattern_set(algorithm, plagiarized)
+    worker_results = parallel.run(algorithm, corpus, plagiarized, WORKERS, shared_corpus, patterns)
+    if VERBOSE:
+        for corp_doc, total_hit_rate in worker_results.items():
+            print("\n------------------------------------------------------------")
+            print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc, rate=total_hit_rate))
+            hit_rate_analysis(total_hit_rate)
+            print("------------------------------------------------------------")
+    results.merge(worker_results)
+    if patterns is not None:
+        patterns.info()
+
+
+@instrumentation.timed("compile fingerprint index")
+def compile_fingerprint_index(corpus: corpus.Corpus) -> winnowing.FingerprintIndex:
+    """
+    Fingerprints every Document of a Corpus with winnowing and stores the fingerprints in a 
+    FingerprintIndex, which is returned to the function caller. The returned index can then be 
+    queried with any number of plagiarized documents by calling winnowing_wrapper().
 
+    Intended Usage:
+    \tindex = compile_fingerprint_index(corpus)
 
-def rabinkarp_wrapper(corpus: corpus.Corpus, plagiarized: document.Document, results: results.Results):
+    \twinnowing_wrapper(corpus, index, plagiarized, results)
     """
-    Wrapper function to run Rabin-Karp against a corpus of documents.
+    print("\nCompiling fingerprint index from corpus...")
+    index = winnowing.FingerprintIndex(WINNOWING_K, WINNOWING_W)
+    for corp_doc in corpus.documents:
+        index.add_document(corpus.documents[corp_doc])
+    index.info()
+    return index
+
+
+@instrumentation.timed("compile LSH index")
+def compile_lsh_index(corpus: corpus.Corpus) -> minhash.LSHIndex:
     """
-    for i, corp_doc in enumerate(corpus.documents):
-        total_hit_rate = 0
-        if VERBOSE: print()
-        print("RabinKarp() starting...\n---> Potentially plagiarized input: '{plag}'\n---> Corpus document: '{corp}' (document {x} of {x_len})\n".format(plag=plagiarized.filename, corp=corp_doc, x=(i + 1), x_len=len(corpus.documents)))
-        for pattern in plagiarized.sentences:
-            total_hit_rate += rabinkarp.RabinKarp(pattern, corpus.documents[corp_doc].raw_text)
-            if pattern is plagiarized.sentences[len(plagiarized.sentences) - 1]:
-                if VERBOSE:
-                    if total_hit_rate == 0:
-                        print("No pattern matches found.")
-                    print("\n------------------------------------------------------------")
-                    print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc, rate=total_hit_rate))
-                    hit_rate_analysis(total_hit_rate)
-                    print("------------------------------------------------------------")
-                results.add(corpus.documents[corp_doc], total_hit_rate)
+    Computes the MinHash signature of every Document of a Corpus and stores them in a banded LSHIndex, 
+    which is returned to the function caller. The returned index can then be used to pre-filter the 
+    corpus for any number of plagiarized documents by calling prefilter_corpus().
 
+    Intended Usage:
+    \tlsh_index = compile_lsh_index(corpus)
 
-def hit_rate_analysis(rate: int):
-    if rate > 20:
-        print("This document has an extremely high plagiarism threshhold and has been flagged for review.")
-    elif rate > 10:
-        print("It is possible this document is plagiarized, but further inspection is suggested.")
-    elif rate == 0:
-        print("This document is not plagiarized.")
-    else:
-        print("It is unlikely that this document is plagiarized.")
+    \tall_results = detect_plagiarism(corpus, plagiarized, lsh_index=lsh_index)
+    """
+    print("\nCompiling MinHash LSH index from corpus...")
+    index = minhash.LSHIndex(MINHASH_K, MINHASH_PERMUTATIONS, MINHASH_BANDS, MINHASH_FLOOR)
+    for corp_doc in corpus.documents:
+        index.add_document(corpus.documents[corp_doc])
+    index.info()
+    return index
 
 
-if __name__ == '__main__':
+@instrumentation.timed("prefilter_corpus")
+def prefilter_corpus(corp: corpus.Corpus, lsh_index: minhash.LSHIndex, plagiarized: document.Document) -> tuple:
+    """
+    Splits a corpus into the candidate documents whose estimated Jaccard similarity with the plagiarized 
+    document is at least MinHash_Floor, and the documents that are pruned. Returns both as Corpus 
+    objects holding the same Document objects, in corpus order.
+    """
+    similarities = lsh_index.query(plagiarized)
+    candidates = corp.subset(similarities.keys())
+    pruned = corp.subset({corp_doc for corp_doc in corp.documents if corp_doc not in similarities})
+    print("\nMinHash prefilter: {num} of {total} corpus document(s) are candidates for '{plag}' (pruning ratio {ratio:.2f}%).".format(num=len(candidates.documents), total=len(corp.documents), plag=plagiarized.filename, ratio=len(pruned.documents) / len(corp.documents) * 100 if len(corp.documents) != 0 else 0))
     if VERBOSE:
-        print("Verbose output enabled.")
+        for corp_doc in candidates.documents:
+            print("\t{file}: estimated Jaccard similarity {similarity:.3f}".format(file=corp_doc, similarity=similarities[corp_doc]))
+    return candidates, pruned
 
-    # Get the potentially plagiarized document:
-    plagiarized = compile_plag_document()
-    if plagiarized is False:
-        print("Application closing as there is no document to check for plagiarism. Please place a document of type '.txt' into directory '{dir}' and run the program again.".format(dir=os.path.join(PLAG_DIR)))
-        sys.exit()
-    else:
-        print("Valid document found: '{doc}'".format(doc=plagiarized.filename))
-        plagiarized.info()
 
-    # Use a singular document as input for the corpus (each individual line in the file is treated as a single document), or a set of individual documents:
-    if CORPUS_USE_SINGULAR:
-        # Get single input document to populate the corpus (CorpusDirectorySingular in config.ini):
-        documents = extract_corpus_files()
-        if documents is False:
-            print("Application closing as there is no document to construct a corpus. Please place a document of type '.txt' into directory '{dir}' and run the program again.".format(dir=os.path.join(CORPUS_DIR_SINGULAR)))
-            sys.exit()
-        else:
-            print("Valid set of documents created.")
-    else:
-        # Scan for multiple input documents to populate the corpus (CorpusDirectoryMultiple in config.ini):
-        documents = compile_corpus_documents()
-        if documents is False:
-            print("Application closing as there are no documents to construct a corpus. Please place documents of type '.txt' into directory '{dir}' and run the program again.".format(dir=os.path.join(CORPUS_DIR)))
-            sys.exit()
-        else:
-            print("Valid set of documents created.")
+def prefilter_report(candidate_results: dict, pruned_results: dict):
+    """
+    Outputs the recall of the MinHash prefilter for each algorithm: the share of corpus documents with 
+    a non-zero hit rate that were candidates, where pruned_results holds the Results of the same 
+    algorithms against the pruned documents.
+    """
+    print("\n-------------------- PREFILTER RECALL --------------------\n")
+    for algorithm, algorithm_results in candidate_results.items():
+        kept = algorithm_results.num_results - algorithm_results.sketch.zeros - len(algorithm_results.skipped)
+        missed = pruned_results[algorithm].num_results - pruned_results[algorithm].sketch.zeros - len(pruned_results[algorithm].skipped)
+        recall = kept / (kept + missed) * 100 if kept + missed != 0 else 100.0
+        print("{algorithm}: recall {recall:.2f}% ({kept} of {total} document(s) with hits were candidates)".format(algorithm=algorithm, recall=recall, kept=kept, total=kept + missed))
+    print()
 
-    # Construct the corpus from the found documents:
-    corpus = compile_corpus(documents)
-    if corpus is False:
-        print("Application closing as an error was encountered when compiling the corpus.")
-        sys.exit()
+
+@instrumentation.timed("KMP_wrapper")
+def KMP_wrapper(corpus: corpus.Corpus, plagiarized: document.Document, results: results.Results):
+    """
+    Wrapper function to run KMP against a corpus of documents. Each sentence is compiled once 
+    and reused against every corpus document. If TokenMode is enabled, sentences and corpus 
+    documents are compared as sequences of word tokens instead of characters.
+    """
+    if TOKEN_MODE:
+        sentences = [tokens.tolist() for tokens in plagiarized.sentence_tokens()]
+        patterns = [kmp.compile_tokens(sentence) for sentence in sentences]
+    else:
+        sentences = list(plagiarized.sentences)
+        patterns = [kmp.compile_pattern(sentence) for sentence in sentences]
+    match_records = results.matches = matches.Matches() if COLLECT_MATCHES else None
+    for i, corp_doc in enumerate(corpus.documents):
+        with instrumentation.stage("KMPSearch", corp_doc):
+            if VERBOSE: print()
+            print("KMPSearch() starting...\n---> Potentially plagiarized input: '{plag}'\n---> Corpus document: '{corp}' (document {x} of {x_len})\n".format(plag=plagiarized.filename, corp=corp_doc, x=(i + 1), x_len=len(corpus.documents)))
+            text = corpus.documents[corp_doc].tokens().tolist() if TOKEN_MODE else corpus.documents[corp_doc].raw_text
+            first_match = len(match_records) if VERBOSE else 0
+            total_hit_rate, status = triage.scan(patterns, lambda j, pattern: pattern.search(text, match_records, j, i), triage.sentence_bounds, sentences, text)
+            if VERBOSE:
+                match_records.report(corpus.keys, "Sentence", first_match)
+                if total_hit_rate == 0:
+                    print("No pattern matches found.")
+                print("\n------------------------------------------------------------")
+                print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc, rate=total_hit_rate))
+                hit_rate_analysis(total_hit_rate)
+                print("------------------------------------------------------------")
+            results.add(corp_doc, total_hit_rate, status=status)
+
+
+@instrumentation.timed("LCSS_wrapper")
+def LCSS_wrapper(corpus: corpus.Corpus, plagiarized: document.Document, results: results.Results):
+    """
+    Wrapper function to run LCSS against a corpus of documents. If LCSS_SuffixAutomaton is enabled, 
+    a suffix automaton of each corpus document is used in place of the LCSS() lookup table. It is 
+    built before the first paragraph is matched and released once every paragraph has been matched, 
+    so only one automaton is held at a time. If TokenMode is enabled, paragraphs and corpus documents 
+    are compared as sequences of word tokens with LCSSTokens() instead.
+    """
+    patterns = plagiarized.paragraph_tokens() if TOKEN_MODE else list(plagiarized.paragraphs)
+    match_records = results.matches = matches.Matches() if COLLECT_MATCHES else None
+    for i, corp_doc in enumerate(corpus.documents):
+        with instrumentation.stage("LCSS", corp_doc):
+            if VERBOSE: print()
+            print("LCSS() starting...\n---> Potentially plagiarized input: '{plag}'\n---> Corpus document: '{corp}' (document {x} of {x_len})\n".format(plag=plagiarized.filename, corp=corp_doc, x=(i + 1), x_len=len(corpus.documents)))
+            text = corpus.documents[corp_doc].tokens() if TOKEN_MODE else corpus.documents[corp_doc].raw_text
+            first_match = len(match_records) if VERBOSE else 0
+            automaton = None
+            def search(j, pattern):
+                nonlocal automaton
+                if TOKEN_MODE:
+                    return lcss.LCSSTokens(text, pattern, match_records, j, i)
+                if LCSS_SUFFIX_AUTOMATON:
+                    if automaton is None:
+                        automaton = suffixautomaton.SuffixAutomaton(text)
+                    return lcss.LCSSAutomaton(automaton, pattern, match_records, j, i)
+                return lcss.LCSS(text, pattern, match_records, j, i)
+            total_hit_rate, status = triage.scan(patterns, search, triage.paragraph_bounds, patterns, text)
+            if VERBOSE:
+                match_records.report(corpus.keys, "Paragraph", first_match)
+                if total_hit_rate == 0:
+                    print("No pattern matches found.")
+                print("\n------------------------------------------------------------")
+                print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc, rate=total_hit_rate))
+                hit_rate_analysis(total_hit_rate)
+                print("------------------------------------------------------------")
+            results.add(corp_doc, total_hit_rate, status=status)
+
+
+@instrumentation.timed("rabinkarp_wrapper")
+def rabinkarp_wrapper(corpus: corpus.Corpus, plagiarized: document.Document, results: results.Results):
+    """
+    Wrapper function to run Rabin-Karp against a corpus of documents. Each sentence is compiled 
+    once and reused against every corpus document. If TokenMode is enabled, sentences and corpus 
+    documents are compared as sequences of word tokens instead of characters.
+    """
+    if TOKEN_MODE:
+        sentences = [tokens.tolist() for tokens in plagiarized.sentence_tokens()]
+        patterns = [rabinkarp.compile_tokens(sentence) for sentence in sentences]
+    else:
+        sentences = list(plagiarized.sentences)
+        patterns = [rabinkarp.compile_pattern(sentence) for sentence in sentences]
+    match_records = results.matches = matches.Matches() if COLLECT_MATCHES else None
+    for i, corp_doc in enumerate(corpus.documents):
+        with instrumentation.stage("RabinKarp", corp_doc):
+            if VERBOSE: print()
+            print("RabinKarp() starting...\n---> Potentially plagiarized input: '{plag}'\n---> Corpus document: '{corp}' (document {x} of {x_len})\n".format(plag=plagiarized.filename, corp=corp_doc, x=(i + 1), x_len=len(corpus.documents)))
+            text = corpus.documents[corp_doc].tokens().tolist() if TOKEN_MODE else corpus.documents[corp_doc].raw_text
+            first_match = len(match_records) if VERBOSE else 0
+            total_hit_rate, status = triage.scan(patterns, lambda j, pattern: pattern.search(text, match_records, j, i), triage.sentence_bounds, sentences, text)
+            if VERBOSE:
+                match_records.report(corpus.keys, "Sentence", first_match)
+                if total_hit_rate == 0:
+                    print("No pattern matches found.")
+                print("\n------------------------------------------------------------")
+                print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc, rate=total_hit_rate))
+                hit_rate_analysis(total_hit_rate)
+                print("------------------------------------------------------------")
+            results.add(corp_doc, total_hit_rate, status=status)
+
+
+@instrumentation.timed("rabinkarp_multipattern_wrapper")
+def rabinkarp_multipattern_wrapper(corpus: corpus.Corpus, plagiarized: document.Document, results: results.Results):
+    """
+    Wrapper function to run multi-pattern Rabin-Karp against a corpus of documents. Sentences of the 
+    plagiarized document are grouped by length, so each corpus document is scanned once per distinct 
+    sentence length rather than once per sentence. Hash collision counters are displayed at the end. 
+    If RabinKarp_Numpy is enabled, RabinKarpNumpy hashes every window of a corpus document at once 
+    from the prefix hashes cached on the document.
+    """
+    if RABIN_KARP_NUMPY:
+        patterns = rabinkarp.RabinKarpNumpy(list(plagiarized.sentences))
     else:
-        print("A valid corpus has been created.")
-        corpus.info()
+        patterns = rabinkarp.RabinKarpSet(list(plagiarized.sentences))
+    name = type(patterns).__name__
+    match_records = results.matches = matches.Matches() if COLLECT_MATCHES else None
+    for i, corp_doc in enumerate(corpus.documents):
+        with instrumentation.stage(name, corp_doc):
+            if VERBOSE: print()
+            print("{name}() starting...\n---> Potentially plagiarized input: '{plag}'\n---> Corpus document: '{corp}' (document {x} of {x_len})\n".format(name=name, plag=plagiarized.filename, corp=corp_doc, x=(i + 1), x_len=len(corpus.documents)))
+            raw_text = corpus.documents[corp_doc].raw_text
+            first_match = len(match_records) if VERBOSE else 0
+            def search():
+                text = corpus.documents[corp_doc].prefix_hashes() if RABIN_KARP_NUMPY else raw_text
+                return sum(patterns.hit_rates(text, match_records, i))
+            total_hit_rate, status = triage.scan_once(search, patterns.patterns, raw_text)
+            if VERBOSE:
+                match_records.report(corpus.keys, "Sentence", first_match)
+                if total_hit_rate == 0:
+                    print("No pattern matches found.")
+                print("\n------------------------------------------------------------")
+                print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc, rate=total_hit_rate))
+                hit_rate_analysis(total_hit_rate)
+                print("------------------------------------------------------------")
+            results.add(corp_doc, total_hit_rate, status=status)
+    patterns.info()
+
+
+@instrumentation.timed("ahocorasick_wrapper")
+def ahocorasick_wrapper(corpus: corpus.Corpus, plagiarized: document.Document, results: results.Results):
+    """
+    Wrapper function to run Aho-Corasick against a corpus of documents. A single automaton is built 
+    from every sentence of the plagiarized document, so each corpus document is only scanned once.
+    """
+    automaton = ahocorasick.AhoCorasick(list(plagiarized.sentences))
+    match_records = results.matches = matches.Matches() if COLLECT_MATCHES else None
+    for i, corp_doc in enumerate(corpus.documents):
+        with instrumentation.stage("AhoCorasick", corp_doc):
+            if VERBOSE: print()
+            print("AhoCorasick() starting...\n---> Potentially plagiarized input: '{plag}'\n---> Corpus document: '{corp}' (document {x} of {x_len})\n".format(plag=plagiarized.filename, corp=corp_doc, x=(i + 1), x_len=len(corpus.documents)))
+            raw_text = corpus.documents[corp_doc].raw_text
+            first_match = len(match_records) if VERBOSE else 0
+            total_hit_rate, status = triage.scan_once(lambda: sum(automaton.hit_rates(raw_text, match_records, i)), automaton.patterns, raw_text)
+            if VERBOSE:
+                match_records.report(corpus.keys, "Sentence", first_match)
+                if total_hit_rate == 0:
+                    print("No pattern matches found.")
+                print("\n------------------------------------------------------------")
+                print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc, rate=total_hit_rate))
+                hit_rate_analysis(total_hit_rate)
+                print("------------------------------------------------------------")
+            results.add(corp_doc, total_hit_rate, status=status)
+
+
+@instrumentation.timed("ahocorasick_batch_wrapper")
+def ahocorasick_batch_wrapper(corpus: corpus.Corpus, plagiarized_documents: list) -> list:
+    """
+    Wrapper function to run Aho-Corasick for several plagiarized documents at once. A single automaton 
+    is built from the sentences of every plagiarized document, so each corpus document is scanned once 
+    for the whole batch. The corpus is split between WORKERS processes when there is more than one. 
+    Returns a list with one Results object per plagiarized document.
+    """
+    if WORKERS > 1:
+        print("AhoCorasick() starting on {workers} worker processes...\n---> Potentially plagiarized inputs: {plag} document(s)\n---> Corpus documents: {x_len}\n".format(workers=WORKERS, plag=len(plagiarized_documents), x_len=len(corpus.documents)))
+        return parallel.run_batch(corpus, plagiarized_documents, WORKERS, shared_corpus)
+    score = parallel.batch_scorer(plagiarized_documents)
+    all_results = [results.Results() for plagiarized in plagiarized_documents]
+    for i, corp_doc in enumerate(corpus.documents):
+        with instrumentation.stage("AhoCorasick", corp_doc):
+            print("AhoCorasick() starting...\n---> Potentially plagiarized inputs: {plag} document(s)\n---> Corpus document: '{corp}' (document {x} of {x_len})\n".format(plag=len(plagiarized_documents), corp=corp_doc, x=(i + 1), x_len=len(corpus.documents)))
+            totals = score(corpus.documents[corp_doc].raw_text)
+            for total, plagiarized_results in zip(totals, all_results):
+                plagiarized_results.add(corp_doc, total)
+    return all_results
+
+
+@instrumentation.timed("winnowing_wrapper")
+def winnowing_wrapper(corpus: corpus.Corpus, index: winnowing.FingerprintIndex, plagiarized: document.Document, results: results.Results):
+    """
+    Wrapper function to score a plagiarized document against a fingerprint index of the corpus. The 
+    fingerprints of the plagiarized document are looked up once, and every corpus document is then 
+    added to the results with the share of those fingerprints it contains.
+    """
+    print("Winnowing() starting...\n---> Potentially plagiarized input: '{plag}'\n---> Fingerprint index of {x_len} corpus document(s)\n".format(plag=plagiarized.filename, x_len=len(corpus.documents)))
+    hit_rates = index.query(plagiarized)
+    for corp_doc in corpus.documents:
+        total_hit_rate = hit_rates.get(corp_doc, 0)
+        if VERBOSE and total_hit_rate != 0:
+            print("\n------------------------------------------------------------")
+            print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc, rate=total_hit_rate))
+            hit_rate_analysis(total_hit_rate)
+            print("------------------------------------------------------------")
+        results.add(corp_doc, total_hit_rate)
+
+
+def detect_plagiarism(corpus: corpus.Corpus, plagiarized: document.Document, fingerprint_index: winnowing.FingerprintIndex = None, ahocorasick_results: results.Results = None, lsh_index: minhash.LSHIndex = None) -> dict:
+    """
+    Runs every algorithm enabled in 'config.ini' against a corpus of documents for one plagiarized 
+    document. Returns a dictionary mapping the name of each enabled algorithm to its Results object. 
+    If ahocorasick_results is given, those Results are used instead of running Aho-Corasick again. 
+    If lsh_index is given, the algorithms only run against the candidate documents of the MinHash 
+    prefilter, and with MinHash_MeasureRecall the pruned documents are also scored, without output, 
+    to report the recall.
+    """
+    if lsh_index is not None:
+        candidates, pruned = prefilter_corpus(corpus, lsh_index, plagiarized)
+        all_results = detect_plagiarism(candidates, plagiarized, fingerprint_index, ahocorasick_results)
+        if MINHASH_MEASURE_RECALL:
+            print("\nMeasuring prefilter recall against {num} pruned document(s)...".format(num=len(pruned.documents)))
+            pruned_documents = (pruned.documents[corp_doc] for corp_doc in pruned.documents)
+            pruned_results = score_documents(pruned_documents, [plagiarized], enabled_algorithms(), "prefilter recall", verbose=False)[0][0]
+            prefilter_report(all_results, pruned_results)
+        return all_results
+
+    all_results = {}
 
     # Conduct KMPSearch on each sentence in the plagiarized document against the raw text of all corpus documents:
     if ENABLE_KMP:
         kmp_results = results.Results()
-        KMP_wrapper(corpus, plagiarized, kmp_results)
+        all_results["KMPSearch"] = kmp_results
+        if WORKERS > 1:
+            parallel_wrapper('kmp', "KMPSearch", corpus, plagiarized, kmp_results)
+        else:
+            KMP_wrapper(corpus, plagiarized, kmp_results)
     else:
         print("\nWARNING: KMPSearch() has been disabled for plagiarism detection.")
 
     # Conduct LCSS on the each paragraph of the plagiarized document against the raw text of all corpus documents:
     if ENABLE_LCSS:
         lcss_results = results.Results()
-        LCSS_wrapper(corpus, plagiarized, lcss_results)
+        all_results["LCSS"] = lcss_results
+        if WORKERS > 1:
+            parallel_wrapper('lcss', "LCSS", corpus, plagiarized, lcss_results)
+        else:
+            LCSS_wrapper(corpus, plagiarized, lcss_results)
     else:
         print("WARNING: LCSS() has been disabled for plagiarism detection.")
 
     if ENABLE_RABIN_KARP:
         rabinkarp_results = results.Results()
-        rabinkarp_wrapper(corpus, plagiarized, rabinkarp_results)
+        all_results["RabinKarp"] = rabinkarp_results
+        if WORKERS > 1:
+            parallel_wrapper('rabinkarp', "RabinKarp", corpus, plagiarized, rabinkarp_results)
+        elif RABIN_KARP_MULTIPATTERN or RABIN_KARP_NUMPY:
+            rabinkarp_multipattern_wrapper(corpus, plagiarized, rabinkarp_results)
+        else:
+            rabinkarp_wrapper(corpus, plagiarized, rabinkarp_results)
+    else:
+        print("WARNING: RabinKarp() has been disabled for plagiarism detection.")
+
+    # Conduct Aho-Corasick on all sentences of the plagiarized document at once against the raw text of all corpus documents:
+    if ENABLE_AHO_CORASICK and ahocorasick_results is not None:
+        all_results["AhoCorasick"] = ahocorasick_results
+    elif ENABLE_AHO_CORASICK:
+        ahocorasick_results = results.Results()
+        all_results["AhoCorasick"] = ahocorasick_results
+        if WORKERS > 1:
+            parallel_wrapper('ahocorasick', "AhoCorasick", corpus, plagiarized, ahocorasick_results)
+        else:
+            ahocorasick_wrapper(corpus, plagiarized, ahocorasick_results)
     else:
-        print("WARNING: RabinKarp() has been disabled for plagiarism detection.\n")
+        print("WARNING: AhoCorasick() has been disabled for plagiarism detection.")
+
+    # Look up the winnowed fingerprints of the plagiarized document in a fingerprint index of all corpus documents:
+    if ENABLE_WINNOWING:
+        winnowing_results = results.Results()
+        all_results["Winnowing"] = winnowing_results
+        winnowing_wrapper(corpus, fingerprint_index, plagiarized, winnowing_results)
+    else:
+        print("WARNING: Winnowing() has been disabled for plagiarism detection.\n")
+    return all_results
+
+
+def enabled_algorithms() -> list:
+    """Returns the (algorithm, name) of every algorithm enabled in 'config.ini', as accepted by parallel.scorer()."""
+    return [(algorithm, name) for algorithm, name, enabled in [('kmp', "KMPSearch", ENABLE_KMP), ('lcss', "LCSS", ENABLE_LCSS),
+            ('rabinkarp', "RabinKarp", ENABLE_RABIN_KARP), ('ahocorasick', "AhoCorasick", ENABLE_AHO_CORASICK),
+            ('winnowing', "Winnowing", ENABLE_WINNOWING)] if enabled]
+
+
+def score_documents(documents, plagiarized_documents: list, algorithms: list, stage: str, candidates: list = None, top_k: int = results.RESULTS_TOP_K, keep_scores: bool = results.RESULTS_KEEP_SCORES, verbose: bool = VERBOSE) -> tuple:
+    """
+    Visits each corpus document of an iterable once and scores it with every algorithm in algorithms, 
+    as returned by enabled_algorithms(), for every plagiarized document before moving on to the next. 
+    The patterns of each plagiarized document are preprocessed once, and the preprocessing of a corpus 
+    document that the algorithms share is only done once per visit and released afterwards. Each visit 
+    is timed under stage. If candidates is given, it holds the set of corpus document filenames to 
+    score for each plagiarized document. The Results are created with top_k and keep_scores, and the 
+    hit rate of every document is only printed if verbose is set. Returns a list with one dictionary of 
+    Results per plagiarized document, along with the number of corpus documents that were visited.
+    """
+    scorers = [[parallel.document_scorer(algorithm, plagiarized) for algorithm, name in algorithms] for plagiarized in plagiarized_documents]
+    batch_results = [{name: results.Results(top_k, keep_scores) for algorithm, name in algorithms} for plagiarized in plagiarized_documents]
+    if candidates is None:
+        candidates = [None] * len(plagiarized_documents)
+    num_documents = 0
+    for corp_doc in documents:
+        num_documents += 1
+        with instrumentation.stage(stage, corp_doc.filename):
+            for plagiarized, plagiarized_scorers, all_results, plagiarized_candidates in zip(plagiarized_documents, scorers, batch_results, candidates):
+                if plagiarized_candidates is not None and corp_doc.filename not in plagiarized_candidates:
+                    continue
+                for score, algorithm_results in zip(plagiarized_scorers, all_results.values()):
+                    total_hit_rate = score(corp_doc)
+                    if verbose:
+                        print("\n------------------------------------------------------------")
+                        print("Total plagiarism hit rate of '{plag_doc}' in '{corp_doc}': {rate:.2f}%".format(plag_doc=plagiarized.filename, corp_doc=corp_doc.filename, rate=total_hit_rate))
+                        hit_rate_analysis(total_hit_rate)
+                        print("------------------------------------------------------------")
+                    algorithm_results.add(corp_doc.filename, total_hit_rate)
+        corp_doc.release_caches()
+    return batch_results, num_documents
+
+
+@instrumentation.timed("stream_detect")
+def stream_detect(documents, plagiarized_documents: list) -> tuple:
+    """
+    Runs every algorithm enabled in 'config.ini' against a stream of corpus documents for one or more 
+    plagiarized documents. Each corpus document is scored by every algorithm as soon as it arrives and 
+    then discarded. The Results only keep the extremes, the StreamTopK documents with the highest hit 
+    rates and a QuantileSketch, so nothing is kept per corpus document. Returns a list with one 
+    dictionary of Results per plagiarized document, as returned by detect_plagiarism(), along with the 
+    number of corpus documents that were checked.
+    """
+    algorithms = enabled_algorithms()
+    print("\nStreaming corpus documents through {num} algorithm(s)...".format(num=len(algorithms)))
+    batch_results, num_documents = score_documents(documents, plagiarized_documents, algorithms, "stream", top_k=STREAM_TOP_K, keep_scores=False)
+    print("Streamed {num} corpus document(s).\n".format(num=num_documents))
+    return batch_results, num_documents
+
+
+@instrumentation.timed("single_pass_detect")
+def single_pass_detect(corpus: corpus.Corpus, plagiarized_documents: list, fingerprint_index: winnowing.FingerprintIndex = None, lsh_index: minhash.LSHIndex = None) -> list:
+    """
+    Runs every algorithm enabled in 'config.ini' against a corpus of documents for one or more 
+    plagiarized documents in a single traversal of the corpus, instead of one traversal per algorithm 
+    and plagiarized document. Each corpus document is visited once and scored by every algorithm for 
+    every plagiarized document, so its token array, prefix hashes and suffix automaton are computed 
+    once for all of them. Winnowing is looked up in fingerprint_index when it is given. If lsh_index 
+    is given, each plagiarized document is only scored against its MinHash prefilter candidates. 
+    Returns a list with one dictionary of Results per plagiarized document, as returned by 
+    detect_plagiarism().
 
-    if ENABLE_KMP or ENABLE_LCSS or ENABLE_RABIN_KARP:
-        if VERBOSE:
-            print("Plagiarism detection on document '{doc}' against {corpus} was successfully completed.".format(doc=plagiarized.filename,corpus=corpus.keys))
+    Intended Usage:
+    \tbatch_results = single_pass_detect(corpus, plagiarized_documents, fingerprint_index)
+    """
+    algorithms = [(algorithm, name) for algorithm, name in enabled_algorithms() if algorithm != 'winnowing' or fingerprint_index is None]
+    if lsh_index is not None:
+        candidate_corpora = [prefilter_corpus(corpus, lsh_index, plagiarized)[0] for plagiarized in plagiarized_documents]
+        candidates = [set(candidate_corpus.documents) for candidate_corpus in candidate_corpora]
+    else:
+        candidate_corpora = [corpus] * len(plagiarized_documents)
+        candidates = None
+    print("\nScanning {num} corpus document(s) once with {algorithms} algorithm(s) for {plag} plagiarized document(s)...".format(num=len(corpus.documents), algorithms=len(algorithms), plag=len(plagiarized_documents)))
+    batch_results = score_documents((corpus.documents[corp_doc] for corp_doc in corpus.documents), plagiarized_documents, algorithms, "single_pass", candidates)[0]
+    if ENABLE_WINNOWING and fingerprint_index is not None:
+        for plagiarized, all_results, candidate_corpus in zip(plagiarized_documents, batch_results, candidate_corpora):
+            winnowing_results = results.Results()
+            all_results["Winnowing"] = winnowing_results
+            winnowing_wrapper(candidate_corpus, fingerprint_index, plagiarized, winnowing_results)
+    return batch_results
+
+
+def display_results(num_documents: int, plagiarized: document.Document, all_results: dict, corpus_keys: list = None, prefiltered: bool = False):
+    """
+    Outputs the results summary of every algorithm returned by detect_plagiarism(), stream_detect() 
+    or single_pass_detect(), where num_documents is the number of corpus documents that were checked. 
+    In VerboseMode, their filenames are listed if corpus_keys is given. If prefiltered, the number of 
+    MinHash prefilter candidates that were actually scored is shown as well.
+    """
+    if len(all_results) != 0:
+        # Every algorithm scored the same candidates, so any of the Results counts them:
+        candidates = " ({num} candidate(s))".format(num=next(iter(all_results.values())).num_results) if prefiltered else ""
+        if VERBOSE and corpus_keys is not None:
+            print("Plagiarism detection on document '{doc}' against {corpus}{candidates} was successfully completed.".format(doc=plagiarized.filename,corpus=corpus_keys,candidates=candidates))
         else:
-            print("Plagiarism detection on document '{doc}' against {size} corpus documents was successfully completed.".format(doc=plagiarized.filename,size=len(corpus.documents)))
+            print("Plagiarism detection on document '{doc}' against {size} corpus documents{candidates} was successfully completed.".format(doc=plagiarized.filename,size=num_documents,candidates=candidates))
         print("\n-------------------- RESULTS SUMMARY --------------------\n")
 
-    if ENABLE_KMP:
-        print("*** Results for KMPSearch algorithm:")
-        kmp_results.display()
-        print()
-    if ENABLE_LCSS:
-        print("*** Results for LCSS algorithm:")
-        lcss_results.display()
+    for algorithm, algorithm_results in all_results.items():
+        print("*** Results for {algorithm} algorithm:".format(algorithm=algorithm))
+        algorithm_results.display()
         print()
-    if ENABLE_RABIN_KARP:
-        print("*** Results for RabinKarp algorithm:")
-        rabinkarp_results.display()
-        print()
\ No newline at end of file
+
+
+def display_batch_summary(plagiarized_documents: list, batch_results: list):
+    """
+    Outputs a combined summary of a batch run, listing the highest hit rate and associated corpus 
+    document of every algorithm for each plagiarized document.
+    """
+    print("\n-------------------- BATCH SUMMARY --------------------\n")
+    print("Checked {num} potentially plagiarized document(s).".format(num=len(plagiarized_documents)))
+    for plagiarized, all_results in zip(plagiarized_documents, batch_results):
+        print("\n*** {doc}:".format(doc=plagiarized.filename))
+        for algorithm, algorithm_results in all_results.items():
+            flagged = " ({num} flagged)".format(num=len(algorithm_results.flagged)) if len(algorithm_results.flagged) != 0 else ""
+            if algorithm_results.highest_doc is None or algorithm_results.highest_hit == 0:
+                print("\t{algorithm}: no hits{flagged}".format(algorithm=algorithm, flagged=flagged))
+            else:
+                print("\t{algorithm}: {hits:.2f}% in '{file}'{flagged}".format(algorithm=algorithm, hits=algorithm_results.highest_hit, file=algorithm_results.highest_doc, flagged=flagged))
+
+
+def hit_rate_analysis(rate: int):
+    if rate > triage.FLAG_THRESHOLD:
+        print("This document has an extremely high plagiarism threshhold and has been flagged for review.")
+    elif rate > 10:
+        print("It is possible this document is plagiarized, but further inspection is suggested.")
+    elif rate == 0:
+        print("This document is not plagiarized.")
+    else:
+        print("It is unlikely that this document is plagiarized.")
+
+
+def load_corpus() -> tuple:
+    """
+    Loads the corpus selected in 'config.ini', from CorpusIndexFile when UseCorpusIndex is enabled, or 
+    else from CorpusDirectorySingular or CorpusDirectoryMultiple. Returns the Corpus along with its 
+    winnowing FingerprintIndex, which is None unless Enable_Winnowing is enabled, or (False, None) if 
+    no corpus could be loaded.
+    """
+    fingerprint_index = None
+    if USE_CORPUS_INDEX and os.path.exists(CORPUS_INDEX_FILE):
+        # Open the prebuilt corpus index instead of reading and parsing the corpus (CorpusIndexFile in config.ini):
+        index = corpusindex.CorpusIndex(CORPUS_INDEX_FILE)
+        corp = index.compile_corpus()
+        fingerprint_index = index.fingerprint_index(WINNOWING_K, WINNOWING_W)
+        print("A valid corpus has been loaded.")
+        corp.info()
+        if ENABLE_WINNOWING and fingerprint_index is not None:
+            fingerprint_index.info()
+    else:
+        if USE_CORPUS_INDEX:
+            print("\nWARNING: Corpus index '{file}' was not found, so the corpus will be compiled from its documents. Run 'corpusindex.py' to build it.".format(file=CORPUS_INDEX_FILE))
+        # Use a singular document as input for the corpus (each individual line in the file is treated as a single document), or a set of individual documents:
+        if CORPUS_USE_SINGULAR:
+            # Memory-map the single input document and index its lines to populate the corpus (CorpusDirectorySingular in config.ini):
+            corp = compile_line_corpus()
+            if corp is False:
+                print("Application closing as there is no document to construct a corpus. Please place a document of type '.txt' into directory '{dir}' and run the program again.".format(dir=os.path.join(CORPUS_DIR_SINGULAR)))
+                return False, None
+            else:
+                print("A valid corpus has been created.")
+                corp.info()
+        else:
+            # Scan for multiple input documents to populate the corpus (CorpusDirectoryMultiple in config.ini):
+            documents = compile_corpus_documents()
+            if documents is False:
+                print("Application closing as there are no documents to construct a corpus. Please place documents of type '.txt' into directory '{dir}' and run the program again.".format(dir=os.path.join(CORPUS_DIR)))
+                return False, None
+            else:
+                print("Valid set of documents created.")
+
+            # Construct the corpus from the found documents:
+            corp = compile_corpus(documents)
+            if corp is False:
+                print("Application closing as an error was encountered when compiling the corpus.")
+                return False, None
+            else:
+                print("A valid corpus has been created.")
+                corp.info()
+
+    if ENABLE_WINNOWING and fingerprint_index is None:
+        fingerprint_index = compile_fingerprint_index(corp)
+    return corp, fingerprint_index
+
+
+if __name__ == '__main__':
+    if VERBOSE:
+        print("Verbose output enabled.")
+
+    if triage.EARLY_TERMINATION and (WORKERS > 1 or STREAM_CORPUS or SINGLE_PASS):
+        print("\nWARNING: EarlyTermination is ignored when Workers is greater than 1 and in StreamCorpus and SinglePass modes, so every corpus document is scanned to the end.")
+
+    if BATCH_MODE:
+        # Get every potentially plagiarized document (PlagiarizedDirectory in config.ini):
+        plagiarized_documents = compile_plag_documents()
+        if plagiarized_documents is False:
+            print("Application closing as there are no documents to check for plagiarism. Please place documents of type '.txt' into directory '{dir}' and run the program again.".format(dir=os.path.join(PLAG_DIR)))
+            sys.exit()
+        else:
+            print("Valid documents found: {num}".format(num=len(plagiarized_documents)))
+            for plagiarized in plagiarized_documents:
+                plagiarized.info()
+    else:
+        # Get the potentially plagiarized document:
+        plagiarized = compile_plag_document()
+        if plagiarized is False:
+            print("Application closing as there is no document to check for plagiarism. Please place a document of type '.txt' into directory '{dir}' and run the program again.".format(dir=os.path.join(PLAG_DIR)))
+            sys.exit()
+        else:
+            print("Valid document found: '{doc}'".format(doc=plagiarized.filename))
+            plagiarized.info()
+
+    if STREAM_CORPUS:
+        # Score corpus documents as they are read instead of compiling the whole corpus first (StreamCorpus in config.ini):
+        if not BATCH_MODE:
+            plagiarized_documents = [plagiarized]
+        batch_results, num_documents = stream_detect(stream_corpus_documents(), plagiarized_documents)
+        for plagiarized, all_results in zip(plagiarized_documents, batch_results):
+            display_results(num_documents, plagiarized, all_results)
+        if BATCH_MODE:
+            display_batch_summary(plagiarized_documents, batch_results)
+    else:
+        corpus, fingerprint_index = load_corpus()
+        if corpus is False:
+            sys.exit()
+        # Only scan the corpus documents that are similar enough to each plagiarized document (MinHash_Prefilter in config.ini):
+        lsh_index = compile_lsh_index(corpus) if MINHASH_PREFILTER else None
+        # Place the corpus in shared memory once for every worker process to read (SharedMemoryCorpus in config.ini):
+        if SHARED_MEMORY_CORPUS and WORKERS > 1:
+            shared_corpus = sharedcorpus.SharedCorpus.create(corpus)
+            shared_corpus.info()
+
+        # Free the shared memory segment however detection ends:
+        try:
+            if SINGLE_PASS:
+                # Visit each corpus document once for every enabled algorithm and plagiarized document (SinglePass in config.ini):
+                if not BATCH_MODE:
+                    plagiarized_documents = [plagiarized]
+                batch_results = single_pass_detect(corpus, plagiarized_documents, fingerprint_index, lsh_index)
+                for plagiarized, all_results in zip(plagiarized_documents, batch_results):
+                    display_results(len(corpus.keys), plagiarized, all_results, corpus.keys, lsh_index is not None)
+                if BATCH_MODE:
+                    display_batch_summary(plagiarized_documents, batch_results)
+            elif BATCH_MODE:
+                # Scan each corpus document once for the sentences of every plagiarized document:
+                if ENABLE_AHO_CORASICK and lsh_index is None:
+                    ahocorasick_batch_results = ahocorasick_batch_wrapper(corpus, plagiarized_documents)
+                else:
+                    ahocorasick_batch_results = [None] * len(plagiarized_documents)
+                batch_results = []
+                for plagiarized, ahocorasick_results in zip(plagiarized_documents, ahocorasick_batch_results):
+                    all_results = detect_plagiarism(corpus, plagiarized, fingerprint_index, ahocorasick_results, lsh_index)
+                    display_results(len(corpus.keys), plagiarized, all_results, corpus.keys, lsh_index is not None)
+                    batch_results.append(all_results)
+                display_batch_summary(plagiarized_documents, batch_results)
+            else:
+                all_results = detect_plagiarism(corpus, plagiarized, fingerprint_index, lsh_index=lsh_index)
+                display_results(len(corpus.keys), plagiarized, all_results, corpus.keys, lsh_index is not None)
+        finally:
+            if shared_corpus is not None:
+                shared_corpus.unlink()
+
+    instrumentation.write()
@@ -1,4 +1,10 @@
 import configparser
+from array import array
+
+import numpy as np
+
+import instrumentation
+import matches
 
 
 config = configparser.ConfigParser()
@@ -7,52 +13,462 @@ VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
 ANALYSIS_LCSS = config.getboolean('ANALYSIS', 'RuntimeAnalysis_RabinKarp')
 
 
-def RabinKarp(pattern: str, string: str) -> float:
-    n = len(string)
-    m = len(pattern)
+class RabinKarpPattern:
+    """
+    Pattern compiled for RabinKarp(). The hash of the pattern and the value of h used to remove 
+    the leading character of a rolling window are computed once when the object is created, so 
+    the same pattern can be searched for in any number of strings without repeating the preprocessing.
+
+    __init__(pattern: str)
+
+    Methods:
+    \tfind(), search().
+    """
     d = 256
     q = 101
-    hash_p = 0
-    hash_t = 0
-    h = 1
-
-    if m > n:
-        print("Invalid pattern length: pattern is longer than string; aborting RabinKarp.")
-        return 0
-
-    total_matches = 0
-
-    for i in range(m - 1):
-        h = (h * d) % q
-
-    for i in range(m):
-        hash_p = (d * hash_p + ord(pattern[i])) % q
-        hash_t = (d * hash_t + ord(string[i])) % q
-
-    # print("Hash_P: {hash}".format(hash=hash_p))
-    # print("Hash_T: {hash}".format(hash=hash_t))
-
-    for i in range(n - m + 1):
-        if hash_p == hash_t:
-            # print("TEST")
-            for j in range(m):
-                if string[i + j] != pattern[j]:
-                    break
-                else:
-                    j += 1
-            if j == m:
-                if VERBOSE: print("Pattern found at position {x}.".format(x=i))
-                total_matches += 1
-        if i < (n - m):
-            hash_t = (d*(hash_t - ord(string[i])*h) + ord(string[i + m])) % q
-            if hash_t < 0:
-                hash_t = hash_t + q
-    hit_rate = (total_matches * m) / n * 100
-    if total_matches != 0:
-        if VERBOSE:
-            print("Pattern was found in string {matches} time(s).".format(matches=total_matches))
-            print("There is a {:.2f}% hit rate of the pattern in string.".format(hit_rate))
-    return hit_rate
+
+    def __init__(self, pattern: str):
+        d = self.d
+        q = self.q
+        m = len(pattern)
+        self.pattern = pattern
+        self.h = 1
+        self.hash_p = 0
+
+        for i in range(m - 1):
+            self.h = (self.h * d) % q
+
+        for i in range(m):
+            self.hash_p = (d * self.hash_p + ord(pattern[i])) % q
+
+    def find(self, string: str, counting: bool = instrumentation.INSTRUMENTATION_COUNTERS) -> array:
+        """
+        Returns the start index of every occurrence of the pattern in the string, including overlapping 
+        ones. If counting is True, which it is when InstrumentationCounters is enabled, the windows 
+        hashed, hash hits, true matches and spurious hits are added to the 'rabinkarp.*' counters.
+        """
+        pattern = self.pattern
+        n = len(string)
+        m = len(pattern)
+        d = self.d
+        q = self.q
+        h = self.h
+        hash_p = self.hash_p
+        hash_t = 0
+        positions = array('I')
+        hash_hits = 0
+
+        if m > n:
+            return positions
+
+        for i in range(m):
+            hash_t = (d * hash_t + ord(string[i])) % q
+
+        # print("Hash_P: {hash}".format(hash=hash_p))
+        # print("Hash_T: {hash}".format(hash=hash_t))
+
+        for i in range(n - m + 1):
+            if hash_p == hash_t:
+                # print("TEST")
+                hash_hits += 1
+                for j in range(m):
+                    if string[i + j] != pattern[j]:
+                        break
+                    else:
+                        j += 1
+                if j == m:
+                    positions.append(i)
+            if i < (n - m):
+                hash_t = (d*(hash_t - ord(string[i])*h) + ord(string[i + m])) % q
+                if hash_t < 0:
+                    hash_t = hash_t + q
+        if counting:
+            instrumentation.count('rabinkarp.windows', n - m + 1)
+            instrumentation.count('rabinkarp.hash_hits', hash_hits)
+            instrumentation.count('rabinkarp.matches', len(positions))
+            instrumentation.count('rabinkarp.spurious_hits', hash_hits - len(positions))
+        return positions
+
+    def search(self, string: str, matches: matches.Matches = None, pattern_id: int = 0, document_id: int = 0) -> float:
+        """
+        Returns the hit rate of the pattern in the string. If matches is given, a record of every 
+        occurrence is added to it under pattern_id and document_id once the scan has finished.
+        """
+        if len(self.pattern) > len(string):
+            print("Invalid pattern length: pattern is longer than string; aborting RabinKarp.")
+            return 0
+        positions = self.find(string)
+        if matches is not None:
+            matches.extend(pattern_id, document_id, positions, len(self.pattern))
+        hit_rate = (len(positions) * len(self.pattern)) / len(string) * 100
+        return hit_rate
+
+
+class RabinKarpTokenPattern:
+    """
+    Equivalent to RabinKarpPattern for a pattern of word tokens, as returned by 
+    Document.sentence_tokens(). Token ids are hashed directly rather than through ord(), using a base 
+    larger than any token id and a 61-bit Mersenne prime modulus, so spurious hash hits are rare even 
+    though every window hashes to one of far more values than with RabinKarpPattern. Strings are token 
+    lists, such as Document.tokens().tolist(), and matches and hit rates are counted in tokens.
+
+    __init__(pattern: np.ndarray)
+
+    Methods:
+    \tfind(), search().
+    """
+    d = 1 << 32
+    q = (1 << 61) - 1
+
+    def __init__(self, pattern: np.ndarray):
+        d = self.d
+        q = self.q
+        self.pattern = np.asarray(pattern).tolist()
+        self.h = pow(d, len(self.pattern) - 1, q) if len(self.pattern) != 0 else 1
+        self.hash_p = 0
+
+        for token in self.pattern:
+            self.hash_p = (d * self.hash_p + token) % q
+
+    def find(self, string: list) -> array:
+        """Returns the start index of every occurrence of the pattern in the token list, including overlapping ones."""
+        pattern = self.pattern
+        n = len(string)
+        m = len(pattern)
+        d = self.d
+        q = self.q
+        h = self.h
+        hash_p = self.hash_p
+        hash_t = 0
+        positions = array('I')
+
+        if m > n or m == 0:
+            return positions
+
+        for i in range(m):
+            hash_t = (d * hash_t + string[i]) % q
+
+        for i in range(n - m + 1):
+            if hash_p == hash_t and string[i:i + m] == pattern:
+                positions.append(i)
+            if i < (n - m):
+                hash_t = (d * (hash_t - string[i] * h) + string[i + m]) % q
+        return positions
+
+    def search(self, string: list, matches: matches.Matches = None, pattern_id: int = 0, document_id: int = 0) -> float:
+        """
+        Returns the hit rate of the pattern in the token list. If matches is given, a record of every 
+        occurrence is added to it under pattern_id and document_id once the scan has finished.
+        """
+        if len(string) == 0:
+            return 0
+        positions = self.find(string)
+        if matches is not None:
+            matches.extend(pattern_id, document_id, positions, len(self.pattern))
+        hit_rate = (len(positions) * len(self.pattern)) / len(string) * 100
+        return hit_rate
+
+
+def compile_pattern(pattern: str) -> RabinKarpPattern:
+    """
+    Compiles a pattern into a RabinKarpPattern object that can be reused against many strings.
+
+    Intended Usage:
+    \tcompiled = rabinkarp.compile_pattern(pattern)
+
+    \thit_rate = compiled.search(string)
+    """
+    return RabinKarpPattern(pattern)
+
+
+def compile_tokens(tokens: np.ndarray) -> RabinKarpTokenPattern:
+    """
+    Compiles the word tokens of a pattern into a RabinKarpTokenPattern object that can be reused 
+    against the token lists of many documents.
+
+    Intended Usage:
+    \tcompiled = rabinkarp.compile_tokens(tokens)
+
+    \thit_rate = compiled.search(corpus_document.tokens().tolist())
+    """
+    return RabinKarpTokenPattern(tokens)
+
+
+def RabinKarp(pattern: str, string: str) -> float:
+    return compile_pattern(pattern).search(string)
+
+
+def RabinKarpTokens(pattern: np.ndarray, string: np.ndarray) -> float:
+    """Equivalent to RabinKarp() for two arrays of word tokens. The hit rate is the percentage of tokens matched."""
+    return compile_tokens(pattern).search(np.asarray(string).tolist())
+
+
+class RabinKarpSet:
+    """
+    Set of patterns matched together with Rabin-Karp. Patterns are grouped by length and the hashes 
+    of each group are kept in a dictionary, so a single rolling pass per distinct pattern length finds 
+    every pattern of that length at once. Hashes use the 61-bit Mersenne prime as a modulus, which 
+    makes spurious hits (equal hashes without an actual match) very rare compared to RabinKarp().
+
+    Counters for the number of windows hashed, hash hits, verifications, spurious hits and true 
+    matches are accumulated over every call to search() and can be displayed with info(). When 
+    InstrumentationCounters is enabled, each call also adds its counts to the 'rabinkarpset.*' 
+    instrumentation counters, which are merged from worker processes when Workers is greater than 1.
+
+    __init__(patterns: list)
+
+    Methods:
+    \tfind(), search(), hit_rates(), info(), totals(), add_totals().
+    """
+    d = 256
+    q = (1 << 61) - 1
+    COUNTERS = ('windows', 'hash_hits', 'verifications', 'spurious_hits', 'matches')
+
+    def __init__(self, patterns: list):
+        if type(patterns) is not list:
+            raise TypeError("Parameter of RabinKarpSet() was {type} and must be of type 'list'.".format(type=type(patterns)))
+        self.patterns = patterns
+        self.buckets = {}
+        self.windows = 0
+        self.hash_hits = 0
+        self.verifications = 0
+        self.spurious_hits = 0
+        self.matches = 0
+        for index, pattern in enumerate(patterns):
+            m = len(pattern)
+            if m == 0:
+                continue
+            hashes = self.buckets.setdefault(m, {})
+            hashes.setdefault(self.__hash(pattern), []).append(index)
+
+    def __hash(self, string: str) -> int:
+        d = self.d
+        q = self.q
+        hash_s = 0
+        for char in string:
+            hash_s = (d * hash_s + ord(char)) % q
+        return hash_s
+
+    def totals(self) -> tuple:
+        """Returns the current value of each counter, in the order of COUNTERS."""
+        return tuple(getattr(self, name) for name in self.COUNTERS)
+
+    def add_totals(self, totals: tuple):
+        """Adds counter values, such as the totals() of another RabinKarpSet, to the counters of this one."""
+        for name, amount in zip(self.COUNTERS, totals):
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _count(self, before: tuple):
+        """Adds the counts made since before, as returned by totals(), to the 'rabinkarpset.*' instrumentation counters."""
+        for name, previous, total in zip(self.COUNTERS, before, self.totals()):
+            instrumentation.count('rabinkarpset.' + name, total - previous)
+
+    def find(self, string: str, counting: bool = instrumentation.INSTRUMENTATION_COUNTERS) -> tuple:
+        """
+        Returns the index of the pattern and the start index of every occurrence of any pattern in the 
+        string, as two arrays of equal length grouped by pattern length.
+        """
+        d = self.d
+        q = self.q
+        n = len(string)
+        pattern_ids = array('I')
+        positions = array('I')
+        before = self.totals()
+
+        for m, hashes in self.buckets.items():
+            if m > n:
+                continue
+            h = pow(d, m - 1, q)
+            hash_t = self.__hash(string[:m])
+            self.windows += n - m + 1
+            for i in range(n - m + 1):
+                indexes = hashes.get(hash_t)
+                if indexes is not None:
+                    self.hash_hits += 1
+                    window = string[i:i + m]
+                    found = False
+                    for index in indexes:
+                        self.verifications += 1
+                        if window == self.patterns[index]:
+                            pattern_ids.append(index)
+                            positions.append(i)
+                            self.matches += 1
+                            found = True
+                    if not found:
+                        self.spurious_hits += 1
+                if i < (n - m):
+                    hash_t = (d * (hash_t - ord(string[i]) * h) + ord(string[i + m])) % q
+        if counting:
+            self._count(before)
+        return pattern_ids, positions
+
+    def search(self, string: str, matches: matches.Matches = None, document_id: int = 0) -> list:
+        """
+        Returns a list containing the number of occurrences of each pattern in the string, in the 
+        same order as the patterns were given. If matches is given, a record of every occurrence is 
+        added to it under the index of its pattern and document_id.
+        """
+        total_matches = [0] * len(self.patterns)
+        pattern_ids, positions = self.find(string)
+        for index in pattern_ids:
+            total_matches[index] += 1
+        if matches is not None:
+            for index, position in zip(pattern_ids, positions):
+                matches.add(index, document_id, position, len(self.patterns[index]))
+        return total_matches
+
+    def hit_rates(self, string: str, matches: matches.Matches = None, document_id: int = 0) -> list:
+        """
+        Returns the hit rate of each pattern in the string, calculated in the same way as RabinKarp().
+        """
+        n = len(string)
+        if n == 0:
+            return [0] * len(self.patterns)
+        hit_rates = []
+        for pattern, occurrences in zip(self.patterns, self.search(string, matches, document_id)):
+            hit_rates.append((occurrences * len(pattern)) / n * 100)
+        return hit_rates
+
+    def info(self):
+        """Outputs the hash collision counters accumulated over every search."""
+        spurious_rate = self.spurious_hits / self.hash_hits * 100 if self.hash_hits != 0 else 0
+        verification_rate = self.verifications / self.windows * 100 if self.windows != 0 else 0
+        print("{name} hashed {windows} window(s) across {lengths} distinct pattern length(s).".format(name=type(self).__name__, windows=self.windows, lengths=len(self.buckets)))
+        print("---> Hash hits: {hits}, true matches: {matches}, spurious hits: {spurious} ({rate:.4f}% of hash hits)".format(hits=self.hash_hits, matches=self.matches, spurious=self.spurious_hits, rate=spurious_rate))
+        print("---> Verifications: {verifications} ({rate:.4f}% of windows)".format(verifications=self.verifications, rate=verification_rate))
+
+
+
+def _powers(base: int, q: int, n: int) -> np.ndarray:
+    """Returns base ** k % q for every k < n as a NumPy uint64 array, doubling the computed range at each step."""
+    powers = np.ones(max(n, 1), dtype=np.uint64)
+    if n > 1:
+        powers[1] = base % q
+    size = 2
+    while size < n:
+        step = min(size, n - size)
+        powers[size:size + step] = powers[:step] * np.uint64(pow(base, size, q)) % np.uint64(q)
+        size += step
+    return powers[:n]
+
+
+class PrefixHashes:
+    """
+    Prefix polynomial hashes of a string, from which the hash of every window of any length is computed
+    with a few NumPy array operations instead of a rolling loop. Characters are encoded as their code
+    points and hashed under two 31-bit prime moduli, whose products still fit in 64-bit integers, and the
+    two hashes of each window are packed into one uint64 key, so keys collide about as rarely as with a
+    61-bit modulus. Prefix hashes are multiplied by inverse powers of the base, so a window hash does not
+    depend on where the window starts. PrefixHashes are built once per corpus document and reused by
+    every pattern, with Document.prefix_hashes() caching them on the Document.
+
+    __init__(string: str)
+
+    Methods:
+    \twindows(), key().
+    """
+    d = 1000003
+    moduli = (2147483647, 2147483629)
+
+    def __init__(self, string: str):
+        self.string = string
+        n = len(string)
+        codes = np.frombuffer(string.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        self.prefixes = []
+        self.inverses = []
+        for q in self.moduli:
+            terms = codes * _powers(self.d, q, n) % np.uint64(q)
+            prefix = np.zeros(n + 1, dtype=np.uint64)
+            np.cumsum(terms, out=prefix[1:])
+            self.prefixes.append((prefix % np.uint64(q)).astype(np.uint32))
+            self.inverses.append(_powers(pow(self.d, q - 2, q), q, n).astype(np.uint32))
+
+    def __len__(self) -> int:
+        return len(self.string)
+
+    def windows(self, m: int) -> np.ndarray:
+        """Returns the key of every window of length m, in order of its start index, as a NumPy uint64 array."""
+        n = len(self.string)
+        if m > n or m == 0:
+            return np.empty(0, dtype=np.uint64)
+        keys = np.zeros(n - m + 1, dtype=np.uint64)
+        for prefix, inverse, q in zip(self.prefixes, self.inverses, self.moduli):
+            q = np.uint64(q)
+            window = (prefix[m:].astype(np.uint64) + q - prefix[:n - m + 1]) % q
+            keys = (keys << np.uint64(32)) | (window * inverse[:n - m + 1] % q)
+        return keys
+
+    @classmethod
+    def key(cls, string: str) -> int:
+        """Returns the key of a whole string, equal to the key of any window of the same text."""
+        key = 0
+        for q in cls.moduli:
+            hash_s = 0
+            for char in reversed(string):
+                hash_s = (cls.d * hash_s + ord(char)) % q
+            key = (key << 32) | hash_s
+        return key
+
+
+class RabinKarpNumpy(RabinKarpSet):
+    """
+    Equivalent to RabinKarpSet, but computes the hashes of every window of a corpus document at once
+    from its PrefixHashes. For each distinct pattern length, the window keys are compared with the keys
+    of every pattern of that length using np.isin(), and only the windows with a matching key are
+    verified against their patterns in Python. find(), search() and hit_rates() accept either a string
+    or the PrefixHashes of a string, which are then reused across calls.
+
+    __init__(patterns: list)
+
+    Methods:
+    \tfind(), search(), hit_rates(), info(), totals(), add_totals().
+    """
+    def __init__(self, patterns: list):
+        if type(patterns) is not list:
+            raise TypeError("Parameter of RabinKarpNumpy() was {type} and must be of type 'list'.".format(type=type(patterns)))
+        super().__init__([])
+        self.patterns = patterns
+        for index, pattern in enumerate(patterns):
+            if len(pattern) != 0:
+                hashes = self.buckets.setdefault(len(pattern), {})
+                hashes.setdefault(PrefixHashes.key(pattern), []).append(index)
+        self.keys = {m: np.fromiter(hashes, dtype=np.uint64, count=len(hashes)) for m, hashes in self.buckets.items()}
+
+    def find(self, string, counting: bool = instrumentation.INSTRUMENTATION_COUNTERS) -> tuple:
+        """
+        Returns the index of the pattern and the start index of every occurrence of any pattern in the
+        string, or in the string of a PrefixHashes object, as two arrays of equal length grouped by 
+        pattern length.
+        """
+        prefix_hashes = string if type(string) is PrefixHashes else PrefixHashes(string)
+        string = prefix_hashes.string
+        n = len(string)
+        pattern_ids = array('I')
+        positions = array('I')
+        before = self.totals()
+
+        for m, hashes in self.buckets.items():
+            if m > n:
+                continue
+            windows = prefix_hashes.windows(m)
+            self.windows += n - m + 1
+            candidates = np.flatnonzero(np.isin(windows, self.keys[m]))
+            self.hash_hits += len(candidates)
+            for i, key in zip(candidates.tolist(), windows[candidates].tolist()):
+                window = string[i:i + m]
+                found = False
+                for index in hashes[key]:
+                    self.verifications += 1
+                    if window == self.patterns[index]:
+                        pattern_ids.append(index)
+                        positions.append(i)
+                        self.matches += 1
+                        found = True
+                if not found:
+                    self.spurious_hits += 1
+        if counting:
+            self._count(before)
+        return pattern_ids, positions
 
 
 if __name__ == '__main__':
@@ -1,65 +1,304 @@
+import math
+import heapq
+import configparser
+
 import numpy as np
 
-import document
 
+config = configparser.ConfigParser()
+config.read('config.ini')
+RESULTS_TOP_K = config.getint('DEFAULT', 'ResultsTopK')
+RESULTS_KEEP_SCORES = config.getboolean('DEFAULT', 'ResultsKeepScores')
+
+# Number of documents listed when the hit rates are not kept and ResultsTopK is 0, which would
+# otherwise leave no documents to list.
+FALLBACK_TOP_K = 10
+
+# Relative accuracy of the quantiles estimated by QuantileSketch, and the range of non-zero hit rates
+# it can tell apart. Hit rates outside of the range are counted in the lowest or highest bucket.
+SKETCH_ACCURACY = 0.01
+SKETCH_MIN = 1e-6
+SKETCH_MAX = 1e6
+
+
+class QuantileSketch:
+    """
+    Streaming estimator of the quantiles of a set of non-negative values. Values are counted in
+    buckets whose bounds grow geometrically, so every estimated quantile is within SKETCH_ACCURACY
+    of the true value relative to its size, while the sketch uses a fixed amount of memory regardless
+    of how many values are added. Zero values are counted separately. Two sketches are merged by
+    adding their bucket counts.
+
+    __init__()
+
+    Methods:
+    \tadd(), merge(), quantiles().
+    """
+    gamma = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+    log_gamma = math.log(gamma)
+    min_index = math.ceil(math.log(SKETCH_MIN) / log_gamma)
+    max_index = math.ceil(math.log(SKETCH_MAX) / log_gamma)
 
-class Results:
     def __init__(self):
-        self.highest_hit = float('inf')
+        self.zeros = 0
+        self.counts = np.zeros(self.max_index - self.min_index + 1, dtype=np.int64)
+
+    def add(self, value: float):
+        if value <= 0:
+            self.zeros += 1
+        else:
+            index = min(max(math.ceil(math.log(value) / self.log_gamma), self.min_index), self.max_index)
+            self.counts[index - self.min_index] += 1
+
+    def merge(self, other: 'QuantileSketch'):
+        self.zeros += other.zeros
+        self.counts += other.counts
+
+    def quantiles(self, q: list) -> list:
+        """Returns the estimated value of each quantile in q, or 0 for each if the sketch is empty."""
+        cumulative = np.cumsum(self.counts) + self.zeros
+        if cumulative[-1] == 0:
+            return [0.0] * len(q)
+        estimates = []
+        for rank in np.asarray(q) * (cumulative[-1] - 1):
+            if rank < self.zeros:
+                estimates.append(0.0)
+            else:
+                index = int(np.searchsorted(cumulative, rank, side='right')) + self.min_index
+                estimates.append(2 * self.gamma ** index / (self.gamma + 1))
+        return estimates
+
+
+class Results:
+    """
+    Object used to store the hit rates of one algorithm against every document of a corpus. Hit rates
+    and document indices are stored in NumPy arrays that grow as results are added, along with the
+    highest hit rate and the lowest non-zero hit rate, a bounded heap of the top_k documents with the
+    highest non-zero hit rates, and a running sum and QuantileSketch of every hit rate. When
+    keep_scores is False, the per-document arrays are not kept at all, so memory use does not grow
+    with the size of the corpus, and a top_k of 0 lists the FALLBACK_TOP_K highest hit rates instead
+    of every one. Partial Results, such as those of parallel workers, are combined with merge(). The
+    records of every match found, when these are collected, are kept in matches.
+    Documents that an early-terminating wrapper stopped scanning are added with their status, and are
+    only listed as flagged or skipped, since their hit rates only cover the patterns scanned.
+
+    __init__(top_k: int, keep_scores: bool, capacity: int)
+
+    Methods:
+    \tadd(), merge(), items(), top(), mean(), quartiles(), to_dict(), display().
+    """
+    def __init__(self, top_k: int = RESULTS_TOP_K, keep_scores: bool = RESULTS_KEEP_SCORES, capacity: int = 1024):
+        self.top_k = top_k if keep_scores or top_k != 0 else FALLBACK_TOP_K
+        self.keep_scores = keep_scores
+        self.highest_hit = float('-inf')
         self.highest_doc = None
-        self.lowest_hit = float('-inf')
+        self.highest_index = -1
+        self.lowest_hit = float('inf')
         self.lowest_doc = None
-        self.scores = []
-        self.documents = []
+        self.lowest_index = -1
         self.num_results = 0
+        self.total = 0.0
+        self.sketch = QuantileSketch()
+        self.heap = []
+        self.filenames = []
+        self.matches = None
+        self.flagged = []
+        self.skipped = []
+        self.__scores = np.empty(capacity if keep_scores else 0, dtype=np.float64)
+        self.__indices = np.empty(capacity if keep_scores else 0, dtype=np.int64)
 
-    def add(self, doc: document.Document, hit_rate: float):
-        if self.highest_hit == float('inf'):
-            self.highest_hit = hit_rate
-            self.highest_doc = doc
-        elif hit_rate > self.highest_hit:
+    @property
+    def scores(self) -> np.ndarray:
+        """Hit rate of each result, in the order in which they were added."""
+        return self.__scores[:len(self.filenames)]
+
+    @property
+    def indices(self) -> np.ndarray:
+        """Document index of each result, in the order in which they were added."""
+        return self.__indices[:len(self.filenames)]
+
+    def __grow(self, size: int):
+        if size > len(self.__scores):
+            capacity = max(size, 2 * len(self.__scores))
+            self.__scores = np.resize(self.__scores, capacity)
+            self.__indices = np.resize(self.__indices, capacity)
+
+    def __update_extremes(self, filename: str, index: int, hit_rate: float):
+        if hit_rate > self.highest_hit or (hit_rate == self.highest_hit and index < self.highest_index):
             self.highest_hit = hit_rate
-            self.highest_doc = doc
-        elif hit_rate != 0 and self.lowest_hit == float('-inf'):
+            self.highest_doc = filename
+            self.highest_index = index
+        if hit_rate != 0 and (hit_rate < self.lowest_hit or (hit_rate == self.lowest_hit and index < self.lowest_index)):
             self.lowest_hit = hit_rate
-            self.lowest_doc = doc
-        elif hit_rate != 0 and hit_rate < self.lowest_hit:
-            self.lowest_hit = hit_rate
-            self.lowest_doc = doc
-        self.scores.append(hit_rate)
-        self.documents.append(doc.filename)
+            self.lowest_doc = filename
+            self.lowest_index = index
+
+    def __push(self, entry: tuple):
+        if len(self.heap) < self.top_k:
+            heapq.heappush(self.heap, entry)
+        elif self.top_k > 0 and entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def add(self, filename: str, hit_rate: float, index: int = None, status: str = None):
+        """
+        Adds the hit rate of a corpus document. The index of the document within the corpus defaults
+        to the number of results added so far, and is used to order results merged from elsewhere.
+        A status of 'flagged', once the hit rate exceeded the flag threshold, or 'skipped', once it
+        could no longer reach the reporting threshold, means the document was not scanned to the end.
+        Such a document is counted and listed by status, but its partial hit rate is left out of the
+        extremes, top_k, kept scores, mean and quartiles so that it is not ranked against full scores.
+        """
+        if index is None:
+            index = self.num_results
+        if status is not None:
+            (self.flagged if status == 'flagged' else self.skipped).append(filename)
+            self.num_results += 1
+            return
+        self.__update_extremes(filename, index, hit_rate)
+        if hit_rate != 0:
+            self.__push((hit_rate, -index, filename))
+        if self.keep_scores:
+            position = len(self.filenames)
+            self.__grow(position + 1)
+            self.__scores[position] = hit_rate
+            self.__indices[position] = index
+            self.filenames.append(filename)
+        self.total += hit_rate
+        self.sketch.add(hit_rate)
         self.num_results += 1
 
+    def merge(self, other: 'Results'):
+        """
+        Adds every result of another Results object, as returned by parallel workers that each scored
+        part of a corpus. Only the arrays are copied; the extremes, heap, sum and sketch are combined
+        in constant time with respect to the number of results. If either object does not keep its hit
+        rates, the merged object does not either, and its heap is filled from the kept hit rates.
+        """
+        if self.keep_scores and not other.keep_scores:
+            self.__drop_scores()
+        if other.highest_doc is not None:
+            self.__update_extremes(other.highest_doc, other.highest_index, other.highest_hit)
+        if other.lowest_doc is not None:
+            self.__update_extremes(other.lowest_doc, other.lowest_index, other.lowest_hit)
+        if self.keep_scores:
+            position = len(self.filenames)
+            self.__grow(position + len(other.filenames))
+            self.__scores[position:position + len(other.filenames)] = other.scores
+            self.__indices[position:position + len(other.filenames)] = other.indices
+            self.filenames += other.filenames
+        # Without top_k, the heap of other is empty and its kept hit rates are the only ranking:
+        if self.top_k != 0:
+            for entry in other.heap if other.top_k != 0 else other.__kept():
+                self.__push(entry)
+        self.flagged += other.flagged
+        self.skipped += other.skipped
+        self.total += other.total
+        self.sketch.merge(other.sketch)
+        self.num_results += other.num_results
+
+    def __kept(self) -> list:
+        """Returns the heap entries of the kept non-zero hit rates."""
+        return [(hit_rate, -index, filename) for filename, hit_rate, index in zip(self.filenames, self.scores.tolist(), self.indices.tolist()) if hit_rate != 0]
+
+    def __drop_scores(self):
+        if self.top_k == 0:
+            self.top_k = FALLBACK_TOP_K
+            for entry in self.__kept():
+                self.__push(entry)
+        self.keep_scores = False
+        self.filenames = []
+        self.__scores = self.__scores[:0]
+        self.__indices = self.__indices[:0]
+
+    def items(self):
+        """Yields the (filename, hit_rate) of every kept result, ordered by document index."""
+        order = np.argsort(self.indices, kind='stable')
+        scores = self.scores
+        for i in order.tolist():
+            yield self.filenames[i], float(scores[i])
+
+    def top(self) -> list:
+        """Returns the (filename, hit_rate) of the top_k documents with the highest non-zero hit rates."""
+        return [(filename, hit_rate) for hit_rate, index, filename in sorted(self.heap, reverse=True)]
+
+    def mean(self) -> float:
+        """Returns the mean hit rate of the documents that were scanned to the end."""
+        scored = self.num_results - len(self.flagged) - len(self.skipped)
+        return self.total / scored if scored != 0 else 0.0
+
+    def quartiles(self) -> list:
+        """
+        Returns the 1st quartile, median and 3rd quartile of the hit rates. These are exact when the
+        hit rates are kept, and estimated from the QuantileSketch otherwise.
+        """
+        if self.keep_scores and len(self.filenames) != 0:
+            return np.quantile(self.scores, [0.25, 0.5, 0.75]).tolist()
+        return self.sketch.quantiles([0.25, 0.5, 0.75])
+
+    def to_dict(self) -> dict:
+        """
+        Returns a summary of the results that can be serialized as JSON, listing the same documents as
+        display(): every non-zero result in corpus order, or the top_k results by hit rate.
+        """
+        if self.keep_scores and self.top_k == 0:
+            listed = [(filename, hit_rate) for filename, hit_rate in self.items() if hit_rate != 0]
+        else:
+            listed = self.top()
+        quartiles = self.quartiles()
+        return {
+            'documents': self.num_results,
+            'highest': {'document': self.highest_doc, 'hit_rate': self.highest_hit if self.highest_doc is not None else 0},
+            'lowest': {'document': self.lowest_doc, 'hit_rate': self.lowest_hit if self.lowest_doc is not None else 0},
+            'mean': self.mean(),
+            'quartiles': quartiles,
+            'results': [{'document': filename, 'hit_rate': hit_rate} for filename, hit_rate in listed],
+            'flagged': list(self.flagged),
+            'skipped': len(self.skipped),
+        }
+
     def display(self, show_quartiles = False):
-        if self.highest_hit == float('inf'):
+        if self.highest_doc is None:
             highest_hit = 0
             highest_doc = 'N/A'
         else:
             highest_hit = self.highest_hit
-            highest_doc = self.highest_doc.filename
-        if self.lowest_hit == float('-inf'):
+            highest_doc = self.highest_doc
+        if self.lowest_doc is None:
             lowest_hit = 0
             lowest_doc = "N/A"
         else:
             lowest_hit = self.lowest_hit
-            lowest_doc = self.lowest_doc.filename
+            lowest_doc = self.lowest_doc
         print("\n---> Total documents checked: \t{num_results}".format(num_results=self.num_results))
         print("\n---> Highest hit rate: \t\t\t{hit_h:.2f}%\n---> Associated document: \t\t{doc_h}".format(hit_h=highest_hit, doc_h=highest_doc))
         print("\n---> Lowest hit rate: \t\t\t{hit_l:.2f}%\n---> Associated document: \t\t{doc_l}".format(hit_l=lowest_hit, doc_l=lowest_doc))
-        if len(self.scores) != 0: 
-            print("\nAll results:")
+        if len(self.flagged) != 0 or len(self.skipped) != 0:
+            print("\n---> Documents flagged: \t\t{flagged}\n---> Documents skipped: \t\t{skipped}".format(flagged=len(self.flagged), skipped=len(self.skipped)))
+            if len(self.flagged) != 0:
+                print("\nFlagged for review (scanning stopped early, so these are not ranked in the hit rates):")
+            for filename in self.flagged:
+                print("\t{filename}".format(filename=filename))
+        if self.keep_scores and self.top_k == 0:
+            if self.num_results != 0:
+                print("\nAll results:")
+            else:
+                print("\nNo results to display.")
+            for filename, hit_rate in self.items():
+                if hit_rate != 0:
+                    print("\t{filename}: {hits:.2f}%".format(filename=filename, hits=hit_rate))
+            if self.num_results != 0:
+                print("\nFiles without hits have been excluded in the results above.")
         else:
-            print("\nNo results to display.")
-        for i in range(len(self.scores)):
-            if self.scores[i] != 0:
-                print("\t{filename}: {hits:.2f}%".format(filename=self.documents[i], hits=self.scores[i]))
-        if len(self.scores) != 0: 
-            print("\nFiles without hits have been excluded in the results above.")
+            if len(self.heap) != 0:
+                print("\nTop {k} results:".format(k=len(self.heap)))
+            else:
+                print("\nNo results to display.")
+            for filename, hit_rate in self.top():
+                print("\t{filename}: {hits:.2f}%".format(filename=filename, hits=hit_rate))
         if show_quartiles:
-            np_quartiles = np.quantile(self.scores, [0.25,0.5,0.75])
-            quartiles = np_quartiles.tolist()
+            quartiles = self.quartiles()
             print("\nHit rate statistics:")
             print("---> 1st-Quartile: \t\t\t\t{median:.2f}%".format(median=quartiles[0]))
             print("---> Median: \t\t\t\t\t{median:.2f}%".format(median=quartiles[1]))
             print("---> 3rd-Quartile: \t\t\t\t{median:.2f}%".format(median=quartiles[2]))
-            print("---> Mean: \t\t\t\t\t\t{median:.2f}%".format(median=np.mean(self.scores)))
\ No newline at end of file
+            print("---> Mean: \t\t\t\t\t\t{median:.2f}%".format(median=self.mean()))
@@ -0,0 +1,129 @@
+import configparser
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import document
+import corpus
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
+
+# Sections of the shared memory segment, in order. The uint64 tables come first so every section is
+# aligned to the size of its elements, and the text of every document follows as one UTF-8 buffer.
+SECTIONS = [('text_index', np.uint64), ('paragraph_index', np.uint64), ('sentence_index', np.uint64),
+            ('paragraph_offsets', np.uint32), ('sentence_offsets', np.uint32), ('text', np.uint8)]
+
+
+class SharedCorpus:
+    """
+    Read-only copy of a corpus placed in one multiprocessing.shared_memory segment, so that worker
+    processes attach to a single copy of the corpus instead of each receiving their own. The segment
+    holds the UTF-8 text of every document as one contiguous buffer, the flat (start, end) paragraph and
+    sentence offsets of every document, and an index of where each document starts in each of them.
+    Workers attach with the picklable descriptor and read through zero-copy NumPy views of the segment;
+    only the text of the document being scanned is decoded into a string.
+
+    The process that created the segment must call unlink() once no more workers will attach to it.
+
+    SharedCorpus.create(corp: corpus.Corpus)
+
+    SharedCorpus.attach(descriptor: dict)
+
+    Methods:
+    \traw_text(), document(), close(), unlink(), info().
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, descriptor: dict):
+        self.shm = shm
+        self.descriptor = descriptor
+        self.filenames = descriptor['filenames']
+        self.index = {filename: i for i, filename in enumerate(self.filenames)}
+        self.views = {}
+        for name, dtype, offset, count in descriptor['sections']:
+            self.views[name] = np.ndarray((count,), dtype=dtype, buffer=shm.buf, offset=offset)
+
+    @classmethod
+    def create(cls, corp: corpus.Corpus) -> 'SharedCorpus':
+        """
+        Copies the documents of a Corpus into a new shared memory segment, in corpus order. The sizes of
+        the sections are measured first, and each document is then written straight into the segment,
+        so only one document is held outside the segment at a time.
+        """
+        filenames = list(corp.documents)
+        counts = {'text_index': [0], 'paragraph_index': [0], 'sentence_index': [0]}
+        for filename in filenames:
+            doc = corp.documents[filename]
+            counts['text_index'].append(len(doc.raw_text.encode('utf-8')))
+            counts['paragraph_index'].append(len(doc.paragraph_offsets))
+            counts['sentence_index'].append(len(doc.sentence_offsets))
+        indexes = {name: np.cumsum(lengths, dtype=np.uint64) for name, lengths in counts.items()}
+        lengths = {name: len(index) for name, index in indexes.items()}
+        lengths.update({'paragraph_offsets': int(indexes['paragraph_index'][-1]), 'sentence_offsets': int(indexes['sentence_index'][-1]), 'text': int(indexes['text_index'][-1])})
+        sections = []
+        size = 0
+        for name, dtype in SECTIONS:
+            sections.append((name, dtype, size, lengths[name]))
+            size += lengths[name] * np.dtype(dtype).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        shared = cls(shm, {'name': shm.name, 'filenames': filenames, 'sections': sections})
+        try:
+            views = shared.views
+            for name, index in indexes.items():
+                views[name][:] = index
+            text_index, paragraph_index, sentence_index = indexes['text_index'], indexes['paragraph_index'], indexes['sentence_index']
+            for i, filename in enumerate(filenames):
+                doc = corp.documents[filename]
+                views['text'][text_index[i]:text_index[i + 1]] = np.frombuffer(doc.raw_text.encode('utf-8'), dtype=np.uint8)
+                views['paragraph_offsets'][paragraph_index[i]:paragraph_index[i + 1]] = np.frombuffer(doc.paragraph_offsets, dtype=np.uint32)
+                views['sentence_offsets'][sentence_index[i]:sentence_index[i + 1]] = np.frombuffer(doc.sentence_offsets, dtype=np.uint32)
+        except BaseException:
+            shared.unlink()
+            raise
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor: dict) -> 'SharedCorpus':
+        """Attaches to the shared memory segment of a SharedCorpus created by another process."""
+        return cls(shared_memory.SharedMemory(name=descriptor['name']), descriptor)
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    def __iter__(self):
+        for i in range(len(self.filenames)):
+            yield self.document(i)
+
+    def raw_text(self, i: int) -> str:
+        """Decodes the raw text of the document at index i from the shared UTF-8 buffer."""
+        text_index = self.views['text_index']
+        return str(self.views['text'][text_index[i]:text_index[i + 1]], 'utf-8')
+
+    def document(self, i: int) -> document.Document:
+        """
+        Returns the document at index i as a new Document, populated from the shared text and offsets
+        without parsing the text again.
+        """
+        paragraph_index = self.views['paragraph_index']
+        sentence_index = self.views['sentence_index']
+        doc = document.Document(self.filenames[i])
+        doc.load(self.raw_text(i), self.views['paragraph_offsets'][paragraph_index[i]:paragraph_index[i + 1]].tobytes(),
+                 self.views['sentence_offsets'][sentence_index[i]:sentence_index[i + 1]].tobytes())
+        return doc
+
+    def close(self):
+        """Releases the views of the segment and detaches from it."""
+        self.views = {}
+        self.shm.close()
+
+    def unlink(self):
+        """Detaches from the segment and frees it. Processes still attached keep their mapping until they close it."""
+        self.close()
+        self.shm.unlink()
+
+    def info(self):
+        if VERBOSE:
+            print("Shared corpus '{name}' holds {num} document(s) in {size} bytes: {keys}".format(name=self.shm.name, num=len(self.filenames), size=self.shm.size, keys=self.filenames))
+        else:
+            print("Shared corpus '{name}' holds {num} document(s) in {size} bytes.".format(name=self.shm.name, num=len(self.filenames), size=self.shm.size))
@@ -0,0 +1,88 @@
+class SuffixAutomaton:
+    """
+    Suffix automaton of a string, built in linear time. Every substring of the string corresponds to
+    a path from the initial state, which allows the longest common substring between the string and
+    any pattern to be found in time linear to the length of the pattern.
+
+    Each state stores the end position of the first occurrence of its substrings, so matches can be
+    reported at the same index as the LCSS() lookup table would report them.
+
+    __init__(string: str)
+
+    Methods:
+    \tlongest_common_substring().
+    """
+    def __init__(self, string: str):
+        if type(string) is not str:
+            raise TypeError("Parameter of SuffixAutomaton() was {type} and must be of type 'str'.".format(type=type(string)))
+        self.string = string
+        self.transitions = [{}]
+        self.link = [-1]
+        self.length = [0]
+        self.first_pos = [-1]
+        last = 0
+        for i, char in enumerate(string):
+            last = self.__extend(last, char, i)
+
+    def __extend(self, last: int, char: str, position: int) -> int:
+        transitions = self.transitions
+        link = self.link
+        length = self.length
+        first_pos = self.first_pos
+
+        current = len(length)
+        transitions.append({})
+        link.append(0)
+        length.append(length[last] + 1)
+        first_pos.append(position)
+
+        state = last
+        while state != -1 and char not in transitions[state]:
+            transitions[state][char] = current
+            state = link[state]
+        if state != -1:
+            target = transitions[state][char]
+            if length[state] + 1 == length[target]:
+                link[current] = target
+            else:
+                clone = len(length)
+                transitions.append(dict(transitions[target]))
+                link.append(link[target])
+                length.append(length[state] + 1)
+                first_pos.append(first_pos[target])
+                while state != -1 and transitions[state].get(char) == target:
+                    transitions[state][char] = clone
+                    state = link[state]
+                link[target] = clone
+                link[current] = clone
+        return current
+
+    def longest_common_substring(self, pattern: str) -> tuple:
+        """
+        Returns the length of the longest common substring between the automaton string and the
+        pattern, along with the index just past its first occurrence in the automaton string. When
+        several common substrings share the longest length, the one ending earliest is reported.
+        """
+        transitions = self.transitions
+        link = self.link
+        length = self.length
+        first_pos = self.first_pos
+
+        max_length = 0
+        ending_index = 0
+        state = 0
+        matched = 0
+        for char in pattern:
+            while state != 0 and char not in transitions[state]:
+                state = link[state]
+                matched = length[state]
+            if char in transitions[state]:
+                state = transitions[state][char]
+                matched += 1
+            if matched == 0:
+                continue
+            end = first_pos[state] + 1
+            if matched > max_length or (matched == max_length and end < ending_index):
+                max_length = matched
+                ending_index = end
+        return max_length, ending_index
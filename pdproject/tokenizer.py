@@ -0,0 +1,50 @@
+import re
+
+import numpy as np
+
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class Vocabulary:
+    """
+    Interns normalized words as integer token ids. Each distinct word is given the next unused id the
+    first time it is seen, so the same word always maps to the same token within one Vocabulary. Text
+    tokenized with the same Vocabulary can be compared token by token instead of character by character.
+
+    __init__()
+
+    Methods:
+    \tintern(), words().
+    """
+    def __init__(self):
+        self.ids = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def intern(self, words: list) -> np.ndarray:
+        """Returns the token id of each word as a NumPy uint32 array, adding new words to the vocabulary."""
+        ids = self.ids
+        return np.array([ids.setdefault(word, len(ids)) for word in words], dtype=np.uint32)
+
+    def words(self) -> list:
+        """Returns every word of the vocabulary, ordered by token id."""
+        return list(self.ids)
+
+
+# Vocabulary shared by every document tokenized in this process:
+VOCABULARY = Vocabulary()
+
+
+def normalize(string: str) -> list:
+    """
+    Case-folds the string and splits it into words, dropping punctuation and whitespace, so that
+    differences in case, punctuation and spacing between words do not affect the tokens.
+    """
+    return WORD_PATTERN.findall(string.casefold())
+
+
+def tokenize(string: str, vocabulary: Vocabulary = VOCABULARY) -> np.ndarray:
+    """Returns the normalized words of the string as a NumPy uint32 array of token ids."""
+    return vocabulary.intern(normalize(string))
@@ -0,0 +1,96 @@
+import configparser
+from collections import Counter
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+EARLY_TERMINATION = config.getboolean('DEFAULT', 'EarlyTermination')
+FLAG_THRESHOLD = config.getfloat('DEFAULT', 'FlagThreshold')
+REPORT_THRESHOLD = config.getfloat('DEFAULT', 'ReportThreshold')
+
+# Outcome of check() for a corpus document that no longer needs to be scanned:
+FLAGGED = 'flagged'
+SKIPPED = 'skipped'
+
+
+def sentence_bounds(sentences: list, raw_text: str) -> list:
+    """
+    Returns a list in which element j is an upper bound on the total hit rate that sentences j onwards
+    can still add in KMPSearch() or RabinKarp(), with a final element of 0. Every occurrence of a
+    sentence starts at a different index of raw_text, so a sentence cannot occur more often than the
+    rarest of its characters does, nor more than n - m + 1 times.
+    """
+    bounds = [0.0] * (len(sentences) + 1)
+    n = len(raw_text)
+    if n == 0:
+        return bounds
+    counts = Counter(raw_text)
+    for j in range(len(sentences) - 1, -1, -1):
+        m = len(sentences[j])
+        occurrences = min(n - m + 1, min((counts[char] for char in set(sentences[j])), default=0)) if m <= n else 0
+        bounds[j] = bounds[j + 1] + (occurrences * m) / n * 100
+    return bounds
+
+
+def paragraph_bounds(paragraphs: list, raw_text: str) -> list:
+    """
+    Returns a list in which element j is an upper bound on the total hit rate that paragraphs j onwards
+    can still add in LCSS(), with a final element of 0. The longest common substring of a paragraph
+    and raw_text is no longer than either of them.
+    """
+    bounds = [0.0] * (len(paragraphs) + 1)
+    n = len(raw_text)
+    if n == 0:
+        return bounds
+    for j in range(len(paragraphs) - 1, -1, -1):
+        bounds[j] = bounds[j + 1] + min(len(paragraphs[j]), n) / n * 100
+    return bounds
+
+
+def check(total_hit_rate: float, remaining: float) -> str:
+    """
+    Returns FLAGGED once the total hit rate of a corpus document exceeds FlagThreshold, or SKIPPED if
+    the total hit rate plus the upper bound on what the remaining patterns can add cannot reach
+    ReportThreshold. Otherwise returns None, and the document must be scanned further.
+    """
+    if total_hit_rate > FLAG_THRESHOLD:
+        return FLAGGED
+    if total_hit_rate + remaining < REPORT_THRESHOLD:
+        return SKIPPED
+    return None
+
+
+def scan(patterns: list, search, bound, sizes: list, text) -> tuple:
+    """
+    Adds up search(j, pattern) for each pattern in turn, where search scans text for pattern j and
+    returns its hit rate. With EarlyTermination, the upper bounds returned by bound(sizes, text),
+    sentence_bounds() or paragraph_bounds(), are checked before each pattern and the scan stops once
+    the outcome for the document is known. Returns the total hit rate along with FLAGGED, SKIPPED or
+    None. The total of a flagged or skipped document only covers the patterns scanned.
+    """
+    bounds = bound(sizes, text) if EARLY_TERMINATION else None
+    total_hit_rate = 0
+    for j, pattern in enumerate(patterns):
+        if bounds is not None:
+            status = check(total_hit_rate, bounds[j])
+            if status is not None:
+                return total_hit_rate, status
+        total_hit_rate += search(j, pattern)
+    if bounds is not None and total_hit_rate > FLAG_THRESHOLD:
+        return total_hit_rate, FLAGGED
+    return total_hit_rate, None
+
+
+def scan_once(search, sentences: list, text) -> tuple:
+    """
+    Equivalent to scan() for algorithms that match every sentence in one scan of text, such as
+    Aho-Corasick, where search() returns the total hit rate. With EarlyTermination, a document can only
+    be skipped before the scan starts, and is flagged once it has been scanned.
+    """
+    if not EARLY_TERMINATION:
+        return search(), None
+    status = check(0, sentence_bounds(sentences, text)[0])
+    if status is not None:
+        return 0, status
+    total_hit_rate = search()
+    return total_hit_rate, FLAGGED if total_hit_rate > FLAG_THRESHOLD else None
@@ -1,5 +1,5 @@
 import time
-from random import choice
+from random import choices
 from string import ascii_uppercase
 
 
@@ -23,11 +23,11 @@ def tryItABunch(myFn, startN=10, endN=100, stepSize=10, numTrials=20, listMax =
         # run myFn several times and average to get a decent idea.
         runtime = 0
         for t in range(numTrials):
-            lst = [ choice(range(listMax)) for i in range(n) ] # generate a random list of length n
-            start = time.time()
+            lst = choices(range(listMax), k=n) # generate a random list of length n
+            start = time.perf_counter_ns()
             myFn( lst )
-            end = time.time()
-            runtime += (end - start) * 1000 # measure in milliseconds
+            end = time.perf_counter_ns()
+            runtime += (end - start) / 1e6 # measure in milliseconds
         runtime = runtime/numTrials
         nValues.append(n)
         tValues.append(runtime)
@@ -44,14 +44,14 @@ def tryItABunchKMP(myFn, startN=10, endN=100, stepSize=10, numTrials=20, pattern
         # run myFn several times and average to get a decent idea.
         runtime = 0
         for t in range(numTrials):
-            pattern = ''.join(choice(ascii_uppercase) for i in range(patternLength)) # generate a random string of length patternLength
+            pattern = ''.join(choices(ascii_uppercase, k=patternLength)) # generate a random string of length patternLength
             # print(pattern)
-            string = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length n
+            string = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length n
             # print(string)
-            start = time.time()
+            start = time.perf_counter_ns()
             myFn( pattern, string )
-            end = time.time()
-            runtime += (end - start) * 1000 # measure in milliseconds
+            end = time.perf_counter_ns()
+            runtime += (end - start) / 1e6 # measure in milliseconds
         runtime = runtime/numTrials
         nValues.append(n)
         tValues.append(runtime)
@@ -69,12 +69,12 @@ def tryItABunchKMPEqual(myFn, startN=10, endN=100, stepSize=10, numTrials=20):
         # run myFn several times and average to get a decent idea.
         runtime = 0
         for t in range(numTrials):
-            pattern = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length listMax
-            string = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length list2Max
-            start = time.time()
+            pattern = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length listMax
+            string = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length list2Max
+            start = time.perf_counter_ns()
             myFn( pattern, string )
-            end = time.time()
-            runtime += (end - start) * 1000 # measure in milliseconds
+            end = time.perf_counter_ns()
+            runtime += (end - start) / 1e6 # measure in milliseconds
         runtime = runtime/numTrials
         nValues.append(n)
         tValues.append(runtime)
@@ -92,12 +92,12 @@ def tryItABunchKMPLargePat(myFn, startN=10, endN=100, stepSize=10, numTrials=20,
         # run myFn several times and average to get a decent idea.
         runtime = 0
         for t in range(numTrials):
-            pattern = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length listMax
-            string = ''.join(choice(ascii_uppercase) for i in range(stringLength)) # generate a random string of length list2Max
-            start = time.time()
+            pattern = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length listMax
+            string = ''.join(choices(ascii_uppercase, k=stringLength)) # generate a random string of length list2Max
+            start = time.perf_counter_ns()
             myFn( pattern, string )
-            end = time.time()
-            runtime += (end - start) * 1000 # measure in milliseconds
+            end = time.perf_counter_ns()
+            runtime += (end - start) / 1e6 # measure in milliseconds
         runtime = runtime/numTrials
         nValues.append(n)
         tValues.append(runtime)
@@ -120,21 +120,21 @@ def tryItABunchKMPWrapper(myFn, startN=10, endN=100, stepSize=10, numTrials=20,
         # run myFn several times and average to get a decent idea.
         runtime = 0
         for t in range(numTrials):
-            string = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length n
+            string = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length n
             if amtPatternsSmaller is True:
                 amt_patters = (int)(n / 2)
-                pattern = ''.join(choice(ascii_uppercase) for i in range((int)(n / 2))) # generate a random string of length n
+                pattern = ''.join(choices(ascii_uppercase, k=(int)(n / 2))) # generate a random string of length n
             elif amtPatternsLarger is True:
                 amt_patters = (int)(n * 2)
-                pattern = ''.join(choice(ascii_uppercase) for i in range((int)(n * 2))) # generate a random string of length n
+                pattern = ''.join(choices(ascii_uppercase, k=(int)(n * 2))) # generate a random string of length n
             else:
                 amt_patters = n
-                pattern = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length n
+                pattern = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length n
             amt_corpus_docs = n
-            start = time.time()
+            start = time.perf_counter_ns()
             myFn(amt_patters, amt_corpus_docs, pattern, string)
-            end = time.time()
-            runtime += (end - start) * 1000 # measure in milliseconds
+            end = time.perf_counter_ns()
+            runtime += (end - start) / 1e6 # measure in milliseconds
         runtime = runtime/numTrials
         nValues.append(n)
         tValues.append(runtime)
@@ -152,14 +152,14 @@ def tryItABunchLCSS(myFn, startN=10, endN=100, stepSize=10, numTrials=20, patter
         # run myFn several times and average to get a decent idea.
         runtime = 0
         for t in range(numTrials):
-            pattern = ''.join(choice(ascii_uppercase) for i in range(patternLength)) # generate a random string of length patternLength
+            pattern = ''.join(choices(ascii_uppercase, k=patternLength)) # generate a random string of length patternLength
             # print(pattern)
-            string = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length n
+            string = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length n
             # print(string)
-            start = time.time()
+            start = time.perf_counter_ns()
             myFn( string, pattern )
-            end = time.time()
-            runtime += (end - start) * 1000 # measure in milliseconds
+            end = time.perf_counter_ns()
+            runtime += (end - start) / 1e6 # measure in milliseconds
         runtime = runtime/numTrials
         nValues.append(n)
         tValues.append(runtime)
@@ -177,12 +177,12 @@ def tryItABunchLCSSEqual(myFn, startN=10, endN=100, stepSize=10, numTrials=20):
         # run myFn several times and average to get a decent idea.
         runtime = 0
         for t in range(numTrials):
-            pattern = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length listMax
-            string = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length list2Max
-            start = time.time()
+            pattern = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length listMax
+            string = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length list2Max
+            start = time.perf_counter_ns()
             myFn( string, pattern )
-            end = time.time()
-            runtime += (end - start) * 1000 # measure in milliseconds
+            end = time.perf_counter_ns()
+            runtime += (end - start) / 1e6 # measure in milliseconds
         runtime = runtime/numTrials
         nValues.append(n)
         tValues.append(runtime)
@@ -200,12 +200,12 @@ def tryItABunchLCSSLargePat(myFn, startN=10, endN=100, stepSize=10, numTrials=20
         # run myFn several times and average to get a decent idea.
         runtime = 0
         for t in range(numTrials):
-            pattern = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length listMax
-            string = ''.join(choice(ascii_uppercase) for i in range(stringLength)) # generate a random string of length list2Max
-            start = time.time()
+            pattern = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length listMax
+            string = ''.join(choices(ascii_uppercase, k=stringLength)) # generate a random string of length list2Max
+            start = time.perf_counter_ns()
             myFn( string, pattern )
-            end = time.time()
-            runtime += (end - start) * 1000 # measure in milliseconds
+            end = time.perf_counter_ns()
+            runtime += (end - start) / 1e6 # measure in milliseconds
         runtime = runtime/numTrials
         nValues.append(n)
         tValues.append(runtime)
@@ -230,21 +230,21 @@ def tryItABunchLCSSWrapper(myFn, startN=10, endN=100, stepSize=10, numTrials=20,
         # run myFn several times and average to get a decent idea.
         runtime = 0
         for t in range(numTrials):
-            string = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length n
+            string = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length n
             if amtPatternsSmaller is True:
                 amt_patters = (int)(n / 2)
-                pattern = ''.join(choice(ascii_uppercase) for i in range((int)(n / 2))) # generate a random string of length n
+                pattern = ''.join(choices(ascii_uppercase, k=(int)(n / 2))) # generate a random string of length n
             elif amtPatternsLarger is True:
                 amt_patters = (int)(n * 2)
-                pattern = ''.join(choice(ascii_uppercase) for i in range((int)(n * 2))) # generate a random string of length n
+                pattern = ''.join(choices(ascii_uppercase, k=(int)(n * 2))) # generate a random string of length n
             else:
-                pattern = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length n
+                pattern = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length n
                 amt_patters = n
             amt_corpus_docs = n
-            start = time.time()
+            start = time.perf_counter_ns()
             myFn(amt_patters, amt_corpus_docs, pattern, string)
-            end = time.time()
-            runtime += (end - start) * 1000 # measure in milliseconds
+            end = time.perf_counter_ns()
+            runtime += (end - start) / 1e6 # measure in milliseconds
         runtime = runtime/numTrials
         nValues.append(n)
         tValues.append(runtime)
@@ -262,13 +262,13 @@ def tryItABunchRabinKarpEqual(myFn, startN=10, endN=100, stepSize=10, numTrials=
         # run myFn several times and average to get a decent idea.
         runtime = 0
         for t in range(numTrials):
-            pattern = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length listMax
-            # string = ''.join(choice(ascii_uppercase) for i in range(n)) # generate a random string of length list2Max
+            pattern = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length listMax
+            # string = ''.join(choices(ascii_uppercase, k=n)) # generate a random string of length list2Max
             string = pattern
-            start = time.time()
+            start = time.perf_counter_ns()
             myFn( pattern, string )
-            end = time.time()
-            runtime += (end - start) * 1000 # measure in milliseconds
+            end = time.perf_counter_ns()
+            runtime += (end - start) / 1e6 # measure in milliseconds
         runtime = runtime/numTrials
         nValues.append(n)
         tValues.append(runtime)
@@ -0,0 +1,160 @@
+import configparser
+from collections import deque
+
+import document
+
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+VERBOSE = config.getboolean('DEFAULT', 'VerboseMode')
+
+
+def normalize(string: str) -> tuple:
+    """
+    Lowercases the string and removes every character that is not a letter or a digit, so that
+    differences in whitespace, punctuation and case do not affect fingerprints. Returns the
+    normalized string along with a list mapping each of its characters to its index in the input.
+    """
+    chars = []
+    positions = []
+    for i, char in enumerate(string):
+        if char.isalnum():
+            chars.append(char.lower())
+            positions.append(i)
+    return ''.join(chars), positions
+
+
+def kgram_hashes(string: str, k: int) -> list:
+    """Returns the rolling hash of every substring of length k in the string, in order."""
+    d = 256
+    q = (1 << 61) - 1
+    n = len(string)
+    if k > n:
+        return []
+    h = pow(d, k - 1, q)
+    hash_t = 0
+    for i in range(k):
+        hash_t = (d * hash_t + ord(string[i])) % q
+    hashes = [hash_t]
+    for i in range(n - k):
+        hash_t = (d * (hash_t - ord(string[i]) * h) + ord(string[i + k])) % q
+        hashes.append(hash_t)
+    return hashes
+
+
+def winnow(hashes: list, w: int) -> list:
+    """
+    Selects fingerprints from a list of k-gram hashes. In every window of w consecutive hashes the
+    minimum hash is selected, using the rightmost one on ties, and each selected hash is recorded
+    once as a (hash, k-gram index) pair. Any match of at least w + k - 1 characters is guaranteed
+    to share a fingerprint.
+    """
+    fingerprints = []
+    if len(hashes) == 0:
+        return fingerprints
+    window = deque()
+    last = -1
+    for i, hash_k in enumerate(hashes):
+        while window and hashes[window[-1]] >= hash_k:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - w:
+            window.popleft()
+        if i >= w - 1 or i == len(hashes) - 1:
+            if window[0] != last:
+                last = window[0]
+                fingerprints.append((hashes[last], last))
+    return fingerprints
+
+
+def fingerprint(string: str, k: int, w: int) -> list:
+    """
+    Returns the winnowed fingerprints of a string as a list of (hash, position) pairs, where the
+    position is the index in the original string at which the fingerprinted k-gram starts.
+    """
+    normalized, positions = normalize(string)
+    return [(hash_k, positions[i]) for hash_k, i in winnow(kgram_hashes(normalized, k), w)]
+
+
+class FingerprintIndex:
+    """
+    Inverted index from winnowed fingerprints to the corpus documents and positions they occur at.
+    Documents are fingerprinted once when added, and a plagiarized document is then scored by looking
+    up its own fingerprints, so the cost of a query depends on the size of the plagiarized document
+    rather than the size of the corpus. The distinct fingerprints of each document are also kept, so
+    a document can be replaced or removed without rebuilding the index.
+
+    __init__(k: int, w: int)
+
+    Methods:
+    \tadd_document(), replace_document(), remove_document(), query(), info().
+    """
+    def __init__(self, k: int, w: int):
+        self.k = k
+        self.w = w
+        self.index = {}
+        self.fingerprints = {}
+        self.num_documents = 0
+
+    def add_document(self, doc: document.Document):
+        """Fingerprints a Document and adds each fingerprint to the index."""
+        if type(doc) is not document.Document:
+            raise TypeError("Parameter of FingerprintIndex.add_document() was {type} and must be of type 'Document'.".format(type=type(doc)))
+        hashes = set()
+        for hash_k, position in fingerprint(doc.raw_text, self.k, self.w):
+            self.index.setdefault(hash_k, []).append((doc.filename, position))
+            hashes.add(hash_k)
+        self.fingerprints[doc.filename] = hashes
+        self.num_documents += 1
+
+    def replace_document(self, doc: document.Document):
+        """Replaces the fingerprints of a Document with the same filename, or adds them if it is not indexed yet."""
+        if doc.filename in self.fingerprints:
+            self.remove_document(doc.filename)
+        self.add_document(doc)
+
+    def remove_document(self, filename: str):
+        """Removes every fingerprint of the document with the given filename from the index."""
+        if filename not in self.fingerprints:
+            raise KeyError("Fingerprint index does not contain a document named '{filename}'.".format(filename=filename))
+        for hash_k in self.fingerprints.pop(filename):
+            postings = [posting for posting in self.index[hash_k] if posting[0] != filename]
+            if len(postings) != 0:
+                self.index[hash_k] = postings
+            else:
+                del self.index[hash_k]
+        self.num_documents -= 1
+
+    def lookup(self, hash_k: int) -> list:
+        """Returns the list of (filename, position) pairs at which a fingerprint occurs."""
+        return self.index.get(hash_k, [])
+
+    def query(self, doc: document.Document) -> dict:
+        """
+        Returns a dictionary mapping the filename of every corpus document that shares at least one
+        fingerprint with the Document to its hit rate, which is the percentage of the Document's
+        distinct fingerprints that were found in that corpus document.
+        """
+        hashes = {hash_k for hash_k, position in fingerprint(doc.raw_text, self.k, self.w)}
+        if len(hashes) == 0:
+            return {}
+        shared = {}
+        for hash_k in hashes:
+            filenames = {filename for filename, position in self.lookup(hash_k)}
+            for filename in filenames:
+                shared[filename] = shared.get(filename, 0) + 1
+        hit_rates = {}
+        for filename, matches in shared.items():
+            hit_rates[filename] = matches / len(hashes) * 100
+            if VERBOSE: print("{matches} of {total} fingerprint(s) found in '{file}'.".format(matches=matches, total=len(hashes), file=filename))
+        return hit_rates
+
+    def info(self):
+        """Outputs the number of documents and distinct fingerprints held in the index."""
+        print("Fingerprint index contains {fingerprints} distinct fingerprint(s) from {documents} document(s).".format(fingerprints=len(self.index), documents=self.num_documents))
+
+
+if __name__ == '__main__':
+    # Winnowing test cases:
+    string = "A do run run run, a do run run"
+    print(fingerprint(string, 5, 4))
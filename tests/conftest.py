@@ -0,0 +1,8 @@
+import os
+import sys
+
+
+# The modules of pdproject are imported by bare name and read 'config.ini' from the working directory:
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'pdproject'))
+os.chdir(ROOT)
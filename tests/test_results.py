@@ -0,0 +1,104 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+import results
+
+
+def hit_rates(seed: int, n: int = 500) -> list:
+    """Returns n hit rates with many zeros and ties, spread over several orders of magnitude."""
+    rng = random.Random(seed)
+    rates = []
+    for i in range(n):
+        kind = rng.random()
+        if kind < 0.3:
+            rates.append(0.0)
+        elif kind < 0.5:
+            rates.append(float(rng.choice([5, 12.5, 50])))
+        else:
+            rates.append(round(10 ** rng.uniform(-3, 2), 4))
+    return rates
+
+
+def serial_results(rates: list, top_k: int, keep_scores: bool) -> results.Results:
+    serial = results.Results(top_k=top_k, keep_scores=keep_scores)
+    for i, rate in enumerate(rates):
+        serial.add("doc{i}.txt".format(i=i), rate)
+    return serial
+
+
+def merged_results(rates: list, seed: int, top_k: int, keep_scores: list) -> results.Results:
+    """Adds the rates in shuffled order to one Results per entry of keep_scores, then merges them."""
+    order = list(range(len(rates)))
+    random.Random(seed).shuffle(order)
+    parts = [results.Results(top_k=top_k, keep_scores=keep, capacity=2) for keep in keep_scores]
+    for position, i in enumerate(order):
+        parts[position % len(parts)].add("doc{i}.txt".format(i=i), rates[i], index=i)
+    merged = results.Results(top_k=top_k, keep_scores=keep_scores[0], capacity=2)
+    for part in parts:
+        merged.merge(part)
+    return merged
+
+
+def assert_same_ranking(merged: results.Results, serial: results.Results):
+    assert merged.num_results == serial.num_results
+    assert merged.top() == serial.top()
+    assert (merged.highest_doc, merged.highest_hit) == (serial.highest_doc, serial.highest_hit)
+    assert (merged.lowest_doc, merged.lowest_hit) == (serial.lowest_doc, serial.lowest_hit)
+    assert merged.mean() == pytest.approx(serial.mean())
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("top_k", [0, 1, 7])
+def test_merge_matches_serial(seed, top_k):
+    rates = hit_rates(seed)
+    serial = serial_results(rates, top_k, True)
+    merged = merged_results(rates, seed, top_k, [True] * 4)
+    assert_same_ranking(merged, serial)
+    assert list(merged.items()) == list(serial.items())
+    assert merged.quartiles() == serial.quartiles()
+    assert merged.to_dict()['results'] == serial.to_dict()['results']
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("keep_scores", [[False] * 4, [True, False, True, True], [False, True, True, False]])
+def test_merge_without_scores_matches_serial(seed, keep_scores):
+    rates = hit_rates(seed)
+    for top_k in [0, 7]:
+        serial = serial_results(rates, top_k, False)
+        merged = merged_results(rates, seed, top_k, keep_scores)
+        assert not merged.keep_scores
+        assert list(merged.items()) == []
+        assert_same_ranking(merged, serial)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_sketch_quartiles_within_accuracy(seed):
+    rates = hit_rates(seed)
+    merged = merged_results(rates, seed, 5, [False] * 3)
+    # The sketch estimates the hit rate at rank q * (n - 1), rounded down:
+    expected = np.quantile(rates, [0.25, 0.5, 0.75], method='lower')
+    for estimate, value in zip(merged.quartiles(), expected):
+        assert math.isclose(estimate, value, rel_tol=results.SKETCH_ACCURACY)
+
+
+def test_ties_resolve_to_the_earliest_document():
+    merged = results.Results(top_k=2, keep_scores=False)
+    later, earlier = results.Results(top_k=2, keep_scores=False), results.Results(top_k=2, keep_scores=False)
+    later.add("c.txt", 50.0, index=2)
+    later.add("d.txt", 5.0, index=3)
+    earlier.add("a.txt", 5.0, index=0)
+    earlier.add("b.txt", 50.0, index=1)
+    merged.merge(later)
+    merged.merge(earlier)
+    assert (merged.highest_doc, merged.lowest_doc) == ("b.txt", "a.txt")
+    assert merged.top() == [("b.txt", 50.0), ("c.txt", 50.0)]
+
+
+def test_results_are_listed_without_scores_or_top_k(capsys):
+    serial = serial_results([0.0, 3.0, 1.0], 0, False)
+    assert serial.to_dict()['results'] == [{'document': "doc1.txt", 'hit_rate': 3.0}, {'document': "doc2.txt", 'hit_rate': 1.0}]
+    serial.display()
+    assert "No results to display." not in capsys.readouterr().out
@@ -0,0 +1,135 @@
+import random
+
+import pytest
+
+import kmp
+import lcss
+import rabinkarp
+import ahocorasick
+import suffixautomaton
+import tokenizer
+
+
+def naive_positions(pattern, string) -> list:
+    """Start index of every occurrence of pattern in string, including overlapping ones."""
+    m = len(pattern)
+    if m == 0:
+        return []
+    return [i for i in range(len(string) - m + 1) if string[i:i + m] == pattern]
+
+
+def naive_hit_rate(pattern, string) -> float:
+    """Hit rate of the baseline KMPSearch(): the share of string covered by occurrences of pattern."""
+    if len(string) == 0:
+        return 0
+    return (len(naive_positions(pattern, string)) * len(pattern)) / len(string) * 100
+
+
+def random_text(rng: random.Random, n: int, alphabet: str) -> str:
+    return "".join(rng.choice(alphabet) for i in range(n))
+
+
+def cases(seed: int) -> list:
+    """Returns (pattern, string) pairs: substrings of the string, random patterns and edge cases."""
+    rng = random.Random(seed)
+    string = random_text(rng, 300, "ab" if seed % 2 == 0 else "abc d")
+    pairs = []
+    for m in [1, 2, 3, 5, 8, 13]:
+        start = rng.randrange(len(string) - m)
+        pairs.append((string[start:start + m], string))
+        pairs.append((random_text(rng, m, "abc"), string))
+    pairs += [("aa", "aaaaaaa"), ("aba", "abababab"), ("abc", "ab"), ("abc", "abc"), ("x", ""),
+              ("wörld", "héllo wörld, wörld — wörld"), ("—", "a—b—c")]
+    return pairs
+
+
+SEEDS = [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_kmp_compiled_matches_naive(seed):
+    for pattern, string in cases(seed):
+        compiled = kmp.compile_pattern(pattern)
+        assert list(compiled.find(string)) == naive_positions(pattern, string)
+        assert compiled.search(string) == naive_hit_rate(pattern, string)
+        assert kmp.KMPSearch(pattern, string) == naive_hit_rate(pattern, string)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_rabinkarp_compiled_matches_naive(seed):
+    for pattern, string in cases(seed):
+        compiled = rabinkarp.compile_pattern(pattern)
+        assert list(compiled.find(string)) == naive_positions(pattern, string)
+        assert compiled.search(string) == naive_hit_rate(pattern, string)
+        assert rabinkarp.RabinKarp(pattern, string) == naive_hit_rate(pattern, string)
+
+
+def pattern_sets(seed: int) -> list:
+    """Returns (patterns, string) pairs with patterns of several lengths, including repeated patterns."""
+    groups = {}
+    for pattern, string in cases(seed):
+        if len(pattern) != 0:
+            groups.setdefault(string, []).append(pattern)
+    return [(patterns + patterns[:2], string) for string, patterns in groups.items()]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_rabinkarp_set_matches_naive(seed):
+    for patterns, string in pattern_sets(seed):
+        expected = [naive_hit_rate(pattern, string) for pattern in patterns]
+        pattern_set = rabinkarp.RabinKarpSet(patterns)
+        assert pattern_set.hit_rates(string) == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_rabinkarp_numpy_matches_naive(seed):
+    for patterns, string in pattern_sets(seed):
+        expected = [naive_hit_rate(pattern, string) for pattern in patterns]
+        pattern_set = rabinkarp.RabinKarpNumpy(patterns)
+        assert pattern_set.hit_rates(string) == expected
+        assert pattern_set.hit_rates(rabinkarp.PrefixHashes(string)) == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_ahocorasick_matches_naive(seed):
+    for patterns, string in pattern_sets(seed):
+        expected = [naive_hit_rate(pattern, string) for pattern in patterns]
+        assert ahocorasick.AhoCorasick(patterns).hit_rates(string) == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_lcss_variants_match_lookup_table(seed):
+    rng = random.Random(seed)
+    for n, m in [(1, 1), (40, 10), (120, 60), (60, 120)]:
+        string = random_text(rng, n, "abc")
+        pattern = random_text(rng, m, "abc")
+        expected = lcss.LCSS(string, pattern)
+        assert lcss.LCSSNumpy(string, pattern) == expected
+        assert lcss.LCSSAutomaton(suffixautomaton.SuffixAutomaton(string), pattern) == expected
+
+
+TEXT = "The sun is bright. The sun is dark! Is the sun bright, or is the sun dark? The moon is bright."
+PATTERNS = ["the sun is", "sun", "is the sun bright", "moon is dark", "The  SUN, is"]
+
+
+def test_token_patterns_match_naive():
+    vocabulary = tokenizer.Vocabulary()
+    tokens = tokenizer.tokenize(TEXT, vocabulary).tolist()
+    for pattern in PATTERNS:
+        pattern_tokens = tokenizer.tokenize(pattern, vocabulary)
+        expected = naive_hit_rate(pattern_tokens.tolist(), tokens)
+        assert kmp.compile_tokens(pattern_tokens).search(tokens) == expected
+        assert rabinkarp.compile_tokens(pattern_tokens).search(tokens) == expected
+
+
+def test_lcss_tokens_matches_lookup_table():
+    vocabulary = tokenizer.Vocabulary()
+    tokens = tokenizer.tokenize(TEXT, vocabulary)
+    for pattern in PATTERNS:
+        pattern_tokens = tokenizer.tokenize(pattern, vocabulary)
+        assert lcss.LCSSTokens(tokens, pattern_tokens) == lcss.LCSS(tokens.tolist(), pattern_tokens.tolist())
+
+
+def test_tokens_ignore_case_and_punctuation():
+    vocabulary = tokenizer.Vocabulary()
+    assert tokenizer.tokenize("The  SUN, is", vocabulary).tolist() == tokenizer.tokenize("the sun is", vocabulary).tolist()
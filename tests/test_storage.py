@@ -0,0 +1,152 @@
+import os
+
+import pytest
+
+import document
+import corpus
+import winnowing
+import corpusindex
+import sharedcorpus
+import corpusmanifest
+
+
+CORPUS_DIR = os.path.join('corpus', 'multiple')
+
+
+def corpus_documents() -> list:
+    """Parses the documents of the sample corpus, along with one holding multi-byte characters."""
+    documents = []
+    for file in sorted(os.listdir(CORPUS_DIR)):
+        with open(os.path.join(CORPUS_DIR, file), 'r') as f:
+            doc = document.Document(file)
+            doc.parse(f.read())
+            documents.append(doc)
+    doc = document.Document("unicode.txt")
+    doc.parse("Héllo wörld — this is a tést. Ünïcode text spans bytes!\n\nA second paragraph… with ellipses. Done.")
+    documents.append(doc)
+    return documents
+
+
+def assert_same_document(loaded: document.Document, original: document.Document):
+    assert loaded.filename == original.filename
+    assert loaded.raw_text == original.raw_text
+    assert list(loaded.paragraphs) == list(original.paragraphs)
+    assert list(loaded.sentences) == list(original.sentences)
+
+
+def test_corpusindex_round_trip(tmp_path):
+    documents = corpus_documents()
+    path = str(tmp_path / "corpus.idx")
+    corpusindex.build(documents, path, 5, 4)
+    index = corpusindex.CorpusIndex(path)
+    corp = index.compile_corpus()
+    assert list(corp.keys) == [doc.filename for doc in documents]
+    for doc in documents:
+        assert_same_document(corp.documents[doc.filename], doc)
+    fingerprint_index = winnowing.FingerprintIndex(5, 4)
+    for doc in documents:
+        fingerprint_index.add_document(doc)
+    mapped = index.fingerprint_index(5, 4)
+    for doc in documents:
+        assert mapped.query(doc) == fingerprint_index.query(doc)
+    assert index.fingerprint_index(6, 4) is None
+    with pytest.raises(TypeError):
+        corp.remove_document(documents[0].filename)
+    # Views into the mapped file must be released before the index is unmapped:
+    del corp, mapped
+    index.close()
+
+
+def test_corpusindex_rejects_other_files(tmp_path):
+    path = tmp_path / "other.idx"
+    path.write_bytes(b'\0' * corpusindex.HEADER.size)
+    with pytest.raises(ValueError):
+        corpusindex.CorpusIndex(str(path))
+
+
+def test_sharedcorpus_round_trip():
+    documents = corpus_documents()
+    corp = corpus.Corpus()
+    for doc in documents:
+        corp.add_document(doc.filename, doc)
+    shared = sharedcorpus.SharedCorpus.create(corp)
+    try:
+        attached = sharedcorpus.SharedCorpus.attach(shared.descriptor)
+        try:
+            assert len(attached) == len(documents)
+            for i, doc in enumerate(documents):
+                assert attached.raw_text(i) == doc.raw_text
+                assert_same_document(attached.document(i), doc)
+            assert [doc.filename for doc in attached] == [doc.filename for doc in documents]
+        finally:
+            attached.close()
+    finally:
+        shared.unlink()
+
+
+def test_sharedcorpus_of_empty_corpus():
+    shared = sharedcorpus.SharedCorpus.create(corpus.Corpus())
+    try:
+        assert len(shared) == 0
+    finally:
+        shared.unlink()
+
+
+def write(path, text: str, mtime_ns: int):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def record(manifest: corpusmanifest.CorpusManifest, directory, file: str):
+    stat = os.stat(directory / file)
+    manifest.record(file, stat.st_size, stat.st_mtime_ns, (directory / file).read_text())
+
+
+def test_corpusmanifest_round_trip(tmp_path):
+    directory = tmp_path / "corpus"
+    directory.mkdir()
+    write(directory / "a.txt", "first", 1_000_000_000)
+    write(directory / "b.txt", "second", 1_000_000_000)
+    (directory / "notes.md").write_text("ignored")
+    path = str(tmp_path / "cache" / "manifest.json")
+
+    manifest = corpusmanifest.CorpusManifest(str(directory), path)
+    candidates, removed = manifest.diff()
+    assert sorted(candidates) == ["a.txt", "b.txt"]
+    assert removed == []
+    for file in ["a.txt", "b.txt"]:
+        record(manifest, directory, file)
+    manifest.save()
+
+    loaded = corpusmanifest.CorpusManifest(str(directory), path)
+    assert loaded.load()
+    assert loaded.entries == manifest.entries
+    assert loaded.diff() == ([], [])
+    assert loaded.diff({"a.txt": None}) == (["b.txt"], [])
+
+    write(directory / "a.txt", "first, edited", 2_000_000_000)
+    write(directory / "c.txt", "third", 1_000_000_000)
+    os.remove(directory / "b.txt")
+    candidates, removed = loaded.diff()
+    assert sorted(candidates) == ["a.txt", "c.txt"]
+    assert removed == ["b.txt"]
+    assert loaded.digest("a.txt") == "first"
+    assert loaded.digest("c.txt") is None
+
+
+def test_corpusmanifest_of_other_directory(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    corpusmanifest.CorpusManifest(str(tmp_path), path).save()
+    assert not corpusmanifest.CorpusManifest(str(tmp_path / "elsewhere"), path).load()
+    assert not corpusmanifest.CorpusManifest(str(tmp_path), str(tmp_path / "missing.json")).load()
+
+
+def test_line_documents_resolve_only_canonical_filenames():
+    buffer = "first line\n\nsecond line\nthird line\n".encode('utf-8')
+    documents = corpus.LineDocuments(buffer, corpus.build_line_index(buffer))
+    assert list(documents) == ["input0.txt", "input1.txt", "input2.txt"]
+    assert documents["input1.txt"].raw_text == "second line"
+    for filename in ["input01.txt", "input001.txt", "input١.txt", "input².txt", "input3.txt", "input-1.txt", "input.txt", 1]:
+        assert filename not in documents
+        with pytest.raises(KeyError):
+            documents[filename]